@@ -1,11 +1,9 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
 
-from src.cosmology.common import DL
-from src.cosmology.model_pt import Ez_PT
-from src.cosmology.model_fluid import Ez_FLUID
-from src.cosmology.common import Ez_LCDM
+from utils.grid_tables import DEFAULT_TOL_MU, load_tables, curves, exact_curves
+from utils.job_server import client_from_env, remote_exact
+from utils.rendering import BACKENDS, render_line
 
 st.set_page_config(page_title="Simulador τ — Huella Oscilante")
 
@@ -29,27 +27,31 @@ b_over_a = st.slider("b/a (PT balance)", 0.0, 1.0, 0.1, 0.01)
 tau_mem = st.slider("τ_mem (fluido)", 0.1, 3.0, 1.5, 0.1)
 
 z = np.linspace(0, 2.0, 400)
-
-if model == "LCDM":
-    Ez = Ez_LCDM(z, Om=Om)
-elif model == "PT-simétrico":
-    Ez = Ez_PT(z, Om=Om, H0=H0, A=A, omega=omega, z_tau=z_tau, delta=delta, b_over_a=b_over_a)
-else:
-    Ez = Ez_FLUID(z, Om=Om, H0=H0, A=A, omega=omega, z_tau=z_tau, delta=delta, tau_mem=tau_mem)
+params = dict(Om=Om, H0=H0, A=A, omega=omega, z_tau=z_tau, delta=delta,
+              b_over_a=b_over_a, tau_mem=tau_mem)
+
+# Tablas precalculadas (python -m utils.grid_tables); si no existen o el punto
+# cae fuera de su dominio (o su error validado en μ supera DEFAULT_TOL_MU),
+# curves() calcula E(z) y μ(z) de forma exacta.
+# Con SIMTAU_JOB_SERVER definido, el cálculo exacto se delega al servidor local
+# de trabajos (python -m utils.job_server), que comparte resultados entre usuarios.
+tables = st.cache_resource(load_tables)()
+client = client_from_env()
+exact = remote_exact(client) if client is not None else exact_curves
+with st.spinner("Calculando…"):
+    try:
+        Ez, mu, source = curves(model, params, z, table=tables.get(model), tol=DEFAULT_TOL_MU, exact=exact)
+    except (OSError, TimeoutError, RuntimeError) as e:
+        st.warning(f"Servidor de trabajos no disponible ({e}); cálculo local.")
+        Ez, mu, source = curves(model, params, z, table=tables.get(model), tol=DEFAULT_TOL_MU)
+
+backend = st.sidebar.radio("Gráficas", BACKENDS)
 
 # Plot E(z)
-fig1, ax1 = plt.subplots()
-ax1.plot(z, Ez, label="E(z)")
-ax1.set_xlabel("z"); ax1.set_ylabel("E(z)")
-ax1.legend(); st.pyplot(fig1)
+render_line("Ez", z, Ez, "z", "E(z)", "E(z)", backend=backend)
 
 # Plot D_L(z)
-from src.cosmology.common import mu_theory
-mu = mu_theory(z, H0=H0, Ez_fn=(Ez_LCDM if model=="LCDM" else (Ez_PT if model=="PT-simétrico" else Ez_FLUID)),
-               Om=Om, H0=H0, A=A, omega=omega, z_tau=z_tau, delta=delta, b_over_a=b_over_a, tau_mem=tau_mem)
-fig2, ax2 = plt.subplots()
-ax2.plot(z, mu, label="μ(z)")
-ax2.set_xlabel("z"); ax2.set_ylabel("μ (mag)")
-ax2.legend(); st.pyplot(fig2)
+render_line("mu", z, mu, "z", "μ (mag)", "μ(z)", backend=backend)
 
+st.caption(f"E(z), μ(z): {source}")
 st.caption("Tip: en PT sube b/a para ver cómo el balance suprime inestabilidades; en Fluido incrementa τ_mem para ver memoria más larga.")
@@ -8,9 +8,11 @@ MODOS DE USO
 1) Simulación directa (Euler–Maruyama):
    python scripts/gen_fig1_fase.py --simulate --steps 200000 --dt 0.002 --seed 42
 
-2) Cargar datos desde CSVs:
-   python scripts/gen_fig1_fase.py --from-csv --phi-chi-csv data/state.csv
+2) Cargar datos desde archivo (binario .traj o CSV):
+   python scripts/gen_fig1_fase.py --from data/state.traj
+   python scripts/gen_fig1_fase.py --from data/state.csv
    # state.csv debe tener columnas: t,phi,dphi,chi,dchi (en ese orden o con encabezados)
+   # Conversión de CSV heredado: python scripts/trajectory_io.py convert data/state.csv data/state.traj
 
 SALIDA
 - assets/fig1-fase.png (por defecto; editable con --out)
@@ -19,15 +21,19 @@ Autor: Ernesto Cisneros Cino (CC0 1.0 Dominio Público)
 """
 import argparse
 import os
+import sys
+import time
 import numpy as np
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
-
 import matplotlib.pyplot as plt
 
+from trajectory_io import STATE_COLUMNS, is_trajectory, load_state, read_csv_state
+
+# utils/ (registro de corridas) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import as_params
+from utils.registry import DEFAULT_DB, Registry
+
 
 # ---------- Utilidades del modelo ----------
 def V(phi, chi, params):
@@ -80,17 +86,23 @@ def simulate_trajectories(steps=200000, dt=0.002, seed=42, burn_in=20000, params
                     Γ_i^n = α_i * 3 H^n
 
     Devuelve arrays numpy con las trayectorias (descartando burn-in).
+    params: dict (claves de script o initial_*) o utils.parameters.ModelParams.
     """
-    if params is None:
-        params = default_params()
+    # Parámetros ligados a variables locales una sola vez (sin búsquedas en dict por paso)
+    p = as_params(params if params is not None else default_params())
+    mp2, mc2, g2 = p.m_phi**2, p.m_chi**2, p.g**2
+    lph, lch, V0 = p.lambda_phi, p.lambda_chi, p.V0
+    a_phi, a_chi = p.alpha_phi, p.alpha_chi
+    tau_phi, tau_chi = p.tau_phi, p.tau_chi
+    tau_phi2, tau_chi2 = tau_phi**2, tau_chi**2
 
     rng = np.random.default_rng(seed)
 
     # Estado inicial
-    phi  = params["phi0"]
-    chi  = params["chi0"]
-    dphi = params["dphi0"]
-    dchi = params["dchi0"]
+    phi  = p.phi0
+    chi  = p.chi0
+    dphi = p.dphi0
+    dchi = p.dchi0
     zph  = 0.0  # ζ_φ
     zch  = 0.0  # ζ_χ
 
@@ -104,18 +116,23 @@ def simulate_trajectories(steps=200000, dt=0.002, seed=42, burn_in=20000, params
     # Integración
     for n in range(steps):
         # Geometría/ruido (usar H^n)
-        Hn   = H_from_state(dphi, dchi, phi, chi, params)
+        # H_from_state / V en línea
+        energy = 0.5*(dphi**2 + dchi**2) + (
+            -0.5 * mp2 * phi**2 + 0.25 * lph * phi**4
+            + 0.5 * mc2 * chi**2 + 0.25 * lch * chi**4
+            + 0.5 * g2 * phi**2 * chi**2 + V0)
+        Hn   = np.sqrt(np.maximum(energy, 1e-16))
         Tgh  = Hn / (2.0*np.pi)
-        GamP = params["alpha_phi"] * 3.0 * Hn
-        GamC = params["alpha_chi"] * 3.0 * Hn
+        GamP = a_phi * 3.0 * Hn
+        GamC = a_chi * 3.0 * Hn
 
         # OU para zetas
-        zph += (-zph/params["tau_phi"]) * dt + np.sqrt((2.0*GamP*Tgh)/(params["tau_phi"]**2) * dt) * rng.standard_normal()
-        zch += (-zch/params["tau_chi"]) * dt + np.sqrt((2.0*GamC*Tgh)/(params["tau_chi"]**2) * dt) * rng.standard_normal()
+        zph += (-zph/tau_phi) * dt + np.sqrt((2.0*GamP*Tgh)/tau_phi2 * dt) * rng.standard_normal()
+        zch += (-zch/tau_chi) * dt + np.sqrt((2.0*GamC*Tgh)/tau_chi2 * dt) * rng.standard_normal()
 
         # Velocidades con disipación + gradiente + ruido
-        dphi += (-3.0*Hn*dphi - dV_dphi(phi, chi, params) + zph) * dt
-        dchi += (-3.0*Hn*dchi - dV_dchi(phi, chi, params) + zch) * dt
+        dphi += (-3.0*Hn*dphi - (-mp2 * phi + lph * phi**3 + g2 * phi * chi**2) + zph) * dt
+        dchi += (-3.0*Hn*dchi - (mc2 * chi + lch * chi**3 + g2 * chi * phi**2) + zch) * dt
 
         # Actualizar campos
         phi  += dphi * dt
@@ -151,33 +168,10 @@ def default_params():
 def load_from_csv(path):
     """
     Lee CSV con columnas: t,phi,dphi,chi,dchi (con encabezado).
-    Si hay más columnas, se ignoran. Si no hay encabezado, intenta por posición.
+    Si hay más columnas, se ignoran (no se parsean). Si no hay encabezado, intenta por posición.
     """
-    if pd is None:
-        raise RuntimeError("Se requiere pandas para --from-csv. Instala: pip install pandas")
-    df = pd.read_csv(path)
-    cols = [c.lower() for c in df.columns]
-    # Mapear posibles nombres
-    def pick(name, alts):
-        for cand in [name] + alts:
-            if cand in cols:
-                return df[df.columns[cols.index(cand)]].to_numpy()
-        return None
-
-    phi  = pick("phi",  ["ϕ"])
-    dphi = pick("dphi", ["phi_dot","phidot","dphidt","ϕdot"])
-    chi  = pick("chi",  [])
-    dchi = pick("dchi", ["chi_dot","chidot","dchidt"])
-    if phi is None or dphi is None or chi is None or dchi is None:
-        # Intento por posición: t,phi,dphi,chi,dchi
-        if df.shape[1] >= 5:
-            phi  = df.iloc[:,1].to_numpy()
-            dphi = df.iloc[:,2].to_numpy()
-            chi  = df.iloc[:,3].to_numpy()
-            dchi = df.iloc[:,4].to_numpy()
-        else:
-            raise ValueError("CSV debe contener columnas (phi,dphi,chi,dchi).")
-    return phi, dphi, chi, dchi
+    cols, _ = read_csv_state(path, STATE_COLUMNS[1:])
+    return cols["phi"], cols["dphi"], cols["chi"], cols["dchi"]
 
 
 # ---------- Figura ----------
@@ -205,13 +199,17 @@ def main():
     ap = argparse.ArgumentParser(description="Genera Fig. 1 (diagramas de fase) desde simulación o CSV.")
     mode = ap.add_mutually_exclusive_group(required=True)
     mode.add_argument("--simulate", action="store_true", help="Simula Euler–Maruyama y genera la figura.")
-    mode.add_argument("--from-csv", action="store_true", help="Carga datos desde CSV y genera la figura.")
+    mode.add_argument("--from", dest="from_path", type=str, default=None,
+                      help="Carga la trayectoria desde un .traj (binario) o un CSV.")
+    mode.add_argument("--from-csv", action="store_true", help="(Heredado) Carga datos desde CSV; usa --from.")
     ap.add_argument("--phi-chi-csv", type=str, default=None, help="Ruta al CSV con columnas t,phi,dphi,chi,dchi.")
     ap.add_argument("--steps", type=int, default=200000, help="Número de pasos (simulación).")
     ap.add_argument("--dt", type=float, default=0.002, help="Paso de tiempo (simulación).")
     ap.add_argument("--burn-in", type=int, default=20000, help="Pasos a descartar antes de guardar.")
     ap.add_argument("--seed", type=int, default=42, help="Semilla RNG (simulación).")
     ap.add_argument("--out", type=str, default="assets/fig1-fase.png", help="Ruta de salida de la figura.")
+    ap.add_argument("--registry", type=str, default=DEFAULT_DB, help="Registro SQLite de corridas (simulación).")
+    ap.add_argument("--no-registry", action="store_true", help="No registrar la corrida.")
 
     # Parámetros del modelo (opcionales para afinar sin tocar el código)
     ap.add_argument("--m_phi", type=float, default=None)
@@ -240,6 +238,14 @@ def main():
         if v is not None:
             params[k] = v
 
+    if args.from_path:
+        if is_trajectory(args.from_path):
+            _, phi, dphi, chi, dchi, _ = load_state(args.from_path, dt_cli=args.dt)
+        else:
+            phi, dphi, chi, dchi = load_from_csv(args.from_path)
+        plot_phase(phi, dphi, chi, dchi, args.out)
+        return
+
     if args.from_csv:
         if not args.phi_chi_csv:
             raise ValueError("Debes indicar --phi-chi-csv con la ruta al CSV.")
@@ -248,11 +254,18 @@ def main():
         return
 
     if args.simulate:
+        t0 = time.perf_counter()
         phi, dphi, chi, dchi = simulate_trajectories(
             steps=args.steps, dt=args.dt, seed=args.seed,
             burn_in=args.burn_in, params=params
         )
+        t_sim = time.perf_counter() - t0
         plot_phase(phi, dphi, chi, dchi, args.out)
+        if not args.no_registry:
+            with Registry(args.registry) as reg:
+                reg.record("fig1", dict(params, steps=args.steps, dt=args.dt, burn_in=args.burn_in),
+                           seed=args.seed, scheme="euler-maruyama", timings=dict(simulate=t_sim),
+                           outputs=dict(png=args.out))
         return
 
 
@@ -8,26 +8,44 @@ USO
 1) Simulación directa:
    python scripts/gen_fig2_espectro.py --simulate --steps 200000 --dt 0.002 --seed 42
 
-2) Desde CSV (t,phi,dphi,chi,dchi):
-   python scripts/gen_fig2_espectro.py --from-csv --phi-chi-csv data/state.csv
+   # Q por autocorrelación (converge con series más cortas) con IC bootstrap:
+   python scripts/gen_fig2_espectro.py --simulate --steps 60000 --q-method acf
+
+   # Paso adaptativo con control de error (ver scripts/adaptive_sde.py), salida en malla dt-sim:
+   python scripts/gen_fig2_espectro.py --simulate --adaptive --rtol 1e-2 --atol 1e-3
+
+2) Desde archivo: binario .traj (ver scripts/trajectory_io.py) o CSV (t,phi,dphi,chi,dchi):
+   python scripts/gen_fig2_espectro.py --from data/state.traj
+   python scripts/gen_fig2_espectro.py --from data/state.csv
    # si el CSV no tiene 't', indica --dt explícitamente
+   # (heredado: --from-csv --phi-chi-csv data/state.csv)
+
+   # CSV/.traj de varios GB: PSD de Welch por trozos, sin cargar la serie
+   python scripts/gen_fig2_espectro.py --from data/state.csv --stream --nperseg 65536 --float32
 
 SALIDAS
 - assets/fig2-espectro.png        (gráfica del espectro normalizado)
 - assets/fig2-metrics.txt         (valores f0, Δf, Q por serie)
 - assets/fig2-spectrum.csv        (frecuencia, PSD_phi_norm, PSD_chi_norm)
+                                  (o fig2-spectrum.traj con --out-format bin)
 
 Autor: Ernesto Cisneros Cino — CC0 1.0 (Dominio público)
 """
 import argparse
 import os
+import sys
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+from trajectory_io import is_trajectory, load_state, open_state_stream, read_csv_state, write_trajectory
+from spectral_batch import WelchPSD, power_spectra, peak_and_width_batch, lorentz_fit_batch, acf_coherence
+from adaptive_sde import default_dt_max, integrate_adaptive
+
+# utils/ (registro de corridas) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import as_params
+from utils.registry import DEFAULT_DB, Registry
 
 
 # ----------------- Utilidades del modelo (mismo núcleo que Fig.1) -----------------
@@ -72,13 +90,21 @@ def default_params():
     )
 
 def simulate_series(steps=200000, dt=0.002, seed=42, burn_in=20000, params=None):
-    """Devuelve arreglos de tiempo t, phi(t), chi(t) tras burn-in."""
-    if params is None:
-        params = default_params()
+    """
+    Devuelve arreglos de tiempo t, phi(t), chi(t) tras burn-in.
+    params: dict (claves de script o initial_*) o utils.parameters.ModelParams.
+    """
+    # Parámetros ligados a variables locales una sola vez (sin búsquedas en dict por paso)
+    p = as_params(params if params is not None else default_params())
+    mp2, mc2, g2 = p.m_phi**2, p.m_chi**2, p.g**2
+    lph, lch, V0 = p.lambda_phi, p.lambda_chi, p.V0
+    a_phi, a_chi = p.alpha_phi, p.alpha_chi
+    tau_phi, tau_chi = p.tau_phi, p.tau_chi
+    tau_phi2, tau_chi2 = tau_phi**2, tau_chi**2
     rng = np.random.default_rng(seed)
 
-    phi, chi = params["phi0"], params["chi0"]
-    dphi, dchi = params["dphi0"], params["dchi0"]
+    phi, chi = p.phi0, p.chi0
+    dphi, dchi = p.dphi0, p.dchi0
     zph, zch = 0.0, 0.0
 
     keep = steps - burn_in
@@ -86,16 +112,21 @@ def simulate_series(steps=200000, dt=0.002, seed=42, burn_in=20000, params=None)
     T   = np.arange(keep) * dt  # relativo tras burn-in
 
     for n in range(steps):
-        Hn   = H_from_state(dphi, dchi, phi, chi, params)
+        # H_from_state / V en línea
+        energy = 0.5*(dphi**2 + dchi**2) + (
+            -0.5 * mp2 * phi**2 + 0.25 * lph * phi**4
+            + 0.5 * mc2 * chi**2 + 0.25 * lch * chi**4
+            + 0.5 * g2 * phi**2 * chi**2 + V0)
+        Hn   = np.sqrt(np.maximum(energy, 1e-16))
         Tgh  = Hn/(2.0*np.pi)
-        GamP = params["alpha_phi"] * 3.0 * Hn
-        GamC = params["alpha_chi"] * 3.0 * Hn
+        GamP = a_phi * 3.0 * Hn
+        GamC = a_chi * 3.0 * Hn
 
-        zph += (-zph/params["tau_phi"]) * dt + np.sqrt((2.0*GamP*Tgh)/(params["tau_phi"]**2) * dt) * rng.standard_normal()
-        zch += (-zch/params["tau_chi"]) * dt + np.sqrt((2.0*GamC*Tgh)/(params["tau_chi"]**2) * dt) * rng.standard_normal()
+        zph += (-zph/tau_phi) * dt + np.sqrt((2.0*GamP*Tgh)/tau_phi2 * dt) * rng.standard_normal()
+        zch += (-zch/tau_chi) * dt + np.sqrt((2.0*GamC*Tgh)/tau_chi2 * dt) * rng.standard_normal()
 
-        dphi += (-3.0*Hn*dphi - dV_dphi(phi, chi, params) + zph) * dt
-        dchi += (-3.0*Hn*dchi - dV_dchi(phi, chi, params) + zch) * dt
+        dphi += (-3.0*Hn*dphi - (-mp2 * phi + lph * phi**3 + g2 * phi * chi**2) + zph) * dt
+        dchi += (-3.0*Hn*dchi - (mc2 * chi + lch * chi**3 + g2 * chi * phi**2) + zch) * dt
 
         phi  += dphi * dt
         chi  += dchi * dt
@@ -111,117 +142,75 @@ def simulate_series(steps=200000, dt=0.002, seed=42, burn_in=20000, params=None)
 # ----------------- Espectro y métricas -----------------
 def power_spectrum(x, dt):
     """PSD normalizada (0..Nyquist) con ventana Hann. Devuelve freqs, psd."""
-    x = np.asarray(x, dtype=float)
-    x = x - np.mean(x)
-    N = x.size
-    if N < 8:
-        raise ValueError("Serie demasiado corta para FFT.")
-    window = np.hanning(N)
-    xw = x * window
-    # Escala para energía ~ correcta (no crítico: normalizamos luego)
-    Xf = np.fft.rfft(xw)
-    psd = (np.abs(Xf)**2) / (np.sum(window**2))
-    freqs = np.fft.rfftfreq(N, dt)
     # Normalizamos cada PSD por su máximo para compararlas en una misma escala
-    m = psd.max() if psd.max() > 0 else 1.0
-    return freqs, psd / m
-
-def peak_and_width(freqs, psd):
-    """Encuentra pico principal (excluye f=0) y calcula Δf (ancho a media altura) por interpolación lineal."""
-    if len(freqs) != len(psd):
+    freqs, psd = power_spectra(x, dt)
+    return freqs, psd[0]
+
+def peak_and_width(freqs, psd, fit="fwhm"):
+    """
+    Pico principal (excluye f=0) y Δf (ancho a media altura, interpolación lineal).
+    fit="lorentz" refina f0 y Δf con un ajuste de Lorentziana (sub-bin).
+    Acepta una PSD (F,) o una pila (R, F); en ese caso devuelve arrays (R,).
+    """
+    if np.shape(psd)[-1] != len(freqs):
         raise ValueError("freqs y psd deben tener misma longitud.")
-    # excluir f=0
-    start = 1 if freqs[0] == 0 else 0
-    idx_peak = start + np.argmax(psd[start:])
-    f0 = freqs[idx_peak]
-    p0 = psd[idx_peak]
-    if p0 <= 0:
-        return f0, np.nan, np.nan  # sin potencia
-    half = 0.5 * p0
-
-    # izquierda
-    iL = idx_peak
-    while iL > 0 and psd[iL] >= half:
-        iL -= 1
-    if iL == idx_peak:
-        fL = np.nan
-    else:
-        # interpolación entre (iL, iL+1)
-        fL = interp_half(freqs[iL], psd[iL], freqs[iL+1], psd[iL+1], half)
-
-    # derecha
-    iR = idx_peak
-    while iR < len(psd)-1 and psd[iR] >= half:
-        iR += 1
-    if iR == idx_peak:
-        fR = np.nan
-    else:
-        # interpolación entre (iR-1, iR)
-        fR = interp_half(freqs[iR-1], psd[iR-1], freqs[iR], psd[iR], half)
-
-    if np.isnan(fL) or np.isnan(fR):
-        return f0, np.nan, np.nan
-    delf = max(fR - fL, 1e-16)  # evitar cero
-    Q = f0 / delf
+    estimator = lorentz_fit_batch if fit == "lorentz" else peak_and_width_batch
+    f0, delf, Q = estimator(freqs, psd)
+    if np.ndim(psd) == 1:
+        return float(f0[0]), float(delf[0]), float(Q[0])
     return f0, delf, Q
 
-def interp_half(x1, y1, x2, y2, yhalf):
-    """Interpolación lineal para hallar x donde y=yhalf entre (x1,y1) y (x2,y2)."""
-    if x2 == x1:
-        return x1
-    a = (y2 - y1) / (x2 - x1)
-    if a == 0:
-        return (x1 + x2) * 0.5
-    return x1 + (yhalf - y1) / a
-
 
 # ----------------- Carga CSV -----------------
-def load_from_csv(path, dt_cli=None):
-    if pd is None:
-        raise RuntimeError("Para --from-csv se requiere pandas (pip install pandas).")
-    df = pd.read_csv(path)
-    cols = [c.lower() for c in df.columns]
-
-    def pick(name, alts):
-        for cand in [name] + alts:
-            if cand in cols:
-                return df[df.columns[cols.index(cand)]].to_numpy()
-        return None
-
-    t = pick("t", ["time"])
-    phi  = pick("phi",  ["ϕ"])
-    chi  = pick("chi",  [])
-    if phi is None or chi is None:
-        # Intento posicional: t,phi,dphi,chi,dchi
-        if df.shape[1] >= 5:
-            t   = df.iloc[:,0].to_numpy()
-            phi = df.iloc[:,1].to_numpy()
-            chi = df.iloc[:,3].to_numpy()
-        else:
-            raise ValueError("CSV debe contener columnas (t, phi, ..., chi, ...).")
-    if t is None:
-        if dt_cli is None:
-            raise ValueError("CSV no tiene columna de tiempo; indica --dt.")
-        t = np.arange(len(phi)) * dt_cli
+def load_from_csv(path, dt_cli=None, dtype=np.float64):
+    # Solo t, phi y chi, por trozos y con dtype explícito (sin DataFrame completo)
+    cols, dt = read_csv_state(path, ("t", "phi", "chi"), dt_cli=dt_cli, dtype=dtype)
+    return cols["t"], cols["phi"], cols["chi"], dt
 
-    # derivar dt medio del CSV
-    dt = float(np.mean(np.diff(t)))
-    return t, phi, chi, dt
+
+def stream_spectra(path, nperseg, dt_cli=None, chunksize=1 << 18, dtype=np.float64):
+    """PSD de Welch de phi y chi leyendo el archivo (.traj o CSV) por trozos."""
+    dt, chunks = open_state_stream(path, ("phi", "chi"), chunksize=chunksize, dtype=dtype, dt_cli=dt_cli)
+    acc = WelchPSD(nperseg, dt, n_series=2)
+    for ch in chunks:
+        acc.push(np.vstack([ch["phi"], ch["chi"]]))
+    f, psd = acc.result()
+    return f, psd[0], psd[1], dt
 
 
 # ----------------- Plot y guardados -----------------
-def plot_and_save(freqs, psd_phi, psd_chi, metrics_phi, metrics_chi, out_png, out_csv, out_txt):
+METRICS_HEADER = {
+    "fwhm": "Métricas espectrales (pico principal y ancho a media altura)",
+    "lorentz": "Métricas espectrales (pico principal y ancho de la Lorentziana ajustada)",
+    "acf": "Métricas por autocorrelación (ajuste de coseno amortiguado)",
+}
+
+
+def plot_and_save(freqs, psd_phi, psd_chi, metrics_phi, metrics_chi, out_png, out_csv, out_txt,
+                  q_ci=None, out_format="csv", meta=None, method="fwhm"):
+    """
+    method: origen de las métricas ("fwhm" | "lorentz" | "acf"), para la cabecera del TXT.
+    Devuelve la ruta real del espectro (<stem>.traj con out_format="bin").
+    """
     os.makedirs(os.path.dirname(out_png), exist_ok=True)
 
-    # Guardar CSV con espectros (normalizados)
-    arr = np.column_stack([freqs, psd_phi, psd_chi])
-    np.savetxt(out_csv, arr, delimiter=",", header="f,PSD_phi_norm,PSD_chi_norm", comments="")
+    # Guardar espectros (normalizados): CSV o binario columnar (.traj)
+    if out_format == "bin":
+        out_csv = os.path.splitext(out_csv)[0] + ".traj"
+        write_trajectory(out_csv, dict(f=freqs, PSD_phi_norm=psd_phi, PSD_chi_norm=psd_chi), **(meta or {}))
+    else:
+        arr = np.column_stack([freqs, psd_phi, psd_chi])
+        np.savetxt(out_csv, arr, delimiter=",", header="f,PSD_phi_norm,PSD_chi_norm", comments="")
 
     # Guardar métricas
     with open(out_txt, "w", encoding="utf-8") as f:
-        f.write("Métricas espectrales (pico principal y ancho a media altura)\n")
+        f.write(METRICS_HEADER[method] + "\n")
         f.write(f"phi(t):  f0={metrics_phi[0]:.6g},  Δf={metrics_phi[1]:.6g},  Q={metrics_phi[2]:.6g}\n")
         f.write(f"chi(t):  f0={metrics_chi[0]:.6g},  Δf={metrics_chi[1]:.6g},  Q={metrics_chi[2]:.6g}\n")
+        if q_ci is not None:
+            f.write("Q por autocorrelación (coseno amortiguado), IC bootstrap por bloques:\n")
+            for name, (lo, hi) in zip(["phi(t)", "chi(t)"], q_ci):
+                f.write(f"{name}:  Q ∈ [{lo:.6g}, {hi:.6g}]\n")
 
     # Figura
     plt.figure(figsize=(8, 6))
@@ -245,7 +234,8 @@ def plot_and_save(freqs, psd_phi, psd_chi, metrics_phi, metrics_chi, out_png, ou
     plt.tight_layout()
     plt.savefig(out_png, dpi=220)
     plt.close()
-    print(f"[OK] Guardado: {out_png}\n[OK] Métricas: {out_txt}\n[OK] CSV espectro: {out_csv}")
+    print(f"[OK] Guardado: {out_png}\n[OK] Métricas: {out_txt}\n[OK] Espectro: {out_csv}")
+    return out_csv
 
 
 # ----------------- CLI -----------------
@@ -253,16 +243,38 @@ def main():
     ap = argparse.ArgumentParser(description="Fig.2: espectro de potencia y métricas (f0, Δf, Q).")
     mode = ap.add_mutually_exclusive_group(required=True)
     mode.add_argument("--simulate", action="store_true", help="Simula Euler–Maruyama y calcula el espectro.")
-    mode.add_argument("--from-csv", action="store_true", help="Carga series desde CSV y calcula el espectro.")
+    mode.add_argument("--from", dest="from_path", type=str, default=None,
+                      help="Carga series desde un .traj (binario) o un CSV y calcula el espectro.")
+    mode.add_argument("--from-csv", action="store_true", help="(Heredado) Carga series desde CSV; usa --from.")
     ap.add_argument("--phi-chi-csv", type=str, default=None, help="Ruta al CSV con t,phi,dphi,chi,dchi.")
     ap.add_argument("--dt", type=float, default=None, help="Paso de tiempo (solo si CSV no trae t).")
     ap.add_argument("--steps", type=int, default=200000, help="Pasos de simulación.")
     ap.add_argument("--burn-in", type=int, default=20000, help="Descartar pasos iniciales.")
     ap.add_argument("--dt-sim", type=float, default=0.002, help="Δt (simulación).")
     ap.add_argument("--seed", type=int, default=42, help="Semilla RNG.")
+    ap.add_argument("--adaptive", action="store_true",
+                    help="Paso adaptativo (duplicación de paso + puente browniano); salida remuestreada a --dt-sim.")
+    ap.add_argument("--rtol", type=float, default=1e-2, help="Tolerancia relativa del paso adaptativo.")
+    ap.add_argument("--atol", type=float, default=1e-3, help="Tolerancia absoluta del paso adaptativo.")
+    ap.add_argument("--dt-max", type=float, default=None,
+                    help="Paso máximo del integrador adaptativo (por defecto min(0.02, τ_min/10)).")
+    ap.add_argument("--q-method", choices=["psd", "acf"], default="psd",
+                    help="Q por ancho del pico espectral (psd) o por ajuste de la autocorrelación (acf).")
+    ap.add_argument("--n-boot", type=int, default=200, help="Remuestreos bootstrap del IC de Q (solo acf).")
+    ap.add_argument("--peak-fit", choices=["fwhm", "lorentz"], default="fwhm",
+                    help="Δf por media altura (interpolación lineal) o ajuste de Lorentziana.")
     ap.add_argument("--out", type=str, default="assets/fig2-espectro.png", help="PNG de salida.")
     ap.add_argument("--out-csv", type=str, default="assets/fig2-spectrum.csv", help="CSV de salida.")
     ap.add_argument("--out-txt", type=str, default="assets/fig2-metrics.txt", help="TXT de métricas.")
+    ap.add_argument("--out-format", choices=["csv", "bin"], default="csv",
+                    help="Formato del espectro: CSV o binario columnar (.traj junto a --out-csv).")
+    ap.add_argument("--registry", type=str, default=DEFAULT_DB, help="Registro SQLite de corridas (simulación).")
+    ap.add_argument("--no-registry", action="store_true", help="No registrar la corrida.")
+    ap.add_argument("--stream", action="store_true",
+                    help="Lee el archivo por trozos y estima la PSD por Welch (series que no caben en memoria).")
+    ap.add_argument("--nperseg", type=int, default=65536, help="Muestras por segmento de Welch (con --stream).")
+    ap.add_argument("--chunksize", type=int, default=1 << 18, help="Filas por trozo de lectura.")
+    ap.add_argument("--float32", action="store_true", help="Lee las columnas en float32 (mitad de memoria).")
 
     # overrides de parámetros del modelo (opcional)
     for k in ["m_phi","m_chi","lambda_phi","lambda_chi","g","V0",
@@ -279,32 +291,86 @@ def main():
         if v is not None:
             params[k] = v
 
-    if args.from_csv:
+    dtype = np.float32 if args.float32 else np.float64
+    src = args.from_path or (args.phi_chi_csv if args.from_csv else None)
+    if args.stream and (src is None or args.q_method == "acf"):
+        ap.error("--stream requiere --from (o --from-csv) y --q-method psd.")
+
+    meta = dict(dt=None, seed=None, params={})
+    if args.stream:
+        f, psd_phi, psd_chi, dt = stream_spectra(src, args.nperseg, dt_cli=args.dt,
+                                                 chunksize=args.chunksize, dtype=dtype)
+        meta.update(dt=dt)
+    elif args.from_path:
+        if is_trajectory(args.from_path):
+            t, phi, _, chi, _, dt = load_state(args.from_path, dt_cli=args.dt)
+        else:
+            t, phi, chi, dt = load_from_csv(args.from_path, dt_cli=args.dt, dtype=dtype)
+        meta.update(dt=dt)
+    elif args.from_csv:
         if not args.phi_chi_csv:
             raise ValueError("Usa --phi-chi-csv con la ruta a tu archivo CSV.")
-        t, phi, chi, dt = load_from_csv(args.phi_chi_csv, dt_cli=args.dt)
+        t, phi, chi, dt = load_from_csv(args.phi_chi_csv, dt_cli=args.dt, dtype=dtype)
     else:
-        t, phi, chi = simulate_series(steps=args.steps, dt=args.dt_sim,
-                                      seed=args.seed, burn_in=args.burn_in, params=params)
+        t0 = time.perf_counter()
+        if args.adaptive:
+            ad = integrate_adaptive(params, t_end=args.steps*args.dt_sim, t_burn=args.burn_in*args.dt_sim,
+                                    dt_out=args.dt_sim, seed=args.seed, rtol=args.rtol, atol=args.atol,
+                                    dt0=args.dt_sim, dt_max=args.dt_max)
+            t, phi, chi = ad["t"], ad["phi"], ad["chi"]
+            print(f"[i] Paso adaptativo: {ad['n_accept']} aceptados, {ad['n_reject']} rechazados "
+                  f"(paso fijo: {args.steps})")
+        else:
+            t, phi, chi = simulate_series(steps=args.steps, dt=args.dt_sim,
+                                          seed=args.seed, burn_in=args.burn_in, params=params)
         dt = args.dt_sim
-
-    # Espectros
-    f_phi, psd_phi = power_spectrum(phi, dt)
-    f_chi, psd_chi = power_spectrum(chi, dt)
-
-    # Ajustar rejillas de frecuencia (interpolar si hiciera falta)
-    if not np.array_equal(f_phi, f_chi):
-        # Interpolar chi al grid de phi (simple y suficiente)
-        psd_chi = np.interp(f_phi, f_chi, psd_chi)
-        f = f_phi
+        meta.update(dt=dt, seed=args.seed, params=params)
+        t_sim = time.perf_counter() - t0
+    t0 = time.perf_counter()
+
+    # Espectros (phi y chi en una sola FFT por lotes); con --stream ya vienen de Welch
+    if not args.stream:
+        if len(phi) == len(chi):
+            f, psd = power_spectra(np.vstack([phi, chi]), dt)
+            psd_phi, psd_chi = psd
+        else:
+            f, psd_phi = power_spectrum(phi, dt)
+            f_chi, psd_chi = power_spectrum(chi, dt)
+            # Interpolar chi al grid de phi (simple y suficiente)
+            psd_chi = np.interp(f, f_chi, psd_chi)
+
+    q_ci = None
+    if args.q_method == "acf":
+        n = min(len(phi), len(chi))
+        acf = acf_coherence(np.vstack([phi[:n], chi[:n]]), dt, n_boot=args.n_boot, seed=args.seed)
+        f0, delf, Q = acf["f0"], acf["delf"], acf["Q"]
+        q_ci = list(zip(acf["Q_lo"], acf["Q_hi"]))
     else:
-        f = f_phi
-
-    metrics_phi = peak_and_width(f, psd_phi)
-    metrics_chi = peak_and_width(f, psd_chi)
-
-    plot_and_save(f, psd_phi, psd_chi, metrics_phi, metrics_chi,
-                  args.out, args.out_csv, args.out_txt)
+        f0, delf, Q = peak_and_width(f, np.vstack([psd_phi, psd_chi]), fit=args.peak_fit)
+    metrics_phi = (f0[0], delf[0], Q[0])
+    metrics_chi = (f0[1], delf[1], Q[1])
+
+    t_an = time.perf_counter() - t0
+
+    out_spec = plot_and_save(f, psd_phi, psd_chi, metrics_phi, metrics_chi,
+                                        args.out, args.out_csv, args.out_txt, q_ci=q_ci,
+                             out_format=args.out_format, meta=meta,
+                             method="acf" if args.q_method == "acf" else args.peak_fit)
+    if args.simulate and not args.no_registry:
+        metrics = {f"{k}_{s}": float(v) for s, m in (("phi", metrics_phi), ("chi", metrics_chi))
+                   for k, v in zip(("f0", "delf", "Q"), m)}
+        config = dict(params, steps=args.steps, dt=args.dt_sim, burn_in=args.burn_in,
+                      q_method=args.q_method, peak_fit=args.peak_fit)
+        scheme = "euler-maruyama"
+        if args.adaptive:
+            config.update(rtol=args.rtol, atol=args.atol,
+                          dt_max=default_dt_max(params) if args.dt_max is None else args.dt_max)
+            metrics.update(n_accept=ad["n_accept"], n_reject=ad["n_reject"])
+            scheme = "adaptive-step-doubling"
+        with Registry(args.registry) as reg:
+            reg.record("fig2", config,
+                       seed=args.seed, scheme=scheme, timings=dict(simulate=t_sim, analysis=t_an),
+                       metrics=metrics, outputs=dict(png=args.out, csv=out_spec, txt=args.out_txt))
 
 
 if __name__ == "__main__":
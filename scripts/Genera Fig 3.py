@@ -8,26 +8,39 @@ MODOS
 1) Simulación directa:
    python scripts/gen_fig3_observables.py --simulate --steps 200000 --dt-sim 0.002 --seed 42
 
-2) Desde CSV (t,phi,dphi,chi,dchi):
-   python scripts/gen_fig3_observables.py --from-csv --phi-chi-csv data/state.csv
+2) Desde archivo: binario .traj (ver scripts/trajectory_io.py) o CSV (t,phi,dphi,chi,dchi):
+   python scripts/gen_fig3_observables.py --from data/state.traj
+   python scripts/gen_fig3_observables.py --from data/state.csv
    # si el CSV no trae 't', especifica --dt
+   # (heredado: --from-csv --phi-chi-csv data/state.csv)
+
+   # CSV/.traj de varios GB: lectura por trozos, series escritas trozo a trozo
+   python scripts/gen_fig3_observables.py --from data/state.csv --stream --hist-range=-1,1
 
 SALIDAS
 - assets/fig3-observables.png
 - assets/fig3-observables.csv           (t, Omega_phi, Omega_chi, w_total, w_ma)
+                                        (o fig3-observables.traj con --out-format bin)
 - assets/fig3-stats.txt                 (resumen: <w>, var, etc.)
 
 Autor: Ernesto Cisneros Cino — CC0 1.0 (Dominio público)
 """
 import argparse
 import os
+import sys
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
-try:
-    import pandas as pd
-except ImportError:
-    pd = None
+from trajectory_io import (STATE_COLUMNS, TrajectoryWriter, count_rows, is_trajectory, load_state,
+                           open_state_stream, read_csv_state, write_trajectory)
+from rolling_stats import RollingStats, rolling_mean
+from streaming_stats import Welford, StreamingHistogram
+
+# utils/ (registro de corridas) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import as_params
+from utils.registry import DEFAULT_DB, Registry
 
 
 # ----------------- Núcleo de modelo (coherente con Fig.1/2) -----------------
@@ -74,12 +87,18 @@ def default_params():
 
 # ----------------- Simulación mínima para obtener series -----------------
 def simulate_series(steps=200000, dt=0.002, seed=42, burn_in=20000, params=None):
-    if params is None:
-        params = default_params()
+    """params: dict (claves de script o initial_*) o utils.parameters.ModelParams."""
+    # Parámetros ligados a variables locales una sola vez (sin búsquedas en dict por paso)
+    p = as_params(params if params is not None else default_params())
+    mp2, mc2, g2 = p.m_phi**2, p.m_chi**2, p.g**2
+    lph, lch, V0 = p.lambda_phi, p.lambda_chi, p.V0
+    a_phi, a_chi = p.alpha_phi, p.alpha_chi
+    tau_phi, tau_chi = p.tau_phi, p.tau_chi
+    tau_phi2, tau_chi2 = tau_phi**2, tau_chi**2
     rng = np.random.default_rng(seed)
 
-    phi, chi = params["phi0"], params["chi0"]
-    dphi, dchi = params["dphi0"], params["dchi0"]
+    phi, chi = p.phi0, p.chi0
+    dphi, dchi = p.dphi0, p.dchi0
     zph, zch = 0.0, 0.0
 
     keep = steps - burn_in
@@ -88,18 +107,23 @@ def simulate_series(steps=200000, dt=0.002, seed=42, burn_in=20000, params=None)
     DPHI = np.empty(keep); DCHI = np.empty(keep)
 
     for n in range(steps):
-        Hn   = H_from_state(dphi, dchi, phi, chi, params)
+        # H_from_state / V en línea
+        energy = 0.5*(dphi**2 + dchi**2) + (
+            -0.5 * mp2 * phi**2 + 0.25 * lph * phi**4
+            + 0.5 * mc2 * chi**2 + 0.25 * lch * chi**4
+            + 0.5 * g2 * phi**2 * chi**2 + V0)
+        Hn   = np.sqrt(np.maximum(energy, 1e-16))
         Tgh  = Hn/(2.0*np.pi)
-        GamP = params["alpha_phi"] * 3.0 * Hn
-        GamC = params["alpha_chi"] * 3.0 * Hn
+        GamP = a_phi * 3.0 * Hn
+        GamC = a_chi * 3.0 * Hn
 
         # OU zetas
-        zph += (-zph/params["tau_phi"]) * dt + np.sqrt((2.0*GamP*Tgh)/(params["tau_phi"]**2) * dt) * rng.standard_normal()
-        zch += (-zch/params["tau_chi"]) * dt + np.sqrt((2.0*GamC*Tgh)/(params["tau_chi"]**2) * dt) * rng.standard_normal()
+        zph += (-zph/tau_phi) * dt + np.sqrt((2.0*GamP*Tgh)/tau_phi2 * dt) * rng.standard_normal()
+        zch += (-zch/tau_chi) * dt + np.sqrt((2.0*GamC*Tgh)/tau_chi2 * dt) * rng.standard_normal()
 
         # Velocidades y campos
-        dphi += (-3.0*Hn*dphi - dV_dphi(phi, chi, params) + zph) * dt
-        dchi += (-3.0*Hn*dchi - dV_dchi(phi, chi, params) + zch) * dt
+        dphi += (-3.0*Hn*dphi - (-mp2 * phi + lph * phi**3 + g2 * phi * chi**2) + zph) * dt
+        dchi += (-3.0*Hn*dchi - (mc2 * chi + lch * chi**3 + g2 * chi * phi**2) + zch) * dt
         phi  += dphi * dt
         chi  += dchi * dt
 
@@ -114,42 +138,10 @@ def simulate_series(steps=200000, dt=0.002, seed=42, burn_in=20000, params=None)
 
 
 # ----------------- Cargar desde CSV externo -----------------
-def load_from_csv(path, dt_cli=None):
-    if pd is None:
-        raise RuntimeError("Para --from-csv se requiere pandas (pip install pandas).")
-    df = pd.read_csv(path)
-    cols = [c.lower() for c in df.columns]
-
-    def pick(name, alts):
-        for cand in [name] + alts:
-            if cand in cols:
-                return df[df.columns[cols.index(cand)]].to_numpy()
-        return None
-
-    t = pick("t", ["time"])
-    phi  = pick("phi",  ["ϕ"])
-    dphi = pick("dphi", ["phi_dot","phidot","dphidt","ϕdot"])
-    chi  = pick("chi",  [])
-    dchi = pick("dchi", ["chi_dot","chidot","dchidt"])
-
-    if phi is None or dphi is None or chi is None or dchi is None:
-        # Posicional: t,phi,dphi,chi,dchi
-        if df.shape[1] >= 5:
-            t   = df.iloc[:,0].to_numpy()
-            phi = df.iloc[:,1].to_numpy()
-            dphi= df.iloc[:,2].to_numpy()
-            chi = df.iloc[:,3].to_numpy()
-            dchi= df.iloc[:,4].to_numpy()
-        else:
-            raise ValueError("CSV debe contener columnas (t, phi, dphi, chi, dchi).")
-
-    if t is None:
-        if dt_cli is None:
-            raise ValueError("CSV no tiene columna de tiempo; indique --dt.")
-        t = np.arange(len(phi)) * dt_cli
-
-    dt = float(np.mean(np.diff(t)))
-    return t, phi, dphi, chi, dchi, dt
+def load_from_csv(path, dt_cli=None, dtype=np.float64):
+    # Solo las columnas de estado, por trozos y con dtype explícito (sin DataFrame completo)
+    cols, dt = read_csv_state(path, STATE_COLUMNS, dt_cli=dt_cli, dtype=dtype)
+    return cols["t"], cols["phi"], cols["dphi"], cols["chi"], cols["dchi"], dt
 
 
 # ----------------- Observables efectivos -----------------
@@ -175,35 +167,129 @@ def observables(phi, dphi, chi, dchi, params):
 
 
 def moving_average(x, M):
+    # Igual que np.convolve(x, ones(M)/M, mode="same"), pero en O(N) con sumas acumuladas
     if M <= 1:
         return x
-    kernel = np.ones(M) / M
-    return np.convolve(x, kernel, mode="same")
+    return rolling_mean(x, M)
+
+
+def stream_observables(path, params, out_csv, dt_cli=None, ma_window=2000, hist_frac=0.4,
+                       hist_bins=40, hist_range=None, out_format="csv", meta=None,
+                       chunksize=1 << 18, dtype=np.float64, max_plot=20000):
+    """
+    Observables de un .traj o CSV grande leído por trozos: las series (con w_ma)
+    se escriben trozo a trozo, la cola alimenta Welford + histograma y solo se
+    guarda en memoria una versión diezmada (≤ max_plot puntos) para la figura.
+    Sin hist_range el histograma usa [-1, 1] (el rango no se conoce de antemano).
+    Devuelve (plot dict, acc, hist, out_csv).
+    """
+    N = count_rows(path)
+    n_tail = max(100, int(hist_frac * N))
+    tail0 = N - n_tail
+    every = max(1, -(-N // max_plot))
+    dt, chunks = open_state_stream(path, STATE_COLUMNS[1:], chunksize=chunksize, dtype=dtype, dt_cli=dt_cli)
+    names = ["t", "Omega_phi", "Omega_chi", "w_total", "w_ma"]
+    rs = RollingStats(min(max(1, int(ma_window)), N))
+    acc = Welford()
+    lo, hi = hist_range if hist_range is not None else (-1.0, 1.0)
+    hist = StreamingHistogram(lo, hi, hist_bins)
+
+    os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+    if out_format == "bin":
+        out_csv = os.path.splitext(out_csv)[0] + ".traj"
+        sink = TrajectoryWriter(out_csv, names, N, **dict(meta or {}, dt=dt))
+    else:
+        sink = open(out_csv, "w", encoding="utf-8")
+        sink.write(",".join(names) + "\n")
+    plot = {k: [] for k in names}
+    pending = {k: np.empty(0) for k in names[:4]}  # filas a la espera de su w_ma
+    i_read = i_out = 0
+
+    def emit(w_ma):
+        nonlocal pending, i_out
+        n = len(w_ma)
+        rows = {k: v[:n] for k, v in pending.items()}
+        rows["w_ma"] = w_ma
+        pending = {k: v[n:] for k, v in pending.items()}
+        if out_format == "bin":
+            sink.append(**rows)
+        else:
+            np.savetxt(sink, np.column_stack([rows[k] for k in names]), delimiter=",", fmt="%.9g")
+        keep = (i_out + np.arange(n)) % every == 0
+        for k in names:
+            plot[k].append(rows[k][keep])
+        i_out += n
+
+    try:
+        for ch in chunks:
+            Om_phi, Om_chi, w = observables(ch["phi"], ch["dphi"], ch["chi"], ch["dchi"], params)
+            new = dict(t=ch["t"], Omega_phi=Om_phi, Omega_chi=Om_chi, w_total=w)
+            pending = {k: np.concatenate([pending[k], new[k]]) for k in pending}
+            if i_read + len(w) > tail0:
+                tail = w[max(tail0 - i_read, 0):]
+                acc.update(tail)
+                hist.update(tail)
+            i_read += len(w)
+            emit(rs.push(w).get("mean", np.empty(0)))
+        emit(rs.flush().get("mean", np.empty(0)))
+    finally:
+        sink.close()
+    return {k: np.concatenate(v) for k, v in plot.items()}, acc, hist, out_csv
 
 
 # ----------------- Figura y guardados -----------------
 def plot_observables(t, Omega_phi, Omega_chi, w_total, w_ma, out_png, out_csv, out_txt,
-                     hist_frac=0.4):
+                     hist_frac=0.4, hist_bins=40, hist_range=None, hist_out=None, chunk=65536,
+                     out_format="csv", meta=None, stats=None):
     """
     hist_frac: fracción final de la serie usada para el histograma (régimen tardío).
+    hist_range: (lo, hi) fijo del histograma; por defecto el rango de la cola.
+    hist_out: JSON con histograma + media/varianza (fusionable entre corridas).
+    stats: (Welford, StreamingHistogram) ya acumulados; las series ya están guardadas
+           (stream_observables) y las recibidas son solo las diezmadas para la figura.
+    Devuelve (acc, hist, out_csv), con out_csv la ruta real de las series
+    (<stem>.traj con out_format="bin").
     """
     os.makedirs(os.path.dirname(out_png), exist_ok=True)
 
-    # Guardar CSV
-    arr = np.column_stack([t, Omega_phi, Omega_chi, w_total, w_ma])
-    np.savetxt(out_csv, arr, delimiter=",", header="t,Omega_phi,Omega_chi,w_total,w_ma", comments="", fmt="%.9g")
-
-    # Stats tardías
-    N = len(w_total)
-    n_tail = max(100, int(hist_frac * N))
-    tail = w_total[-n_tail:]
-    mean_w = float(np.mean(tail))
-    var_w  = float(np.var(tail))
+    if stats is not None:
+        acc, hist = stats
+        hist_range = [hist.lo, hist.hi]
+    else:
+        # Guardar series: CSV o binario columnar (.traj)
+        if out_format == "bin":
+            out_csv = os.path.splitext(out_csv)[0] + ".traj"
+            write_trajectory(out_csv, dict(t=t, Omega_phi=Omega_phi, Omega_chi=Omega_chi,
+                                           w_total=w_total, w_ma=w_ma), **(meta or {}))
+        else:
+            arr = np.column_stack([t, Omega_phi, Omega_chi, w_total, w_ma])
+            np.savetxt(out_csv, arr, delimiter=",", header="t,Omega_phi,Omega_chi,w_total,w_ma", comments="", fmt="%.9g")
+
+        # Stats tardías: la cola se consume por trozos en acumuladores fusionables
+        N = len(w_total)
+        n_tail = max(100, int(hist_frac * N))
+        tail = w_total[-n_tail:]
+        if hist_range is None:
+            lo, hi = float(np.nanmin(tail)), float(np.nanmax(tail))
+            hist_range = (lo, hi) if hi > lo else (lo - 0.5, lo + 0.5)
+        acc = Welford()
+        hist = StreamingHistogram(hist_range[0], hist_range[1], hist_bins)
+        for i in range(0, n_tail, chunk):
+            acc.update(tail[i:i + chunk])
+            hist.update(tail[i:i + chunk])
+    mean_w = acc.mean
+    var_w  = acc.var()
     with open(out_txt, "w", encoding="utf-8") as f:
         f.write("Resumen de observables (régimen tardío)\n")
         f.write(f"<w>_tail = {mean_w:.6g}\n")
         f.write(f"Var(w)_tail = {var_w:.6g}\n")
         f.write(f"Ventana de suavizado (puntos) = usado en w_ma\n")
+        if hist.underflow or hist.overflow:
+            f.write(f"Histograma: {hist.underflow} bajo y {hist.overflow} sobre el rango {hist_range}\n")
+    if hist_out:
+        import json
+        with open(hist_out, "w", encoding="utf-8") as f:
+            json.dump(dict(welford=acc.to_dict(), hist=hist.to_dict()), f)
 
     # Figura: serie temporal + histograma
     fig, axes = plt.subplots(2, 1, figsize=(8, 7), gridspec_kw={"height_ratios":[2.2,1]}, sharex=False)
@@ -219,7 +305,7 @@ def plot_observables(t, Omega_phi, Omega_chi, w_total, w_ma, out_png, out_csv, o
     ax.legend(loc="best")
 
     ax2 = axes[1]
-    ax2.hist(tail, bins=40, density=True, alpha=0.8)
+    ax2.stairs(hist.density(), hist.edges, fill=True, alpha=0.8)
     ax2.set_xlabel("w_total (tardío)")
     ax2.set_ylabel("Densidad")
     ax2.grid(True, alpha=0.3)
@@ -227,7 +313,8 @@ def plot_observables(t, Omega_phi, Omega_chi, w_total, w_ma, out_png, out_csv, o
     plt.tight_layout()
     plt.savefig(out_png, dpi=220)
     plt.close()
-    print(f"[OK] Guardado: {out_png}\n[OK] CSV: {out_csv}\n[OK] Stats: {out_txt}")
+    print(f"[OK] Guardado: {out_png}\n[OK] Series: {out_csv}\n[OK] Stats: {out_txt}")
+    return acc, hist, out_csv
 
 
 # ----------------- CLI -----------------
@@ -235,7 +322,9 @@ def main():
     ap = argparse.ArgumentParser(description="Fig.3: Ω_φ, Ω_χ, w_total y su histograma (régimen tardío).")
     mode = ap.add_mutually_exclusive_group(required=True)
     mode.add_argument("--simulate", action="store_true", help="Simula y genera la figura.")
-    mode.add_argument("--from-csv", action="store_true", help="Carga series desde CSV y genera la figura.")
+    mode.add_argument("--from", dest="from_path", type=str, default=None,
+                      help="Carga series desde un .traj (binario) o un CSV y genera la figura.")
+    mode.add_argument("--from-csv", action="store_true", help="(Heredado) Carga series desde CSV; usa --from.")
     ap.add_argument("--phi-chi-csv", type=str, default=None, help="CSV con t,phi,dphi,chi,dchi.")
     ap.add_argument("--dt", type=float, default=None, help="Paso de tiempo (si CSV no trae t).")
     ap.add_argument("--steps", type=int, default=200000, help="Pasos (simulación).")
@@ -244,9 +333,21 @@ def main():
     ap.add_argument("--seed", type=int, default=42, help="Semilla RNG.")
     ap.add_argument("--ma-window", type=int, default=2000, help="Ventana de media móvil (puntos).")
     ap.add_argument("--hist-frac", type=float, default=0.4, help="Fracción final para histograma.")
+    ap.add_argument("--hist-bins", type=int, default=40, help="Bins del histograma.")
+    ap.add_argument("--hist-range", type=str, default=None,
+                    help="Rango fijo 'lo,hi' del histograma (necesario para fusionar corridas).")
+    ap.add_argument("--hist-out", type=str, default=None, help="JSON con histograma y media/varianza de la cola.")
     ap.add_argument("--out", type=str, default="assets/fig3-observables.png", help="PNG de salida.")
     ap.add_argument("--out-csv", type=str, default="assets/fig3-observables.csv", help="CSV de salida.")
     ap.add_argument("--out-txt", type=str, default="assets/fig3-stats.txt", help="TXT de métricas.")
+    ap.add_argument("--out-format", choices=["csv", "bin"], default="csv",
+                    help="Formato de las series: CSV o binario columnar (.traj junto a --out-csv).")
+    ap.add_argument("--registry", type=str, default=DEFAULT_DB, help="Registro SQLite de corridas (simulación).")
+    ap.add_argument("--no-registry", action="store_true", help="No registrar la corrida.")
+    ap.add_argument("--stream", action="store_true",
+                    help="Lee el archivo por trozos y escribe las series trozo a trozo (CSV/.traj de varios GB).")
+    ap.add_argument("--chunksize", type=int, default=1 << 18, help="Filas por trozo de lectura.")
+    ap.add_argument("--float32", action="store_true", help="Lee las columnas en float32 (mitad de memoria).")
 
     # overrides del modelo
     for k in ["m_phi","m_chi","lambda_phi","lambda_chi","g","V0",
@@ -263,20 +364,53 @@ def main():
         if v is not None:
             params[k] = v
 
-    if args.from_csv:
+    dtype = np.float32 if args.float32 else np.float64
+    hist_range = [float(v) for v in args.hist_range.split(",")] if args.hist_range else None
+    src = args.from_path or (args.phi_chi_csv if args.from_csv else None)
+    meta = dict(dt=None, seed=None, params=params)
+    if args.stream:
+        if src is None:
+            ap.error("--stream requiere --from (o --from-csv).")
+        plot, acc, hist, out_series = stream_observables(
+            src, params, args.out_csv, dt_cli=args.dt, ma_window=args.ma_window,
+            hist_frac=args.hist_frac, hist_bins=args.hist_bins, hist_range=hist_range,
+            out_format=args.out_format, meta=meta, chunksize=args.chunksize, dtype=dtype)
+        plot_observables(plot["t"], plot["Omega_phi"], plot["Omega_chi"], plot["w_total"], plot["w_ma"],
+                         args.out, out_series, args.out_txt, hist_out=args.hist_out, stats=(acc, hist))
+        return
+
+    if args.from_path:
+        if is_trajectory(args.from_path):
+            t, phi, dphi, chi, dchi, dt = load_state(args.from_path, dt_cli=args.dt)
+        else:
+            t, phi, dphi, chi, dchi, dt = load_from_csv(args.from_path, dt_cli=args.dt, dtype=dtype)
+        meta.update(dt=dt)
+    elif args.from_csv:
         if not args.phi_chi_csv:
             raise ValueError("Use --phi-chi-csv con su archivo CSV.")
-        t, phi, dphi, chi, dchi, dt = load_from_csv(args.phi_chi_csv, dt_cli=args.dt)
+        t, phi, dphi, chi, dchi, dt = load_from_csv(args.phi_chi_csv, dt_cli=args.dt, dtype=dtype)
     else:
+        t0 = time.perf_counter()
         t, phi, dphi, chi, dchi, dt = simulate_series(steps=args.steps, dt=args.dt_sim,
                                                       seed=args.seed, burn_in=args.burn_in, params=params)
+        meta.update(dt=dt, seed=args.seed)
+        t_sim = time.perf_counter() - t0
 
     Om_phi, Om_chi, w = observables(phi, dphi, chi, dchi, params)
     w_ma = moving_average(w, max(1, int(args.ma_window)))
 
-    plot_observables(t, Om_phi, Om_chi, w, w_ma,
-                     args.out, args.out_csv, args.out_txt,
-                     hist_frac=args.hist_frac)
+    acc, hist, out_series = plot_observables(t, Om_phi, Om_chi, w, w_ma,
+                                             args.out, args.out_csv, args.out_txt,
+                                             hist_frac=args.hist_frac, hist_bins=args.hist_bins,
+                                             hist_range=hist_range, hist_out=args.hist_out,
+                                             out_format=args.out_format, meta=meta)
+    if args.simulate and not args.no_registry:
+        with Registry(args.registry) as reg:
+            reg.record("fig3", dict(params, steps=args.steps, dt=args.dt_sim, burn_in=args.burn_in,
+                                    ma_window=args.ma_window, hist_frac=args.hist_frac),
+                       seed=args.seed, scheme="euler-maruyama", timings=dict(simulate=t_sim),
+                       metrics=dict(mean_w=acc.mean, var_w=acc.var(), n_tail=acc.n),
+                       outputs=dict(png=args.out, csv=out_series, txt=args.out_txt))
 
 
 if __name__ == "__main__":
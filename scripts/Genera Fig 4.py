@@ -14,14 +14,41 @@ SALIDAS:
 USO (ejemplos):
   python scripts/gen_fig4_barrido_tau.py --tau-list 0,0.5,1,2,3,5 --n-real 8 --steps 160000 --dt 0.002
   python scripts/gen_fig4_barrido_tau.py --tau-list 0,0.5,1,2,3,5 --metric-source avg --n-real 12
+  # mismo ruido en todos los τ (+ pares antitéticos); el TXT informa la reducción de varianza
+  python scripts/gen_fig4_barrido_tau.py --noise common --antithetic --n-real 8
+  # barrido adaptativo: τ nuevos donde Q(τ)/σ_w(τ) se curva, realizaciones donde el IC es ancho
+  python scripts/gen_fig4_barrido_tau.py --adaptive --tau-list 0,1,2,5 --n-real 4 --tol 0.05 --max-tasks 200
+  # reanudable: cada (τ, r) se guarda al terminar; al relanzar se saltan las tareas hechas
+  python scripts/gen_fig4_barrido_tau.py --n-real 32 --store runs/fig4.jsonl
+  python scripts/gen_fig4_barrido_tau.py --n-real 32 --store runs/fig4.jsonl --rebuild
+  # cada punto τ se registra en data/runs.sqlite (python -m utils.registry query ...);
+  # --reuse sirve desde el registro los τ ya corridos con parámetros idénticos
+  python scripts/gen_fig4_barrido_tau.py --tau-list 0.5,1,2,3 --reuse
+  # superpone Q(τ) analítico de ruido lineal alrededor del atractor (linear_noise.py)
+  python scripts/gen_fig4_barrido_tau.py --V0 0.6 --linear
+  # burn-in automático y parada por precisión (n_real cadenas paralelas por τ; ver convergence.py)
+  python scripts/gen_fig4_barrido_tau.py --auto-steps --tau-list 0.3,1,2 --n-real 4 --tol-q 0.05 --tol-sigma 0.2
 
 Autor: Ernesto Cisneros Cino — CC0 1.0 (Dominio público)
 """
 import argparse
 import os
+import sys
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 
+# utils/ (registro de corridas) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import as_params
+from utils.registry import DEFAULT_DB, Registry
+
+from spectral_batch import power_spectra, peak_and_width_batch, lorentz_fit_batch, acf_coherence
+from streaming_stats import Welford
+from result_store import ResultStore, config_hash
+from linear_noise import default_freqs, linear_q
+from convergence import run_until_converged
+
 # ---------- Núcleo común (consistente con Fig.1/2/3) ----------
 def V(phi, chi, params):
     mp2 = params["m_phi"]**2
@@ -64,32 +91,52 @@ def default_params():
     )
 
 # ---------- Simulación: devuelve φ(t), χ(t), w_total(t) ----------
-def simulate_series(steps=160000, dt=0.002, seed=42, burn_in=20000, params=None):
-    if params is None:
-        params = default_params()
+def simulate_series(steps=160000, dt=0.002, seed=42, burn_in=20000, params=None,
+                    w_acc=None, w_from=0, keep_w=True, chunk=4096, noise_sign=1.0):
+    """
+    w_acc: acumuladores (p.ej. Welford, StreamingHistogram) que reciben w_total
+           por trozos desde el índice w_from (tras burn-in).
+    keep_w=False no guarda la serie w (devuelve None en su lugar).
+    noise_sign=-1 invierte todos los incrementos gaussianos (par antitético de la misma semilla).
+    params: dict (claves de script o initial_*) o utils.parameters.ModelParams.
+    """
+    # Parámetros ligados a variables locales una sola vez (sin búsquedas en dict por paso)
+    p = as_params(params if params is not None else default_params())
+    mp2, mc2, g2 = p.m_phi**2, p.m_chi**2, p.g**2
+    lph, lch, V0 = p.lambda_phi, p.lambda_chi, p.V0
+    a_phi, a_chi = p.alpha_phi, p.alpha_chi
+    tau_phi, tau_chi = p.tau_phi, p.tau_chi
+    tau_phi2, tau_chi2 = tau_phi**2, tau_chi**2
     rng = np.random.default_rng(seed)
+    w_acc = list(w_acc or [])
+    wbuf = np.empty(chunk); nb = 0
 
-    phi, chi = params["phi0"], params["chi0"]
-    dphi, dchi = params["dphi0"], params["dchi0"]
+    phi, chi = p.phi0, p.chi0
+    dphi, dchi = p.dphi0, p.dchi0
     zph, zch = 0.0, 0.0
 
     keep = steps - burn_in
     PHI = np.empty(keep); CHI = np.empty(keep)
-    W   = np.empty(keep)
+    W   = np.empty(keep) if keep_w else None
 
     for n in range(steps):
-        Hn   = H_from_state(dphi, dchi, phi, chi, params)
+        # H_from_state / V en línea
+        energy = 0.5*(dphi**2 + dchi**2) + (
+            -0.5 * mp2 * phi**2 + 0.25 * lph * phi**4
+            + 0.5 * mc2 * chi**2 + 0.25 * lch * chi**4
+            + 0.5 * g2 * phi**2 * chi**2 + V0)
+        Hn   = np.sqrt(np.maximum(energy, 1e-16))
         Tgh  = Hn / (2.0*np.pi)
-        GamP = params["alpha_phi"] * 3.0 * Hn
-        GamC = params["alpha_chi"] * 3.0 * Hn
+        GamP = a_phi * 3.0 * Hn
+        GamC = a_chi * 3.0 * Hn
 
         # OU
-        zph += (-zph/params["tau_phi"]) * dt + np.sqrt((2.0*GamP*Tgh)/(params["tau_phi"]**2) * dt) * rng.standard_normal()
-        zch += (-zch/params["tau_chi"]) * dt + np.sqrt((2.0*GamC*Tgh)/(params["tau_chi"]**2) * dt) * rng.standard_normal()
+        zph += (-zph/tau_phi) * dt + np.sqrt((2.0*GamP*Tgh)/tau_phi2 * dt) * noise_sign * rng.standard_normal()
+        zch += (-zch/tau_chi) * dt + np.sqrt((2.0*GamC*Tgh)/tau_chi2 * dt) * noise_sign * rng.standard_normal()
 
-        # ecuaciones de movimiento
-        dphi += (-3.0*Hn*dphi - dV_dphi(phi, chi, params) + zph) * dt
-        dchi += (-3.0*Hn*dchi - dV_dchi(phi, chi, params) + zch) * dt
+        # ecuaciones de movimiento (dV_dphi, dV_dchi en línea)
+        dphi += (-3.0*Hn*dphi - (-mp2 * phi + lph * phi**3 + g2 * phi * chi**2) + zph) * dt
+        dchi += (-3.0*Hn*dchi - (mc2 * chi + lch * chi**3 + g2 * chi * phi**2) + zch) * dt
         phi  += dphi * dt
         chi  += dchi * dt
 
@@ -98,122 +145,352 @@ def simulate_series(steps=160000, dt=0.002, seed=42, burn_in=20000, params=None)
             PHI[i] = phi
             CHI[i] = chi
             # w_total en línea (atribución mitad-mitad del acoplamiento)
-            Vphi = -0.5*params["m_phi"]**2 * phi**2 + 0.25*params["lambda_phi"]*phi**4 + 0.25*(params["g"]**2)*phi**2*chi**2
-            Vchi =  0.5*params["m_chi"]**2 * chi**2 + 0.25*params["lambda_chi"]*chi**4 + 0.25*(params["g"]**2)*phi**2*chi**2
+            Vphi = -0.5*mp2 * phi**2 + 0.25*lph*phi**4 + 0.25*g2*phi**2*chi**2
+            Vchi =  0.5*mc2 * chi**2 + 0.25*lch*chi**4 + 0.25*g2*phi**2*chi**2
             rho_phi = 0.5*dphi**2 + Vphi
             rho_chi = 0.5*dchi**2 + Vchi
             rho = rho_phi + rho_chi
-            p   = 0.5*(dphi**2 + dchi**2) - (Vphi + Vchi)
+            pres = 0.5*(dphi**2 + dchi**2) - (Vphi + Vchi)
             rho_safe = rho if rho > 1e-16 else 1e-16
-            W[i] = p / rho_safe
-
+            w = pres / rho_safe
+            if keep_w:
+                W[i] = w
+            if w_acc and i >= w_from:
+                wbuf[nb] = w; nb += 1
+                if nb == chunk:
+                    for acc in w_acc:
+                        acc.update(wbuf)
+                    nb = 0
+
+    for acc in w_acc:
+        acc.update(wbuf[:nb])
     return PHI, CHI, W
 
 # ---------- Espectro y Q ----------
 def power_spectrum(x, dt):
-    x = np.asarray(x, float)
-    x = x - np.mean(x)
-    N = x.size
-    window = np.hanning(N)
-    Xf = np.fft.rfft(x * window)
-    psd = (np.abs(Xf)**2) / np.sum(window**2)
-    freqs = np.fft.rfftfreq(N, dt)
     # normalizar para comparar
-    m = psd.max() if psd.max() > 0 else 1.0
-    return freqs, psd/m
-
-def interp_half(x1, y1, x2, y2, yhalf):
-    if x2 == x1:
-        return x1
-    a = (y2 - y1) / (x2 - x1)
-    if a == 0:
-        return 0.5*(x1+x2)
-    return x1 + (yhalf - y1)/a
-
-def peak_and_width(freqs, psd):
-    start = 1 if freqs[0] == 0 else 0
-    idx = start + np.argmax(psd[start:])
-    f0 = freqs[idx]; p0 = psd[idx]
-    if p0 <= 0:
-        return f0, np.nan, np.nan
-    half = 0.5 * p0
-    # izquierda
-    iL = idx
-    while iL > 0 and psd[iL] >= half:
-        iL -= 1
-    fL = np.nan if iL == idx else interp_half(freqs[iL], psd[iL], freqs[iL+1], psd[iL+1], half)
-    # derecha
-    iR = idx
-    while iR < len(psd)-1 and psd[iR] >= half:
-        iR += 1
-    fR = np.nan if iR == idx else interp_half(freqs[iR-1], psd[iR-1], freqs[iR], psd[iR], half)
-
-    if np.isnan(fL) or np.isnan(fR):
-        return f0, np.nan, np.nan
-    delf = max(fR - fL, 1e-16)
-    Q = f0 / delf
+    freqs, psd = power_spectra(x, dt)
+    return freqs, psd[0]
+
+def peak_and_width(freqs, psd, fit="fwhm"):
+    """f0, Δf, Q de una PSD (F,) o de una pila (R, F) (media altura o ajuste Lorentziano)."""
+    estimator = lorentz_fit_batch if fit == "lorentz" else peak_and_width_batch
+    f0, delf, Q = estimator(freqs, psd)
+    if np.ndim(psd) == 1:
+        return float(f0[0]), float(delf[0]), float(Q[0])
     return f0, delf, Q
 
 # ---------- Barrido ----------
+def task_seed(tau, r, seed0=100, noise="independent", antithetic=False):
+    """
+    Semilla y signo del ruido de la realización r en τ.
+    noise='independent': semillas distintas por τ (comportamiento original).
+    noise='common':      números aleatorios comunes: la realización r usa los mismos
+                         incrementos gaussianos en todos los τ (semilla solo de r).
+    antithetic=True:     las realizaciones 2k y 2k+1 comparten semilla con signo opuesto.
+    """
+    k, sign = (r // 2, -1.0 if r % 2 else 1.0) if antithetic else (r, 1.0)
+    seed = seed0 + 7919*k + (0 if noise == "common" else int(37*tau))
+    return seed, sign
+
+def simulate_task(tau, r, steps=160000, dt=0.002, burn_in=20000, base_params=None,
+                  tail_frac=0.4, seed0=100, noise="independent", antithetic=False):
+    """Una tarea (τ, r) del barrido: φ(t), χ(t) y Welford de w_total sobre la cola."""
+    params = as_params(base_params or default_params()).replace(tau_phi=tau, tau_chi=tau)
+    seed, sign = task_seed(tau, r, seed0, noise, antithetic)
+    N = steps - burn_in; n_tail = max(100, int(tail_frac*N))
+    # σ_w(τ) en tardío: Welford en streaming sobre la cola, sin guardar w
+    acc = Welford()
+    phi, chi, _ = simulate_series(steps=steps, dt=dt, seed=seed, burn_in=burn_in, params=params,
+                                  w_acc=[acc], w_from=N - n_tail, keep_w=False, noise_sign=sign)
+    return phi, chi, acc
+
+def paired_variance_ratio(a, b):
+    """Var[a] + Var[b] (semillas independientes) frente a Var[b - a] emparejado por realización."""
+    a, b = np.asarray(a, float), np.asarray(b, float)
+    d = b - a
+    d = d[np.isfinite(d)]
+    paired = np.var(d, ddof=1) if d.size > 1 else np.nan
+    indep = np.nanvar(a, ddof=1) + np.nanvar(b, ddof=1)
+    return float(indep / paired) if paired > 0 else np.nan
+
+def antithetic_ratio(v):
+    """Var[v]/2 (dos realizaciones independientes) frente a Var de la media de cada par antitético."""
+    v = np.asarray(v, float)
+    n = v.size // 2
+    pm = 0.5*(v[0:2*n:2] + v[1:2*n:2])
+    pm = pm[np.isfinite(pm)]
+    var_pair = np.var(pm, ddof=1) if pm.size > 1 else np.nan
+    return float(0.5*np.nanvar(v, ddof=1) / var_pair) if var_pair > 0 else np.nan
+
+def sweep_config(steps=160000, dt=0.002, burn_in=20000, base_params=None, metric_source="avg",
+                 tail_frac=0.4, seed0=100, peak_fit="fwhm", q_method="psd",
+                 noise="independent", antithetic=False):
+    """Hash de todo lo que determina el resultado de una tarea (τ, r) salvo τ y r."""
+    params = {k: v for k, v in as_params(base_params or default_params()).to_dict().items()
+              if k not in ("tau_phi", "tau_chi")}
+    return config_hash(dict(steps=steps, dt=dt, burn_in=burn_in, params=params,
+                            metric_source=metric_source, tail_frac=tail_frac, seed0=seed0,
+                            peak_fit=peak_fit, q_method=q_method, noise=noise, antithetic=antithetic))
+
+def sweep_point(tau, realizations, steps=160000, dt=0.002, burn_in=20000, base_params=None,
+                metric_source="avg", tail_frac=0.4, seed0=100, peak_fit="fwhm", q_method="psd",
+                noise="independent", antithetic=False, store=None):
+    """
+    Realizaciones `realizations` (índices r) de un τ. Devuelve arrays por realización
+    (r, Q, f0, delf, sigma_w) y el Welford conjunto de la cola ('pooled').
+    Las realizaciones se apilan y el espectro y Q se calculan por lotes.
+    store: ResultStore; cada tarea (τ, r) se guarda al terminar y las ya guardadas
+           con la misma configuración no se recalculan.
+    """
+    realizations = list(realizations)
+    if store is not None:
+        kw = dict(steps=steps, dt=dt, burn_in=burn_in, base_params=base_params,
+                  metric_source=metric_source, tail_frac=tail_frac, seed0=seed0,
+                  peak_fit=peak_fit, q_method=q_method, noise=noise, antithetic=antithetic)
+        cfg = sweep_config(**kw)
+        for r in realizations:
+            if not store.has(cfg, tau, r):
+                pt = sweep_point(tau, [r], **kw)
+                store.append(cfg, tau, r, pooled=pt["pooled"], seed=task_seed(tau, r, seed0, noise, antithetic)[0],
+                             **{k: pt[k][0] for k in ResultStore.FIELDS})
+        return store.point(cfg, tau, realizations)
+    n = len(realizations)
+    PHI = []; CHI = []; sigw_vals = []
+    pooled = Welford()  # cola de todas las realizaciones fusionada
+    for r in realizations:
+        phi, chi, acc = simulate_task(tau, r, steps=steps, dt=dt, burn_in=burn_in,
+                                      base_params=base_params, tail_frac=tail_frac,
+                                      seed0=seed0, noise=noise, antithetic=antithetic)
+        PHI.append(phi); CHI.append(chi)
+        sigw_vals.append(acc.var())
+        pooled.merge(acc)
+
+    # Q(τ): una FFT por lotes para las 2·n series y análisis de pico vectorizado
+    if q_method == "acf":
+        sel = {"phi": PHI, "chi": CHI}.get(metric_source, PHI + CHI)
+        acf = acf_coherence(np.vstack(sel), dt, n_boot=0)
+        f0_vals, delf_vals, Q_vals = acf["f0"], acf["delf"], acf["Q"]
+        if metric_source not in ("phi", "chi"):  # avg
+            f0_vals, delf_vals, Q_vals = (0.5*(v[:n] + v[n:]) for v in (f0_vals, delf_vals, Q_vals))
+    else:
+        freqs, psd = power_spectra(np.vstack(PHI + CHI), dt)
+        psd_phi, psd_chi = psd[:n], psd[n:]
+        if metric_source == "phi":
+            stack = psd_phi
+        elif metric_source == "chi":
+            stack = psd_chi
+        else:  # avg
+            stack = 0.5*(psd_phi + psd_chi)
+        f0_vals, delf_vals, Q_vals = peak_and_width(freqs, stack, fit=peak_fit)
+
+    return dict(r=np.asarray(realizations, int), Q=np.asarray(Q_vals, float),
+                f0=np.asarray(f0_vals, float), delf=np.asarray(delf_vals, float),
+                sigma_w=np.asarray(sigw_vals, float), pooled=pooled)
+
+def merge_points(a, b):
+    """Une las realizaciones de dos sweep_point del mismo τ."""
+    out = {k: np.concatenate([a[k], b[k]]) for k in ("r", "Q", "f0", "delf", "sigma_w")}
+    out["pooled"] = Welford(**a["pooled"].to_dict()).merge(b["pooled"])
+    return out
+
+def summarize_point(tau, pt, antithetic=False):
+    """Promedios y dispersión por τ (una fila de resultados)."""
+    order = np.argsort(pt["r"], kind="stable")  # pares antitéticos (2k, 2k+1) contiguos
+    Q_vals, sigw_vals = pt["Q"][order], pt["sigma_w"][order]
+    res = dict(
+        tau=float(tau),
+        Q_mean=float(np.nanmean(Q_vals)),
+        Q_std =float(np.nanstd(Q_vals, ddof=1)),
+        f0_mean=float(np.nanmean(pt["f0"])),
+        delf_mean=float(np.nanmean(pt["delf"])),
+        sigma_w_mean=float(np.nanmean(sigw_vals)),
+        sigma_w_std =float(np.nanstd(sigw_vals, ddof=1)),
+        sigma_w_pooled=float(pt["pooled"].var()),
+        n_real=int(len(Q_vals)),
+        Q_real=Q_vals.tolist(),
+        sigma_w_real=sigw_vals.tolist(),
+    )
+    if antithetic:
+        res.update(anti_Q=antithetic_ratio(Q_vals), anti_sigma_w=antithetic_ratio(sigw_vals))
+    return res
+
+def add_crn_report(results):
+    """Con números aleatorios comunes: reducción de varianza de la diferencia con el τ anterior."""
+    ordered = sorted(results, key=lambda d: d["tau"])
+    for prev, res in zip(ordered, ordered[1:]):
+        n = min(prev["n_real"], res["n_real"])  # mismas realizaciones r en ambos τ
+        res.update(vr_Q=paired_variance_ratio(prev["Q_real"][:n], res["Q_real"][:n]),
+                   vr_sigma_w=paired_variance_ratio(prev["sigma_w_real"][:n], res["sigma_w_real"][:n]))
+    return results
+
 def run_sweep(tau_list, n_real=8, steps=160000, dt=0.002, burn_in=20000,
-              base_params=None, metric_source="avg", tail_frac=0.4, seed0=100):
+              base_params=None, metric_source="avg", tail_frac=0.4, seed0=100,
+              peak_fit="fwhm", q_method="psd", noise="independent", antithetic=False, store=None):
     """
     metric_source: 'phi' | 'chi' | 'avg'  (de dónde sacar Q)
     tail_frac: fracción tardía usada para σ_w
+    peak_fit: 'fwhm' | 'lorentz'  (estimador de f0 y Δf)
+    q_method: 'psd' (ancho del pico) | 'acf' (ajuste de la autocorrelación; con
+              'avg' se promedian las estimaciones de φ y χ)
+    noise, antithetic: ver task_seed. Con noise='common' cada resultado lleva
+              vr_Q / vr_sigma_w = reducción de varianza de la diferencia con el τ
+              anterior (en orden creciente); con antithetic, anti_Q / anti_sigma_w
+              la de la media.
+    store: ResultStore opcional (barrido reanudable, ver sweep_point).
     """
     if base_params is None:
         base_params = default_params()
-    results = []
+    kw = dict(steps=steps, dt=dt, burn_in=burn_in, base_params=base_params,
+              metric_source=metric_source, tail_frac=tail_frac, seed0=seed0,
+              peak_fit=peak_fit, q_method=q_method, noise=noise, antithetic=antithetic, store=store)
+    results = [summarize_point(tau, sweep_point(tau, range(n_real), **kw), antithetic)
+               for tau in tau_list]
+    if noise == "common":
+        add_crn_report(results)
+    return results
 
-    for tau in tau_list:
-        Q_vals = []; f0_vals = []; delf_vals = []; sigw_vals = []
-        for r in range(n_real):
-            params = dict(base_params)
-            params["tau_phi"] = float(tau)
-            params["tau_chi"] = float(tau)
-            # semillas distintas
-            seed = seed0 + 7919*r + int(37*tau)
-
-            phi, chi, w = simulate_series(steps=steps, dt=dt, seed=seed, burn_in=burn_in, params=params)
-
-            # Q(τ)
-            freqs, psd_phi = power_spectrum(phi, dt)
-            _,     psd_chi = power_spectrum(chi, dt)
-            if metric_source == "phi":
-                f0, delf, Q = peak_and_width(freqs, psd_phi)
-            elif metric_source == "chi":
-                f0, delf, Q = peak_and_width(freqs, psd_chi)
-            else:  # avg
-                psd_avg = 0.5*(psd_phi + psd_chi)
-                f0, delf, Q = peak_and_width(freqs, psd_avg)
-
-            # σ_w(τ) en tardío
-            N = len(w); n_tail = max(100, int(tail_frac*N))
-            tail = w[-n_tail:]
-            sigw = float(np.var(tail))
-
-            Q_vals.append(Q); f0_vals.append(f0); delf_vals.append(delf); sigw_vals.append(sigw)
-
-        # promedios y dispersión por τ
-        Q_vals   = np.array(Q_vals, float)
-        f0_vals  = np.array(f0_vals, float)
-        delf_vals= np.array(delf_vals, float)
-        sigw_vals= np.array(sigw_vals, float)
-
-        results.append(dict(
-            tau=float(tau),
-            Q_mean=float(np.nanmean(Q_vals)),
-            Q_std =float(np.nanstd(Q_vals, ddof=1)),
-            f0_mean=float(np.nanmean(f0_vals)),
-            delf_mean=float(np.nanmean(delf_vals)),
-            sigma_w_mean=float(np.nanmean(sigw_vals)),
-            sigma_w_std =float(np.nanstd(sigw_vals, ddof=1))
-        ))
+def auto_sweep(tau_list, n_real=8, dt=0.002, base_params=None, metric_source="avg", seed0=100,
+               peak_fit="fwhm", noise="independent", tol_q=0.05, tol_sigma=0.05, max_steps=600000, **_):
+    """
+    Barrido con burn-in y longitud automáticos: por cada τ, n_real cadenas paralelas
+    hasta que Q y σ_w alcanzan la precisión pedida (o max_steps). Cada resultado
+    lleva steps_used, burn_in_used y converged.
+    """
+    results = []
+    for k, tau in enumerate(tau_list):
+        if tau <= 0:
+            print(f"[!] τ={tau:g} omitido: el modo automático requiere τ > 0")
+            continue
+        params = as_params(base_params or default_params()).replace(tau_phi=tau, tau_chi=tau)
+        seed = seed0 if noise == "common" else seed0 + 7919*k
+        res = run_until_converged(params, n_chains=n_real, dt=dt, seed=seed, max_steps=max_steps, noise=noise,
+                                  tol_q=tol_q, tol_sigma=tol_sigma, metric_source=metric_source, peak_fit=peak_fit)
+        if "Q_chains" not in res:  # sin burn-in detectado ni estimación antes de max_steps
+            nan = np.full(n_real, np.nan)
+            res.update(Q_chains=nan, f0_chains=nan, delf_chains=nan, sigma_w_chains=nan)
+        pt = dict(r=np.arange(n_real), Q=res["Q_chains"], f0=res["f0_chains"], delf=res["delf_chains"],
+                  sigma_w=res["sigma_w_chains"], pooled=res["pooled"])
+        out = summarize_point(tau, pt)
+        out.update(steps_used=int(res["steps"]), burn_in_used=res["burn_in"], converged=bool(res["converged"]))
+        results.append(out)
+        print(f"[OK] τ={tau:g}: {'convergido' if res['converged'] else 'sin converger'} "
+              f"en {res['steps']} pasos (burn-in {res['burn_in']})")
+    if noise == "common":
+        add_crn_report(results)
+    return results
 
+def point_params(tau, n_real, base_params=None, store=None, **kw):
+    """Parámetros resueltos de un punto τ del barrido (clave del registro de corridas)."""
+    params = as_params(base_params or default_params()).to_dict()
+    params.update(tau_phi=float(tau), tau_chi=float(tau), n_real=int(n_real), **kw)
+    return params
+
+def rebuild_from_store(store, **kw):
+    """Resultados por τ con todas las realizaciones guardadas para la configuración kw."""
+    cfg = sweep_config(**kw)
+    results = [summarize_point(t, store.point(cfg, t), kw.get("antithetic", False)) for t in store.taus(cfg)]
+    if kw.get("noise") == "common":
+        add_crn_report(results)
     return results
 
+# ---------- Barrido adaptativo ----------
+def rel_ci(res, key, z=1.96):
+    """Semiancho relativo del IC (normal) de la media de key ('Q' o 'sigma_w') en un τ."""
+    v = np.asarray(res[key + "_real"], float)
+    v = v[np.isfinite(v)]
+    if v.size < 2:
+        return np.inf
+    m = abs(v.mean())
+    return float(z * v.std(ddof=1) / np.sqrt(v.size) / m) if m > 0 else np.inf
+
+def interp_error(tau, y):
+    """
+    Error estimado de interpolar linealmente y(τ) en cada intervalo: |y''|·h²/8, con y''
+    de la segunda diferencia dividida en los nodos del intervalo, relativo a max|y|
+    (una curva plana con ruido no se refina).
+    """
+    tau, y = np.asarray(tau, float), np.asarray(y, float)
+    if tau.size < 3:
+        return np.full(max(tau.size - 1, 0), np.inf)
+    h = np.diff(tau)
+    d2 = 2.0*((y[2:] - y[1:-1])/h[1:] - (y[1:-1] - y[:-2])/h[:-1]) / (h[1:] + h[:-1])
+    c = np.abs(np.concatenate([d2[:1], d2, d2[-1:]]))        # curvatura por nodo
+    scale = max(np.nanmax(np.abs(y)), 1e-300)
+    return np.maximum(c[:-1], c[1:]) * h**2 / 8.0 / scale
+
+def adaptive_sweep(tau_list, n_real=8, tol=0.05, max_rounds=5, max_tasks=None, min_dtau=0.05,
+                   max_real=64, **kw):
+    """
+    Barrido adaptativo a partir de la rejilla gruesa tau_list (n_real realizaciones por τ).
+    En cada ronda:
+      - añade el punto medio de los intervalos donde la interpolación lineal de Q(τ)
+        o σ_w(τ) tiene error relativo estimado > tol (curvatura) y h ≥ 2·min_dtau;
+      - duplica las realizaciones (hasta max_real) de los τ cuyo IC relativo de la
+        media (Q o σ_w) supera tol, empezando por el más ancho.
+    Se detiene cuando no queda nada que refinar, tras max_rounds o al agotar
+    max_tasks simulaciones. kw: argumentos de sweep_point.
+    Devuelve (results, log) con log = una entrada por ronda.
+    """
+    antithetic = kw.get("antithetic", False)
+    points = {float(t): sweep_point(t, range(n_real), **kw) for t in tau_list}
+    tasks = n_real * len(points)
+    log = []
+    for rnd in range(max_rounds + 1):
+        results = [summarize_point(t, points[t], antithetic) for t in sorted(points)]
+        tau = np.array([r["tau"] for r in results])
+        err = np.maximum(interp_error(tau, [r["Q_mean"] for r in results]),
+                         interp_error(tau, [r["sigma_w_mean"] for r in results]))
+        ci = np.array([max(rel_ci(r, "Q"), rel_ci(r, "sigma_w")) for r in results])
+        log.append(dict(round=rnd, n_tau=int(tau.size), tasks=int(tasks),
+                        max_interp_err=float(np.max(err)) if err.size else 0.0, max_ci=float(np.max(ci))))
+        if rnd == max_rounds:
+            break
+
+        # Acciones por prioridad: nuevos τ (mayor curvatura primero) y más realizaciones (IC más ancho)
+        actions = [("tau", 0.5*(tau[i] + tau[i+1]), n_real)
+                   for i in np.argsort(-err) if err[i] > tol and tau[i+1] - tau[i] >= 2*min_dtau]
+        for i in np.argsort(-ci):
+            n0 = results[i]["n_real"]
+            if ci[i] > tol and n0 < max_real:
+                actions.append(("real", tau[i], min(n0, max_real - n0)))
+        todo = []
+        for act in actions:
+            if max_tasks is not None and tasks + act[2] > max_tasks:
+                continue
+            todo.append(act)
+            tasks += act[2]
+        if not todo:
+            break
+        for kind, t, n in todo:
+            if kind == "tau":
+                points[float(t)] = sweep_point(t, range(n), **kw)
+            else:
+                n0 = len(points[t]["r"])
+                points[t] = merge_points(points[t], sweep_point(t, range(n0, n0 + n), **kw))
+
+    if kw.get("noise") == "common":
+        add_crn_report(results)
+    return results, log
+
 # ---------- Guardado y figura ----------
-def save_results_and_plot(results, out_png, out_csv, out_txt):
+def linear_curve(results, base_params=None, metric_source="avg", peak_fit="fwhm", n_tau=500,
+                 steps=160000, dt=0.002, burn_in=20000, **_):
+    """
+    Q(τ) de ruido lineal en una malla densa sobre el rango (τ > 0) del barrido, medido
+    sobre la misma rejilla rfftfreq(steps − burn_in, dt) que los espectros simulados.
+    """
+    taus = [r["tau"] for r in results if r["tau"] > 0]
+    if not taus:
+        return None
+    tau = np.geomspace(min(taus), max(taus), n_tau) if len(taus) > 1 else np.array(taus, float)
+    freqs = np.fft.rfftfreq(steps - burn_in, dt)
+    f_max = default_freqs(base_params, n_freq=2)[-1]
+    freqs = freqs[:max(np.searchsorted(freqs, f_max, side="right"), 8)]
+    lin = linear_q(tau, base_params, metric_source=metric_source, peak_fit=peak_fit, freqs=freqs)
+    return dict(tau=tau, Q=lin["Q"], Q_res=lin["Q_res"], attractor=lin["attractor"])
+
+def save_results_and_plot(results, out_png, out_csv, out_txt, linear=None):
     os.makedirs(os.path.dirname(out_png), exist_ok=True)
     # ordenar por τ
     results = sorted(results, key=lambda d: d["tau"])
@@ -227,8 +504,32 @@ def save_results_and_plot(results, out_png, out_csv, out_txt):
     # TXT
     with open(out_txt, "w", encoding="utf-8") as f:
         f.write("Barrido en tau: métricas promedio y desviaciones (N_real por punto)\n")
+        n_vary = len({r.get("n_real") for r in results}) > 1  # barrido adaptativo
         for r in results:
-            f.write(f"tau={r['tau']:>5g} | Q={r['Q_mean']:.4g}±{r['Q_std']:.3g} | σ_w={r['sigma_w_mean']:.4g}±{r['sigma_w_std']:.3g}\n")
+            f.write(f"tau={r['tau']:>5g} | Q={r['Q_mean']:.4g}±{r['Q_std']:.3g} | σ_w={r['sigma_w_mean']:.4g}±{r['sigma_w_std']:.3g}"
+                    + (f" | σ_w(conjunto)={r['sigma_w_pooled']:.4g}" if "sigma_w_pooled" in r else "")
+                    + (f" | n={r['n_real']}" if n_vary else "")
+                    + (f" | pasos={r['steps_used']} (burn-in {r['burn_in_used']}"
+                       f"{'' if r['converged'] else ', sin converger'})" if "steps_used" in r else "") + "\n")
+        # Reducción de varianza lograda (factor >1 = menos realizaciones para la misma precisión)
+        if any("vr_Q" in r for r in results):
+            f.write("Números aleatorios comunes: Var indep./Var emparejada de la diferencia con el τ anterior\n")
+            for a, b in zip(results, results[1:]):
+                f.write(f"tau {a['tau']:g}→{b['tau']:g} | ΔQ: ×{b.get('vr_Q', np.nan):.3g}"
+                        f" | Δσ_w: ×{b.get('vr_sigma_w', np.nan):.3g}\n")
+        if any("anti_Q" in r for r in results):
+            f.write("Pares antitéticos: Var(indep.)/Var(media del par)\n")
+            for r in results:
+                f.write(f"tau={r['tau']:>5g} | Q: ×{r['anti_Q']:.3g} | σ_w: ×{r['anti_sigma_w']:.3g}\n")
+        if linear is not None:
+            att = linear["attractor"]
+            f.write(f"Ruido lineal (H*={att['H']:.4g}, φ*={att['phi']:.4g}, χ*={att['chi']:.4g}):\n")
+            for r in results:
+                if r["tau"] > 0:
+                    q = np.interp(r["tau"], linear["tau"], linear["Q"])
+                    q_res = np.interp(r["tau"], linear["tau"], linear["Q_res"])
+                    f.write(f"tau={r['tau']:>5g} | Q_lineal={q:.4g} | Q_sim={r['Q_mean']:.4g}"
+                            f" | Q_res={q_res:.4g}\n")
     # Figura (dos ejes: Q y sigma_w)
     tau = np.array([r["tau"] for r in results], float)
     Qm  = np.array([r["Q_mean"] for r in results], float)
@@ -238,6 +539,8 @@ def save_results_and_plot(results, out_png, out_csv, out_txt):
 
     fig, ax1 = plt.subplots(figsize=(8, 6))
     ax1.errorbar(tau, Qm, yerr=Qe, fmt="o-", linewidth=1.6, capsize=3, label="Q(τ)")
+    if linear is not None:
+        ax1.plot(linear["tau"], linear["Q"], ":", color="tab:blue", linewidth=1.4, label="Q(τ) lineal")
     ax1.set_xlabel(r"$\tau$")
     ax1.set_ylabel(r"$Q=f_0/\Delta f$")
     ax1.grid(True, which="both", alpha=0.3)
@@ -272,8 +575,34 @@ def main():
     ap.add_argument("--burn-in", type=int, default=20000, help="Pasos a descartar al inicio.")
     ap.add_argument("--dt", type=float, default=0.002, help="Paso de tiempo Δt.")
     ap.add_argument("--metric-source", choices=["phi","chi","avg"], default="avg", help="De qué serie sacar Q (φ, χ o promedio).")
+    ap.add_argument("--q-method", choices=["psd","acf"], default="psd", help="Q por ancho espectral (psd) o por autocorrelación (acf).")
+    ap.add_argument("--peak-fit", choices=["fwhm","lorentz"], default="fwhm", help="Δf por media altura o ajuste de Lorentziana.")
     ap.add_argument("--tail-frac", type=float, default=0.4, help="Fracción tardía para σ_w.")
     ap.add_argument("--seed0", type=int, default=100, help="Semilla base para generar semillas por repetición.")
+    ap.add_argument("--noise", choices=["independent","common"], default="independent",
+                    help="Semillas distintas por τ o números aleatorios comunes (mismo ruido en todos los τ).")
+    ap.add_argument("--antithetic", action="store_true", help="Realizaciones en pares antitéticos (ruido ±).")
+    ap.add_argument("--adaptive", action="store_true",
+                    help="Refina τ (curvatura) y realizaciones (IC) a partir de --tau-list hasta --tol.")
+    ap.add_argument("--tol", type=float, default=0.05, help="Tolerancia relativa (curvatura e IC) del modo adaptativo.")
+    ap.add_argument("--max-rounds", type=int, default=5, help="Rondas máximas de refinamiento.")
+    ap.add_argument("--max-tasks", type=int, default=None, help="Presupuesto total de simulaciones (τ, r).")
+    ap.add_argument("--min-dtau", type=float, default=0.05, help="Separación mínima entre τ añadidos.")
+    ap.add_argument("--max-real", type=int, default=64, help="Realizaciones máximas por τ.")
+    ap.add_argument("--auto-steps", action="store_true",
+                    help="Burn-in y longitud automáticos (convergence.py); ignora --steps/--burn-in.")
+    ap.add_argument("--tol-q", type=float, default=0.05, help="Error relativo objetivo de Q (--auto-steps).")
+    ap.add_argument("--tol-sigma", type=float, default=0.05, help="Error relativo objetivo de σ_w (--auto-steps).")
+    ap.add_argument("--max-steps", type=int, default=600000, help="Pasos máximos por τ (--auto-steps).")
+    ap.add_argument("--store", type=str, default=None,
+                    help="Almacén JSON-lines por tarea (τ, r): guarda cada resultado al terminar y reanuda.")
+    ap.add_argument("--rebuild", action="store_true", help="Solo regenera CSV/PNG/TXT desde --store (sin simular).")
+    ap.add_argument("--registry", type=str, default=DEFAULT_DB, help="Registro SQLite de corridas.")
+    ap.add_argument("--no-registry", action="store_true", help="No registrar la corrida.")
+    ap.add_argument("--reuse", action="store_true",
+                    help="Sirve desde el registro los τ ya corridos con los mismos parámetros.")
+    ap.add_argument("--linear", action="store_true",
+                    help="Superpone Q(τ) analítico de ruido lineal alrededor del atractor.")
     ap.add_argument("--out", type=str, default="assets/fig4-memoria.png", help="PNG de salida.")
     ap.add_argument("--out-csv", type=str, default="assets/fig4-memoria.csv", help="CSV de salida.")
     ap.add_argument("--out-txt", type=str, default="assets/fig4-memoria.txt", help="TXT resumen.")
@@ -292,13 +621,69 @@ def main():
         if v is not None:
             base[k] = v
 
-    results = run_sweep(
-        tau_list=args.tau_list, n_real=args.n_real,
-        steps=args.steps, dt=args.dt, burn_in=args.burn_in,
-        base_params=base, metric_source=args.metric_source,
-        tail_frac=args.tail_frac, seed0=args.seed0
-    )
-    save_results_and_plot(results, args.out, args.out_csv, args.out_txt)
+    kw = dict(steps=args.steps, dt=args.dt, burn_in=args.burn_in,
+              base_params=base, metric_source=args.metric_source,
+              tail_frac=args.tail_frac, seed0=args.seed0, peak_fit=args.peak_fit,
+              q_method=args.q_method, noise=args.noise, antithetic=args.antithetic)
+    store = ResultStore(args.store) if args.store else None
+    if args.rebuild:
+        if store is None:
+            ap.error("--rebuild requiere --store.")
+        results = rebuild_from_store(store, **kw)
+        if not results:
+            raise SystemExit(f"[!] {args.store} no tiene tareas con esta configuración "
+                             f"({sweep_config(**kw)}); presentes: {store.configs()}")
+        save_results_and_plot(results, args.out, args.out_csv, args.out_txt,
+                              linear=linear_curve(results, **kw) if args.linear else None)
+        return
+    kw["store"] = store
+    if args.auto_steps and (args.adaptive or store is not None or args.q_method == "acf" or args.antithetic):
+        ap.error("--auto-steps no se combina con --adaptive, --store, --q-method acf ni --antithetic.")
+    reg = None if args.no_registry else Registry(args.registry)
+    if args.auto_steps:
+        t0 = time.perf_counter()
+        results = auto_sweep(args.tau_list, n_real=args.n_real, tol_q=args.tol_q, tol_sigma=args.tol_sigma,
+                             max_steps=args.max_steps, **kw)
+        wall = time.perf_counter() - t0
+        new = results
+    elif args.adaptive:
+        t0 = time.perf_counter()
+        results, log = adaptive_sweep(args.tau_list, n_real=args.n_real, tol=args.tol,
+                                      max_rounds=args.max_rounds, max_tasks=args.max_tasks,
+                                      min_dtau=args.min_dtau, max_real=args.max_real, **kw)
+        for e in log:
+            print(f"[OK] Ronda {e['round']}: {e['n_tau']} τ, {e['tasks']} simulaciones, "
+                  f"error interp. máx={e['max_interp_err']:.3g}, IC rel. máx={e['max_ci']:.3g}")
+        wall = time.perf_counter() - t0
+        new = results
+    else:
+        cached = {}
+        if args.reuse and reg is not None:
+            for tau in args.tau_list:
+                hit = reg.lookup("fig4", point_params(tau, args.n_real, **kw), seed=args.seed0)
+                if hit is not None:
+                    cached[tau] = hit["metrics"]
+            if cached:
+                print(f"[OK] {len(cached)} τ servidos desde el registro {args.registry}")
+        todo = [t for t in args.tau_list if t not in cached]
+        t0 = time.perf_counter()
+        results = run_sweep(tau_list=todo, n_real=args.n_real, **kw)
+        wall = time.perf_counter() - t0
+        new = results
+        results = results + list(cached.values())
+        if args.noise == "common":
+            add_crn_report(results)
+    if reg is not None:
+        for r in new:
+            # en modo automático se registran los pasos y el burn-in efectivamente usados
+            pkw = dict(kw, steps=r["steps_used"], burn_in=r["burn_in_used"], auto_steps=True) \
+                if "steps_used" in r else kw
+            reg.record("fig4", point_params(r["tau"], r["n_real"], **pkw), seed=args.seed0,
+                       scheme="euler-maruyama", timings=dict(sweep=wall, per_point=wall/max(len(new), 1)),
+                       metrics=r, outputs=dict(png=args.out, csv=args.out_csv, txt=args.out_txt))
+        reg.close()
+    save_results_and_plot(results, args.out, args.out_csv, args.out_txt,
+                          linear=linear_curve(results, **kw) if args.linear else None)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Integrador adaptativo con control de error para el sistema φ/χ con ruido OU
+(mismas ecuaciones y mismo paso semi-implícito que Figs. 2 y 4).
+
+El dt fijo (0.002) está elegido para el peor caso: la fricción 3H y la rigidez
+cuártica cambian mucho a lo largo de la trayectoria. Aquí cada paso h se
+estima por duplicación de paso (un paso h frente a dos de h/2, con los mismos
+incrementos brownianos); el error local
+
+    err = max_i |y_h − y_{h/2}|_i / (atol + rtol·|y|_i)
+
+decide si se acepta (se avanza con la solución de dos medios pasos) y fija el
+siguiente h = h·clip(0.9·err^(−1/2), 0.2, 2), acotado a [dt_min, dt_max].
+Con ruido débil el error local es pequeño y h se queda en dt_max, así que
+dt_max fija la precisión del espectro: por defecto min(0.02, τ_min/10), que
+resuelve el tiempo de correlación del OU (con dt_max = 0.1 y τ = 2, Q y f0
+salían sesgados ~25 % frente al paso fijo). q_regression contrasta Q de un
+conjunto de semillas con el de paso fijo en varios τ.
+
+En ese régimen (V0 = 0.6, τ = 2) el control no interviene: 0 rechazos y todos
+los pasos en dt_max, y como cada paso cuesta 3 evaluaciones de la deriva el
+ahorro frente al paso fijo 0.002 es solo dt_max/(3·0.002) ≈ 3×; rtol/atol no
+cambian el resultado, dt_max sí. El control actúa cuando el ruido es fuerte
+(τ pequeño): con τ = 0.3 hay ~10 % de pasos rechazados y h baja a ~0.007; con
+τ = 0.05, ~25 % y h hasta ~1e-8 en los picos de H.
+
+Trayectoria browniana coherente (árbol browniano, Gaines & Lyons 1997): el
+incremento ΔW de [t, t+h] se parte con un puente browniano,
+ΔW_1 ~ N(ΔW/2, h/4), ΔW_2 = ΔW − ΔW_1. Si el paso se rechaza, los dos medios
+incrementos quedan en una pila y el reintento los reutiliza (partiéndolos de
+nuevo por puente si hace falta), de modo que rechazar no cambia el camino del
+ruido ni sesga su estadística.
+
+La salida (φ, χ con interpolación cúbica de Hermite usando dφ, dχ como
+derivadas; dφ, dχ lineal) se remuestrea en una malla uniforme dt_out para el
+análisis espectral.
+
+    from adaptive_sde import integrate_adaptive
+    out = integrate_adaptive(params, t_end=400.0, t_burn=40.0, dt_out=0.002, rtol=1e-2)
+    out["phi"], out["chi"], out["n_accept"], out["n_reject"]
+
+Uso:
+    python scripts/adaptive_sde.py --set V0=0.6 --compare
+    python scripts/adaptive_sde.py --steps 400000 --rtol 5e-3 --atol 5e-4 --dt-max 0.05
+    # regresión de Q (8 semillas por τ) frente al paso fijo
+    python scripts/adaptive_sde.py --set V0=0.6 --regress 0.3,1,2,5 --n-seeds 8
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.interpolate import CubicHermiteSpline
+import matplotlib.pyplot as plt
+
+from batch_sim import simulate_batch
+from spectral_batch import WelchPSD, peak_and_width_batch, lorentz_fit_batch
+
+# utils/ (parámetros tipados) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import ParamBatch, as_params, load_model_params  # noqa: E402
+
+
+DT_MAX = 0.02
+
+
+def default_dt_max(params=None):
+    """Paso máximo por defecto: min(DT_MAX, τ_min/10) (el OU queda resuelto)."""
+    p = as_params(params)
+    tau = min(p.tau_phi, p.tau_chi)
+    return min(DT_MAX, 0.1*tau) if tau > 0 else DT_MAX
+
+
+def integrate_adaptive(params=None, t_end=400.0, t_burn=40.0, dt_out=0.002, seed=42,
+                       rtol=1e-2, atol=1e-3, dt0=0.002, dt_min=1e-6, dt_max=None, block=1 << 16):
+    """
+    Integra de t=0 a t_end con paso adaptativo y devuelve dict con t (relativo tras
+    t_burn), phi, chi, dphi, dchi en la malla uniforme dt_out, los instantes aceptados
+    t_steps (para inspeccionar h(t)) y los contadores n_accept, n_reject.
+    dt_max=None: default_dt_max(params). Con ruido débil todos los pasos quedan en
+    dt_max (sin rechazos), y es dt_max, no rtol/atol, lo que fija la precisión.
+    """
+    p = as_params(params)
+    dt_max = default_dt_max(p) if dt_max is None else dt_max
+    mp2, mc2, g2 = p.m_phi**2, p.m_chi**2, p.g**2
+    lph, lch, V0 = p.lambda_phi, p.lambda_chi, p.V0
+    tp, tc = p.tau_phi, p.tau_chi
+    # sqrt(2ΓT_GH)/τ = cP·H con Γ = 3αH, T_GH = H/2π
+    cP = math.sqrt(2.0*3.0*p.alpha_phi/(2.0*math.pi)) / tp
+    cC = math.sqrt(2.0*3.0*p.alpha_chi/(2.0*math.pi)) / tc
+
+    def step(y, h, w1, w2):
+        phi, chi, dphi, dchi, zph, zch = y
+        energy = 0.5*(dphi*dphi + dchi*dchi) + (
+            -0.5*mp2*phi*phi + 0.25*lph*phi**4 + 0.5*mc2*chi*chi + 0.25*lch*chi**4
+            + 0.5*g2*phi*phi*chi*chi + V0)
+        Hn = math.sqrt(energy if energy > 1e-16 else 1e-16)
+        zph += (-zph/tp)*h + cP*Hn*w1
+        zch += (-zch/tc)*h + cC*Hn*w2
+        dphi += (-3.0*Hn*dphi - (-mp2*phi + lph*phi**3 + g2*phi*chi*chi) + zph)*h
+        dchi += (-3.0*Hn*dchi - (mc2*chi + lch*chi**3 + g2*chi*phi*phi) + zch)*h
+        return (phi + dphi*h, chi + dchi*h, dphi, dchi, zph, zch)
+
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal(block); iz = 0
+
+    y = (p.phi0, p.chi0, p.dphi0, p.dchi0, 0.0, 0.0)
+    t, h = 0.0, min(max(dt0, dt_min), dt_max)
+    stack = []            # incrementos ya revelados: (h, ΔW_φ, ΔW_χ), el siguiente al final
+    T, Y = [], []
+    n_acc = n_rej = 0
+    eps = 1e-12 * max(t_end, 1.0)
+
+    while t < t_end - eps:
+        h = min(h, t_end - t)
+        if iz + 4 > block:
+            z = rng.standard_normal(block); iz = 0
+        if stack:
+            hs, W1s, W2s = stack.pop()
+            if h < hs - eps:
+                # puente: ΔW_a | ΔW_s ~ N(ΔW_s·h/hs, h(hs−h)/hs)
+                s = math.sqrt(h*(hs - h)/hs)
+                W1 = W1s*h/hs + s*z[iz]; W2 = W2s*h/hs + s*z[iz + 1]; iz += 2
+                stack.append((hs - h, W1s - W1, W2s - W2))
+            else:
+                h, W1, W2 = hs, W1s, W2s
+        else:
+            s = math.sqrt(h)
+            W1, W2 = s*z[iz], s*z[iz + 1]; iz += 2
+        # punto medio por puente browniano
+        s = 0.5*math.sqrt(h)
+        a1 = 0.5*W1 + s*z[iz]; a2 = 0.5*W2 + s*z[iz + 1]; iz += 2
+        b1, b2 = W1 - a1, W2 - a2
+
+        y_full = step(y, h, W1, W2)
+        y_half = step(step(y, 0.5*h, a1, a2), 0.5*h, b1, b2)
+        err = 0.0
+        for u, v, w in zip(y, y_full, y_half):
+            e = abs(v - w) / (atol + rtol*max(abs(u), abs(w)))
+            if e > err:
+                err = e
+        if not math.isfinite(err):
+            raise FloatingPointError(f"estado no finito en t={t:.6g} (h={h:.3g})")
+
+        fac = 2.0 if err == 0.0 else min(2.0, max(0.2, 0.9*err**-0.5))
+        if err <= 1.0 or h <= dt_min:
+            if t + h > t_burn and not T:
+                T.append(t); Y.append(y)
+            t += h
+            y = y_half
+            n_acc += 1
+            if T:
+                T.append(t); Y.append(y)
+            h = min(max(h*fac, dt_min), dt_max)
+        else:
+            stack.append((0.5*h, b1, b2))
+            stack.append((0.5*h, a1, a2))
+            n_rej += 1
+            h = max(h*fac, dt_min)
+
+    T = np.asarray(T); Y = np.asarray(Y)
+    n_out = int(round((t_end - t_burn) / dt_out))
+    tg = t_burn + dt_out*np.arange(1, n_out + 1)
+    tg = np.minimum(tg, T[-1])
+    out = dict(t=np.arange(n_out)*dt_out,
+               phi=CubicHermiteSpline(T, Y[:, 0], Y[:, 2])(tg),
+               chi=CubicHermiteSpline(T, Y[:, 1], Y[:, 3])(tg),
+               dphi=np.interp(tg, T, Y[:, 2]),
+               dchi=np.interp(tg, T, Y[:, 3]),
+               t_steps=T, n_accept=n_acc, n_reject=n_rej)
+    return out
+
+
+def welch_q(phi, chi, dt, nperseg=16384, metric_source="avg", peak_fit="fwhm"):
+    """f0, Δf, Q del promedio de Welch de φ, χ (o de una sola serie)."""
+    acc = WelchPSD(min(nperseg, len(phi)), dt, n_series=2)
+    acc.push(np.vstack([phi, chi]))
+    f, psd = acc.result()
+    stack = {"phi": psd[:1], "chi": psd[1:]}.get(metric_source, 0.5*(psd[:1] + psd[1:]))
+    estimator = lorentz_fit_batch if peak_fit == "lorentz" else peak_and_width_batch
+    f0, delf, Q = estimator(f, stack)
+    return float(f0[0]), float(delf[0]), float(Q[0])
+
+
+def q_regression(params, taus, n_seeds=8, steps=200000, burn_in=20000, dt=0.002, seed=0,
+                 nperseg=16384, metric_source="avg", peak_fit="fwhm", **adaptive_kw):
+    """
+    Q de Welch medio (± error estándar) de n_seeds semillas, adaptativo frente a paso
+    fijo dt, para cada τ (τ_φ = τ_χ = τ). Devuelve una lista de dicts con tau, Q_ad,
+    Q_ad_err, f0_ad, Q_fix, Q_fix_err, f0_fix y z = (Q_ad − Q_fix)/sqrt(err² + err²).
+    """
+    p = as_params(params)
+    qkw = dict(nperseg=nperseg, metric_source=metric_source, peak_fit=peak_fit)
+    rows = []
+    for tau in taus:
+        pt = p.replace(tau_phi=tau, tau_chi=tau)
+        ad = np.array([welch_q(o["phi"], o["chi"], dt, **qkw) for o in (
+            integrate_adaptive(pt, t_end=steps*dt, t_burn=burn_in*dt, dt_out=dt, seed=seed + s,
+                               dt0=dt, **adaptive_kw) for s in range(n_seeds))])
+        sim = simulate_batch(ParamBatch.broadcast(pt, phi0=np.full(n_seeds, pt.phi0)), steps=steps, dt=dt,
+                             burn_in=burn_in, seed=seed)
+        fx = np.array([welch_q(sim["PHI"][r], sim["CHI"][r], dt, **qkw) for r in range(n_seeds)])
+        (Qa, ea), (Qf, ef) = ((x[:, 2].mean(), x[:, 2].std(ddof=1)/np.sqrt(n_seeds)) for x in (ad, fx))
+        rows.append(dict(tau=float(tau), Q_ad=float(Qa), Q_ad_err=float(ea), f0_ad=float(ad[:, 0].mean()),
+                         Q_fix=float(Qf), Q_fix_err=float(ef), f0_fix=float(fx[:, 0].mean()),
+                         z=float((Qa - Qf)/np.hypot(ea, ef))))
+    return rows
+
+
+def _parse_kv(items):
+    out = {}
+    for s in items or []:
+        k, _, v = s.partition("=")
+        out[k.strip()] = float(v)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Integración adaptativa (duplicación de paso + puente browniano) del sistema φ/χ.")
+    ap.add_argument("--param-json", type=str, default=None)
+    ap.add_argument("--set", action="append", default=[], help="Override name=value (repetible).")
+    ap.add_argument("--steps", type=int, default=200000, help="Pasos equivalentes de la malla de salida (t_end = steps·dt).")
+    ap.add_argument("--burn-in", type=int, default=20000, help="Burn-in en pasos de la malla de salida.")
+    ap.add_argument("--dt", type=float, default=0.002, help="Δt de la malla uniforme de salida (y del contraste de paso fijo).")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--rtol", type=float, default=1e-2)
+    ap.add_argument("--atol", type=float, default=1e-3)
+    ap.add_argument("--dt-min", type=float, default=1e-6)
+    ap.add_argument("--dt-max", type=float, default=None, help="Paso máximo (por defecto min(0.02, τ_min/10)).")
+    ap.add_argument("--nperseg", type=int, default=16384, help="Muestras por segmento de Welch para Q.")
+    ap.add_argument("--metric-source", choices=["phi", "chi", "avg"], default="avg")
+    ap.add_argument("--peak-fit", choices=["fwhm", "lorentz"], default="fwhm")
+    ap.add_argument("--compare", action="store_true", help="Contrasta Q con una corrida de paso fijo (una realización; contraste estadístico: --regress).")
+    ap.add_argument("--regress", type=str, default=None,
+                    help="Lista de τ (p.ej. 0.3,1,2,5): Q medio de --n-seeds semillas, adaptativo frente a paso fijo.")
+    ap.add_argument("--n-seeds", type=int, default=8, help="Semillas por τ en --regress.")
+    ap.add_argument("--outdir", type=str, default="assets")
+    args = ap.parse_args()
+
+    base = load_model_params(args.param_json) if args.param_json else as_params(None)
+    try:
+        params = base.replace(**_parse_kv(args.set))
+    except (TypeError, ValueError) as e:
+        ap.error(str(e))
+    if args.burn_in >= args.steps:
+        ap.error("--burn-in debe ser menor que --steps.")
+    os.makedirs(args.outdir, exist_ok=True)
+    qkw = dict(nperseg=args.nperseg, metric_source=args.metric_source, peak_fit=args.peak_fit)
+    dt_max = default_dt_max(params) if args.dt_max is None else args.dt_max
+
+    if args.regress:
+        taus = [float(x) for x in args.regress.split(",") if x.strip()]
+        rows = q_regression(params, taus, n_seeds=args.n_seeds, steps=args.steps, burn_in=args.burn_in,
+                            dt=args.dt, seed=args.seed, rtol=args.rtol, atol=args.atol,
+                            dt_min=args.dt_min, dt_max=args.dt_max, **qkw)
+        lines = [f"Regresión de Q ({args.n_seeds} semillas por τ): adaptativo (rtol={args.rtol:g}, "
+                 f"atol={args.atol:g}, dt_max={'min(0.02, τ/10)' if args.dt_max is None else args.dt_max}) "
+                 f"frente a paso fijo dt={args.dt:g}"]
+        lines += [f"tau={r['tau']:>5g} | Q_adapt={r['Q_ad']:.4g}±{r['Q_ad_err']:.2g} (f0={r['f0_ad']:.4g}) | "
+                  f"Q_fijo={r['Q_fix']:.4g}±{r['Q_fix_err']:.2g} (f0={r['f0_fix']:.4g}) | z={r['z']:+.2f}"
+                  + ("  <-- |z| > 3" if abs(r["z"]) > 3 else "") for r in rows]
+        txt_path = os.path.join(args.outdir, "adaptive-regression.txt")
+        with open(txt_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        print("\n".join(lines))
+        print(f"[OK] Guardado: {txt_path}")
+        return
+
+    t0 = time.perf_counter()
+    out = integrate_adaptive(params, t_end=args.steps*args.dt, t_burn=args.burn_in*args.dt, dt_out=args.dt,
+                             seed=args.seed, rtol=args.rtol, atol=args.atol, dt0=args.dt,
+                             dt_min=args.dt_min, dt_max=dt_max)
+    t_ad = time.perf_counter() - t0
+    f0, delf, Q = welch_q(out["phi"], out["chi"], args.dt, **qkw)
+    n_tot = out["n_accept"] + out["n_reject"]
+
+    lines = [f"Paso adaptativo: rtol={args.rtol:g}, atol={args.atol:g}, dt∈[{args.dt_min:g}, {dt_max:g}], "
+             f"t_end={args.steps*args.dt:g}, semilla={args.seed}",
+             f"  aceptados={out['n_accept']}, rechazados={out['n_reject']} "
+             f"(paso fijo: {args.steps}; reducción ×{args.steps/max(n_tot, 1):.1f}) | {t_ad:.1f} s",
+             f"  f0={f0:.5g}, Δf={delf:.5g}, Q={Q:.4g}"]
+    if args.compare:
+        t0 = time.perf_counter()
+        sim = simulate_batch(ParamBatch.broadcast(params), steps=args.steps, dt=args.dt,
+                             burn_in=args.burn_in, seed=args.seed)
+        t_fx = time.perf_counter() - t0
+        f0x, delfx, Qx = welch_q(sim["PHI"][0], sim["CHI"][0], args.dt, **qkw)
+        lines.append(f"Paso fijo dt={args.dt:g}: {args.steps} pasos | {t_fx:.1f} s")
+        lines.append(f"  f0={f0x:.5g}, Δf={delfx:.5g}, Q={Qx:.4g}")
+    txt_path = os.path.join(args.outdir, "adaptive-sde.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    # Figura: h(t) tras burn-in y φ(t) remuestreada
+    ts = out["t_steps"]
+    fig, axes = plt.subplots(2, 1, figsize=(6.4, 5.2), sharex=True)
+    axes[0].semilogy(ts[1:] - ts[0], np.diff(ts), lw=0.6)
+    axes[0].axhline(args.dt, color="k", ls="--", lw=0.8, label=f"dt fijo = {args.dt:g}")
+    axes[0].set_ylabel("h")
+    axes[0].legend()
+    axes[1].plot(out["t"], out["phi"], lw=0.5, label=r"$\phi$")
+    axes[1].plot(out["t"], out["chi"], lw=0.5, label=r"$\chi$")
+    axes[1].set_xlabel("t (tras burn-in)")
+    axes[1].legend()
+    fig.suptitle(f"Paso adaptativo: {n_tot} evaluaciones frente a {args.steps} (Q={Q:.3g})")
+    fig.tight_layout()
+    png_path = os.path.join(args.outdir, "adaptive-sde.png")
+    fig.savefig(png_path, dpi=300)
+    plt.close(fig)
+
+    print("\n".join(lines))
+    print(f"[OK] Guardado: {png_path}, {txt_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Simulador por lotes del modelo de dos campos con ruido OU (mismas ecuaciones que
+Fig. 4) para ensembles de parámetros: un paso de Euler–Maruyama avanza a la vez
+los R miembros de un ParamBatch (utils/parameters.py) con operaciones de arrays,
+y evaluate() reparte bloques de miembros entre procesos.
+
+- integrate_chunks(batch, ...): generador de trozos del estado (R, chunk), sin
+  longitud fija (lo usa convergence.py para detenerse al converger).
+- simulate_batch(batch, ...): φ(t), χ(t) (R, n) y media/varianza de la cola de
+  w_total por miembro (Welford por trozos, sin guardar w).
+- batch_metrics(batch, ...):  Q = f0/Δf (espectros por lotes, como Fig. 4) y σ_w.
+- evaluate(batch, workers=4): batch_metrics en paralelo por bloques.
+
+noise="common" usa el mismo ruido en todos los miembros (números aleatorios
+comunes, como --noise common de Fig. 4), útil cuando interesan diferencias
+entre parámetros (p.ej. sobol_sensitivity.py).
+
+Con R=1 y la misma semilla reproduce simulate_series de Fig. 4.
+
+    from batch_sim import evaluate
+    out = evaluate(ParamBatch.broadcast(p, g=np.linspace(0.5, 0.9, 256)), workers=4)
+"""
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from spectral_batch import power_spectra, peak_and_width_batch, lorentz_fit_batch
+
+# utils/ (parámetros tipados) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import MODEL_FIELDS, ParamBatch  # noqa: E402
+
+
+def integrate_chunks(batch, dt=0.002, seed=0, chunk=4096, noise_sign=1.0, noise="independent"):
+    """
+    Generador: avanza los R miembros de `batch` indefinidamente (Euler–Maruyama) y
+    entrega trozos dict(phi, chi, dphi, dchi) de forma (R, chunk) con el estado tras cada paso.
+    noise="common": todos los miembros comparten los mismos incrementos gaussianos
+    (números aleatorios comunes; las diferencias entre miembros vienen solo de los parámetros).
+    """
+    b = batch
+    R = len(b)
+    mp2, mc2, g2 = b.m_phi**2, b.m_chi**2, b.g**2
+    lph, lch, V0 = b.lambda_phi, b.lambda_chi, b.V0
+    tau_phi2, tau_chi2 = b.tau_phi**2, b.tau_chi**2
+    rng = np.random.default_rng(seed)
+    shape = (1, 2) if noise == "common" else (R, 2)
+
+    phi, chi = b.phi0.copy(), b.chi0.copy()
+    dphi, dchi = b.dphi0.copy(), b.dchi0.copy()
+    zph = np.zeros(R); zch = np.zeros(R)
+
+    while True:
+        out = {k: np.empty((R, chunk)) for k in ("phi", "chi", "dphi", "dchi")}
+        for j in range(chunk):
+            energy = 0.5*(dphi**2 + dchi**2) + (
+                -0.5 * mp2 * phi**2 + 0.25 * lph * phi**4
+                + 0.5 * mc2 * chi**2 + 0.25 * lch * chi**4
+                + 0.5 * g2 * phi**2 * chi**2 + V0)
+            Hn   = np.sqrt(np.maximum(energy, 1e-16))
+            Tgh  = Hn / (2.0*np.pi)
+            GamP = b.alpha_phi * 3.0 * Hn
+            GamC = b.alpha_chi * 3.0 * Hn
+
+            xi = rng.standard_normal(shape) * noise_sign
+            zph += (-zph/b.tau_phi) * dt + np.sqrt((2.0*GamP*Tgh)/tau_phi2 * dt) * xi[:, 0]
+            zch += (-zch/b.tau_chi) * dt + np.sqrt((2.0*GamC*Tgh)/tau_chi2 * dt) * xi[:, 1]
+
+            dphi += (-3.0*Hn*dphi - (-mp2 * phi + lph * phi**3 + g2 * phi * chi**2) + zph) * dt
+            dchi += (-3.0*Hn*dchi - (mc2 * chi + lch * chi**3 + g2 * chi * phi**2) + zch) * dt
+            phi  += dphi * dt
+            chi  += dchi * dt
+
+            out["phi"][:, j] = phi; out["chi"][:, j] = chi
+            out["dphi"][:, j] = dphi; out["dchi"][:, j] = dchi
+        yield out
+
+
+def observables(batch, phi, chi, dphi, dchi):
+    """H y w_total (atribución mitad-mitad del acoplamiento, como Fig. 4) sobre arrays (R, n)."""
+    b = batch
+    mp2, mc2, g2 = b.m_phi[:, None]**2, b.m_chi[:, None]**2, b.g[:, None]**2
+    lph, lch = b.lambda_phi[:, None], b.lambda_chi[:, None]
+    kin = 0.5*(dphi**2 + dchi**2)
+    Vphi = -0.5*mp2 * phi**2 + 0.25*lph*phi**4 + 0.25*g2*phi**2*chi**2
+    Vchi =  0.5*mc2 * chi**2 + 0.25*lch*chi**4 + 0.25*g2*phi**2*chi**2
+    H = np.sqrt(np.maximum(kin + Vphi + Vchi + b.V0[:, None], 1e-16))
+    rho = kin + Vphi + Vchi
+    w = (kin - (Vphi + Vchi)) / np.where(rho > 1e-16, rho, 1e-16)
+    return H, w
+
+
+def _welford_rows(n, mean, m2, x):
+    """Combina (Chan et al.) los acumuladores por fila con un trozo x (R, c)."""
+    c = x.shape[1]
+    if c == 0:
+        return n, mean, m2
+    mb = x.mean(axis=1)
+    m2b = np.sum((x - mb[:, None])**2, axis=1)
+    tot = n + c
+    delta = mb - mean
+    return tot, mean + delta*c/tot, m2 + m2b + delta**2*n*c/tot
+
+
+def simulate_batch(batch, steps=160000, dt=0.002, burn_in=20000, seed=0, tail_frac=0.4,
+                   record_every=1, noise_sign=1.0, noise="independent", chunk=4096):
+    """
+    Euler–Maruyama vectorizado sobre los miembros de `batch` (ver integrate_chunks).
+    Devuelve dict con PHI, CHI (R, n_rec) cada record_every pasos tras burn-in,
+    mean_w y var_w (R,) de w_total sobre la fracción final tail_frac.
+    """
+    R = len(batch)
+    keep = steps - burn_in
+    n_rec = -(-keep // record_every)
+    PHI = np.empty((R, n_rec)); CHI = np.empty((R, n_rec))
+    w_from = burn_in + keep - max(100, int(tail_frac*keep))
+    n_w = 0; mean_w = np.zeros(R); m2_w = np.zeros(R)
+
+    n0 = 0
+    for ch in integrate_chunks(batch, dt=dt, seed=seed, chunk=min(chunk, steps), noise_sign=noise_sign, noise=noise):
+        c = min(ch["phi"].shape[1], steps - n0)
+        n = n0 + np.arange(c)
+        rec = (n >= burn_in) & ((n - burn_in) % record_every == 0)
+        if rec.any():
+            PHI[:, (n[rec] - burn_in) // record_every] = ch["phi"][:, :c][:, rec]
+            CHI[:, (n[rec] - burn_in) // record_every] = ch["chi"][:, :c][:, rec]
+        tail = n >= w_from
+        if tail.any():
+            _, w = observables(batch, *(ch[k][:, :c][:, tail] for k in ("phi", "chi", "dphi", "dchi")))
+            n_w, mean_w, m2_w = _welford_rows(n_w, mean_w, m2_w, w)
+        n0 += c
+        if n0 >= steps:
+            break
+
+    return dict(PHI=PHI, CHI=CHI, mean_w=mean_w, var_w=m2_w / max(n_w, 1))
+
+
+def batch_metrics(batch, steps=160000, dt=0.002, burn_in=20000, seed=0, tail_frac=0.4,
+                  record_every=1, metric_source="avg", peak_fit="fwhm", noise="independent"):
+    """Q, f0, Δf (del espectro de φ, χ o su promedio) y σ_w = Var(w) tardía de cada miembro."""
+    sim = simulate_batch(batch, steps=steps, dt=dt, burn_in=burn_in, seed=seed,
+                         tail_frac=tail_frac, record_every=record_every, noise=noise)
+    R = len(batch)
+    freqs, psd = power_spectra(np.vstack([sim["PHI"], sim["CHI"]]), dt * record_every)
+    stack = {"phi": psd[:R], "chi": psd[R:]}.get(metric_source, 0.5*(psd[:R] + psd[R:]))
+    estimator = lorentz_fit_batch if peak_fit == "lorentz" else peak_and_width_batch
+    f0, delf, Q = estimator(freqs, stack)
+    return dict(Q=Q, f0=f0, delf=delf, sigma_w=sim["var_w"], mean_w=sim["mean_w"])
+
+
+def _run_block(arrays, seed, kw):
+    return batch_metrics(ParamBatch(**arrays), seed=seed, **kw)
+
+
+def evaluate(batch, workers=1, block=64, seed=0, **kw):
+    """
+    batch_metrics sobre bloques de `block` miembros, en `workers` procesos.
+    Cada bloque usa la semilla seed + índice de bloque (resultado independiente de workers);
+    con noise="common" todos usan `seed`, y cada miembro ve la misma realización del ruido.
+    """
+    arrays = batch.to_dict()
+    starts = range(0, len(batch), block)
+    stride = 0 if kw.get("noise") == "common" else 1
+    jobs = [({k: arrays[k][s:s + block] for k in MODEL_FIELDS}, seed + stride*j, kw) for j, s in enumerate(starts)]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_run_block, *zip(*jobs)))
+    else:
+        parts = [_run_block(*job) for job in jobs]
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Monitor de convergencia para las simulaciones φ/χ: burn-in automático y parada
+temprana cuando Q y σ_w alcanzan la precisión pedida, en lugar de --burn-in y
+--steps fijos.
+
+Se integran R cadenas paralelas (mismos parámetros, ruido independiente y
+condiciones iniciales ligeramente dispersas) con batch_sim.integrate_chunks y,
+cada check_every pasos, se evalúa sobre H, w y φ², χ² (decimados):
+- burn-in: el menor corte (en fracciones de la serie) tras el que el test de
+  Geweke (medias del 10 % inicial y 50 % final, varianzas por batch means) da
+  |z| < z_crit en todas las cadenas y observables;
+- estacionariedad entre cadenas: split-R̂ de Gelman–Rubin < rhat_max;
+- precisión: error relativo de Q (PSD de Welch con nperseg fijo; dispersión
+  robusta entre mitades de cadena) y de σ_w = Var(w) (batch means de
+  (w − ⟨w⟩)²) por debajo de tol_q y tol_sigma, con Δf resuelto (≥ 3 bins).
+  Q es la mediana de las cadenas con Δf resuelto: un pico degenerado no la arrastra.
+
+    from convergence import run_until_converged
+    res = run_until_converged(params, n_chains=4, tol_q=0.05, tol_sigma=0.05)
+    res["burn_in"], res["steps"], res["Q"], res["sigma_w"], res["converged"]
+
+Funciones sueltas (sobre arrays, reutilizables con series de CSV):
+    batch_means(x), geweke(x), gelman_rubin(chains), detect_burn_in(X)
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from batch_sim import integrate_chunks, observables
+from streaming_stats import Welford
+from spectral_batch import WelchPSD, power_spectra, peak_and_width_batch, lorentz_fit_batch
+
+# utils/ (parámetros tipados) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import ParamBatch, as_params, load_model_params  # noqa: E402
+
+
+def batch_means(x, n_batches=20):
+    """Media y error estándar de Monte Carlo (batch means) de cada fila de x (..., n)."""
+    x = np.asarray(x, float)
+    n = x.shape[-1] // n_batches * n_batches
+    if n < n_batches:
+        return x.mean(axis=-1), np.full(x.shape[:-1], np.nan)
+    means = x[..., :n].reshape(x.shape[:-1] + (n_batches, -1)).mean(axis=-1)
+    return x.mean(axis=-1), means.std(axis=-1, ddof=1) / np.sqrt(n_batches)
+
+
+def geweke(x, first=0.1, last=0.5, n_batches=10):
+    """z de Geweke por fila: (media inicial − media final) / sqrt(se² + se²), se por batch means."""
+    x = np.asarray(x, float)
+    n = x.shape[-1]
+    a = x[..., :max(int(first*n), n_batches)]
+    b = x[..., n - max(int(last*n), n_batches):]
+    ma, sa = batch_means(a, n_batches)
+    mb, sb = batch_means(b, n_batches)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (ma - mb) / np.sqrt(sa**2 + sb**2)
+
+
+def gelman_rubin(chains):
+    """split-R̂ de cadenas (m, n): cada cadena se parte en dos mitades (detecta también tendencias)."""
+    c = np.asarray(chains, float)
+    n = c.shape[-1] // 2
+    c = np.concatenate([c[..., :n], c[..., n:2*n]], axis=-2)
+    W = c.var(axis=-1, ddof=1).mean(axis=-1)
+    B = n * c.mean(axis=-1).var(axis=-1, ddof=1)
+    var = (n - 1)/n * W + B/n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.sqrt(np.where(W > 0, var / W, np.where(B > 0, np.inf, 1.0)))
+
+
+def detect_burn_in(X, fractions=np.arange(0.0, 0.55, 0.05), z_crit=2.0, n_batches=10):
+    """
+    Menor índice de corte (de una lista de fracciones) tras el que todas las filas de X (k, n)
+    pasan el test de Geweke; None si ninguno lo logra.
+    """
+    X = np.atleast_2d(np.asarray(X, float))
+    n = X.shape[-1]
+    for frac in fractions:
+        i = int(frac*n)
+        if n - i < 4*n_batches:
+            break
+        z = geweke(X[:, i:], n_batches=n_batches)
+        if np.all(np.abs(z[np.isfinite(z)]) < z_crit):
+            return i
+    return None
+
+
+class ConvergenceMonitor:
+    """
+    Acumula trozos (R, c) de φ, χ, H y w y decide burn-in y parada.
+
+        mon = ConvergenceMonitor(dt=0.002)
+        mon.update(phi, chi, H, w)
+        st = mon.check()     # dict(burn_in, rhat, Q, Q_err, sigma_w, sigma_w_err, converged, ...)
+    """
+
+    def __init__(self, dt, tol_q=0.05, tol_sigma=0.05, rhat_max=1.05, z_crit=2.0, min_keep=None,
+                 n_seg=2, n_batches=20, decimate=10, nperseg=16384, metric_source="avg", peak_fit="fwhm"):
+        self.dt = dt
+        self.nperseg = int(nperseg)
+        # al menos dos segmentos de Welch por trozo de cada cadena
+        min_keep = 2*n_seg*self.nperseg if min_keep is None else min_keep
+        self.tol_q, self.tol_sigma, self.rhat_max, self.z_crit = tol_q, tol_sigma, rhat_max, z_crit
+        self.min_keep, self.n_seg, self.n_batches, self.decimate = min_keep, n_seg, n_batches, decimate
+        self.metric_source, self.peak_fit = metric_source, peak_fit
+        self._parts = {k: [] for k in ("phi", "chi", "H", "w")}
+        self.n = 0
+        self.history = []
+
+    def update(self, phi, chi, H, w):
+        for k, v in (("phi", phi), ("chi", chi), ("H", H), ("w", w)):
+            self._parts[k].append(np.asarray(v, float))
+        self.n += np.shape(phi)[1]
+
+    def series(self, key):
+        parts = self._parts[key]
+        if len(parts) > 1:
+            self._parts[key] = parts = [np.concatenate(parts, axis=1)]
+        return parts[0]
+
+    def _q(self, phi, chi):
+        """
+        Q y Δf de cada fila (φ, χ o promedio de espectros normalizados, como Fig. 4) sobre
+        la PSD de Welch: el periodograma crudo tiene picos de un bin cuya anchura solo
+        refleja la longitud de la serie, así que su Q no converge al alargarla.
+        """
+        M = phi.shape[0]
+        X = np.vstack([phi, chi])
+        if X.shape[1] >= self.nperseg:
+            freqs, psd = WelchPSD(self.nperseg, self.dt, n_series=2*M).push(X).result()
+        else:
+            freqs, psd = power_spectra(X, self.dt)
+        stack = {"phi": psd[:M], "chi": psd[M:]}.get(self.metric_source, 0.5*(psd[:M] + psd[M:]))
+        estimator = lorentz_fit_batch if self.peak_fit == "lorentz" else peak_and_width_batch
+        _, delf, Q = estimator(freqs, stack)
+        return Q, delf
+
+    def _q_segments(self, phi, chi):
+        """Q y Δf de cada cadena (serie completa) y de n_seg segmentos por cadena."""
+        Q, delf = self._q(phi, chi)
+        L = phi.shape[1] // self.n_seg
+        if L < self.nperseg:
+            return Q, delf, np.full(1, np.nan), np.full(1, np.nan)
+        seg = lambda x: x[:, :L*self.n_seg].reshape(-1, L)  # noqa: E731
+        return (Q, delf) + self._q(seg(phi), seg(chi))
+
+    def check(self):
+        """Evalúa burn-in, R̂ y precisión con lo acumulado hasta ahora."""
+        d = self.decimate
+        phi, chi, H, w = (self.series(k) for k in ("phi", "chi", "H", "w"))
+        R = phi.shape[0]
+        mon = np.vstack([H[:, ::d], w[:, ::d], phi[:, ::d]**2, chi[:, ::d]**2])
+        i = detect_burn_in(mon, z_crit=self.z_crit)
+        st = dict(steps=self.n, burn_in=None if i is None else i*d, converged=False)
+        if i is None or self.n - i*d < self.min_keep:
+            self.history.append(st)
+            return st
+        b = i*d
+        rhat = float(np.nanmax([gelman_rubin(x[:, b::d]) for x in (H, w, phi**2, chi**2)]))
+        Q_full, delf, Q_seg, delf_seg = self._q_segments(phi[:, b:], chi[:, b:])
+        # Δf debe abarcar varios bins de la PSD: las cadenas con un pico degenerado
+        # (Δf < 3 bins, Q ~ 1e14) no entran en Q; si son mayoría, hace falta un nperseg mayor
+        min_df = 3.0/(min(self.nperseg, self.n - b)*self.dt)
+        ok = np.isfinite(Q_full) & (delf >= min_df)
+        Q = float(np.median(Q_full[ok])) if ok.any() else np.nan
+        resolved = bool(2*ok.sum() > ok.size)
+        # dispersión robusta (MAD) entre segmentos resueltos
+        Q_seg = Q_seg[np.isfinite(Q_seg) & (delf_seg >= min_df)]
+        mad = 1.4826*np.median(np.abs(Q_seg - np.median(Q_seg))) if Q_seg.size > 1 else np.nan
+        Q_err = float(mad / np.sqrt(max(Q_seg.size, 1)))
+        wt = w[:, b:]
+        var_w = wt.var(axis=1)
+        _, se = batch_means((wt - wt.mean(axis=1, keepdims=True))**2, self.n_batches)
+        sigma_w = float(var_w.mean())
+        sigma_err = float(np.sqrt(np.nansum(se**2)) / R)
+        rel_q = Q_err/abs(Q) if np.isfinite(Q) and Q else np.inf
+        rel_s = sigma_err/abs(sigma_w) if sigma_w else np.inf
+        st.update(rhat=rhat, Q=Q, Q_err=Q_err, Q_chains=np.where(ok, Q_full, np.nan), delf_chains=delf,
+                  f0_chains=Q_full*delf,
+                  resolved=resolved, n_resolved=int(ok.sum()),
+                  sigma_w=sigma_w, sigma_w_err=sigma_err, sigma_w_chains=var_w,
+                  converged=bool(resolved and rhat < self.rhat_max
+                                 and rel_q < self.tol_q and rel_s < self.tol_sigma))
+        self.history.append(st)
+        return st
+
+
+def run_until_converged(params=None, n_chains=4, dt=0.002, seed=0, chunk=4096, check_every=20000,
+                        min_steps=20000, max_steps=600000, init_spread=0.05, noise="independent", **monitor_kw):
+    """
+    Integra n_chains cadenas hasta que el monitor declara convergencia (o max_steps).
+    init_spread: dispersión gaussiana de (phi0, chi0) entre cadenas (útil para R̂).
+    Devuelve el último estado del monitor con burn_in/steps en pasos, history,
+    PHI, CHI tras el burn-in (R, n) y el Welford conjunto de w tras el burn-in ('pooled').
+    """
+    p = as_params(params)
+    rng = np.random.default_rng(seed + 1)
+    jitter = init_spread*rng.standard_normal((2, n_chains))
+    batch = ParamBatch.broadcast(p, phi0=p.phi0 + jitter[0], chi0=p.chi0 + jitter[1])
+    mon = ConvergenceMonitor(dt, **monitor_kw)
+    next_check = max(min_steps, check_every)
+    st = dict(steps=0, burn_in=None, converged=False)
+    for ch in integrate_chunks(batch, dt=dt, seed=seed, chunk=chunk, noise=noise):
+        H, w = observables(batch, ch["phi"], ch["chi"], ch["dphi"], ch["dchi"])
+        mon.update(ch["phi"], ch["chi"], H, w)
+        if mon.n >= next_check or mon.n >= max_steps:
+            st = mon.check()
+            next_check += check_every
+            if st["converged"] or mon.n >= max_steps:
+                break
+    b = st["burn_in"] if st["burn_in"] is not None else 0
+    st.update(history=mon.history, PHI=mon.series("phi")[:, b:], CHI=mon.series("chi")[:, b:],
+              pooled=Welford().update(mon.series("w")[:, b:]))
+    return st
+
+
+def _parse_kv(items):
+    out = {}
+    for s in items or []:
+        k, _, v = s.partition("=")
+        out[k.strip()] = float(v)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Burn-in automático y parada por precisión de Q y σ_w.")
+    ap.add_argument("--n-chains", type=int, default=4)
+    ap.add_argument("--dt", type=float, default=0.002)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--tol-q", type=float, default=0.05, help="Error relativo objetivo de Q.")
+    ap.add_argument("--tol-sigma", type=float, default=0.05, help="Error relativo objetivo de σ_w.")
+    ap.add_argument("--rhat-max", type=float, default=1.05)
+    ap.add_argument("--check-every", type=int, default=20000)
+    ap.add_argument("--min-steps", type=int, default=20000)
+    ap.add_argument("--max-steps", type=int, default=600000)
+    ap.add_argument("--nperseg", type=int, default=16384, help="Segmento de Welch para Q (resolución 1/(nperseg·dt)).")
+    ap.add_argument("--metric-source", choices=["phi", "chi", "avg"], default="avg")
+    ap.add_argument("--param-json", type=str, default=None, help="JSON de parámetros base (por defecto, los de las figuras).")
+    ap.add_argument("--set", action="append", default=[], help="Parámetro=valor (repetible), p.ej. --set tau_phi=1.")
+    args = ap.parse_args()
+
+    base = load_model_params(args.param_json) if args.param_json else as_params(None)
+    res = run_until_converged(base.replace(**_parse_kv(args.set)), n_chains=args.n_chains, dt=args.dt,
+                              seed=args.seed, check_every=args.check_every, min_steps=args.min_steps,
+                              max_steps=args.max_steps, tol_q=args.tol_q, tol_sigma=args.tol_sigma,
+                              rhat_max=args.rhat_max, nperseg=args.nperseg, metric_source=args.metric_source)
+    for st in res["history"]:
+        line = f"pasos={st['steps']:>7} | burn-in={st['burn_in']}"
+        if "rhat" in st:
+            line += (f" | R̂={st['rhat']:.3f} | Q={st['Q']:.4g}±{st['Q_err']:.2g}"
+                     f" | σ_w={st['sigma_w']:.4g}±{st['sigma_w_err']:.2g}"
+                     + ("" if st["resolved"] else
+                        f" | Δf sin resolver ({st['n_resolved']}/{len(st['Q_chains'])} cadenas)"))
+        print(line)
+    status = "convergido" if res["converged"] else "SIN converger (max-steps)"
+    print(f"[OK] {status} en {res['steps']} pasos (burn-in {res['burn_in']})")
+
+
+if __name__ == "__main__":
+    main()
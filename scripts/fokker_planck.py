@@ -0,0 +1,431 @@
+# -*- coding: utf-8 -*-
+"""
+Densidad estacionaria de Fokker–Planck (volúmenes finitos, scipy.sparse) para
+versiones reducidas del modelo φ/χ con ruido OU ζ, como alternativa determinista
+(sin ruido de muestreo) a las corridas largas de Euler–Maruyama.
+
+Modelos (χ = 0, que es invariante si α_χ = 0; H incluye V0 como en Fig. 4):
+- "single": un campo sobredamortiguado más ζ, estado (φ, ζ):
+      3H φ' = −V'(φ) + ζ,   H = sqrt(V(φ) + V0)
+      dζ = −ζ/τ dt + sqrt(2ΓT_GH)/τ dW,   Γ = 3αH,  T_GH = H/(2π)
+- "slice": el corte completo (φ, dφ, ζ) de las ecuaciones de Fig. 4:
+      φ' = π,   π' = −3Hπ − V'(φ) + ζ,   H = sqrt(π²/2 + V(φ) + V0)
+
+Discretización: densidades promedio por celda en una malla regular, flujos en
+las caras con Scharfetter–Gummel (ajuste exponencial; se reduce a upwind donde
+no hay difusión) y flujo nulo en los bordes. La matriz conserva masa y es una
+M-matriz, así que la solución es positiva. En los ejes sin difusión (φ, dφ)
+el upwind de primer orden ensancha la densidad (std(φ) +9 %, σ_w +55 % en el
+corte 3D frente a Monte Carlo); por defecto se añade el flujo antidifusivo de
+segundo orden limitado (van Leer) por corrección diferida: cada iteración
+resuelve con la misma matriz upwind (factorización reutilizada) y el limitador
+mantiene la densidad sin oscilaciones.
+
+El estado estacionario L p = 0 se obtiene fijando p = 1 en una celda (y
+normalizando): por defecto ("auto") con LU directa hasta DIRECT_MAX_CELLS
+celdas y GMRES precondicionado con ILU (spilu) por encima. Alcance: el modelo
+"single" (2D) se resuelve en fracciones de segundo (con la caja por defecto,
+que abarca ambos pozos, las celdas son del orden del ancho del pozo: para
+momentos precisos hay que ajustar --bounds); en el corte 3D solo la
+malla por defecto 32×32×24 (LU, ~3 s con V0=0.6) es más barata que una corrida
+de Euler–Maruyama equivalente (~6 s), con std(φ), std(dφ) a ~3–5 % y σ_w a
+~13 % de Monte Carlo. 48×48×32 baja σ_w a ~4 % pero tarda ~30 s; 64×64×48
+con GMRES+ILU tarda ~45 s (casi todo en spilu; un ILU más ligero deja de
+converger) y el recurso directo, minutos.
+
+σ_w es Var(w) bajo la densidad estacionaria, con w = p/ρ definido como en Fig. 4.
+Si H → 0 en el atractor (V + V0 < 0 en el mínimo) la difusión y el
+amortiguamiento se anulan y la densidad estacionaria no está bien definida:
+el operador resulta singular (error) o el resumen lo indica (H_min).
+
+Uso:
+    python scripts/fokker_planck.py --model single --grid 256,128
+    python scripts/fokker_planck.py --model single --set V0=0.6
+    # corte 3D: caja ajustada al pozo (la difusión numérica crece con el tamaño de celda)
+    python scripts/fokker_planck.py --model slice --set V0=0.6 --bounds phi=1.25:1.58 \
+        --bounds dphi=-0.12:0.12 --bounds zeta=-0.25:0.25
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+import matplotlib.pyplot as plt
+
+# utils/ (parámetros tipados) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import as_params, load_model_params  # noqa: E402
+
+AXES = {"single": ("phi", "zeta"), "slice": ("phi", "dphi", "zeta")}
+DIRECT_MAX_CELLS = 50000
+
+
+def _bernoulli(x):
+    """B(x) = x/(e^x − 1), estable cerca de 0 y para |x| grande."""
+    x = np.asarray(x, float)
+    out = np.ones_like(x)
+    small = np.abs(x) < 1e-8
+    xs = x[~small]
+    with np.errstate(over="ignore"):
+        out[~small] = xs / np.expm1(xs)  # x → +∞: B → 0
+    out[small] = 1.0 - 0.5*x[small]
+    return out
+
+
+def fp_operator(centers, drift, diffusion):
+    """
+    Operador de Fokker–Planck dp/dt = L p (CSR, N×N) en volúmenes finitos.
+    centers:   lista de arrays 1D (centros de celda, espaciado uniforme) por dimensión.
+    drift:     f(X) -> lista de arrays A_d evaluados en los puntos X (tupla de mallas).
+    diffusion: f(X) -> lista de arrays D_d (o None si la dimensión no difunde);
+               D = b²/2 y no debe depender de la propia coordenada d.
+    """
+    shape = tuple(len(c) for c in centers)
+    N = int(np.prod(shape))
+    idx = np.arange(N).reshape(shape)
+    rows, cols, vals = [], [], []
+    for d, c in enumerate(centers):
+        h = c[1] - c[0]
+        faces = [0.5*(cc[:-1] + cc[1:]) if k == d else cc for k, cc in enumerate(centers)]
+        X = np.meshgrid(*faces, indexing="ij")
+        A = drift(X)[d]
+        D = diffusion(X)[d]
+        if D is None:
+            a, b = np.maximum(A, 0.0), np.maximum(-A, 0.0)
+        else:
+            D = np.broadcast_to(D, A.shape)
+            pos = D > 0
+            Dp = np.where(pos, D, 1.0)
+            pe = A*h/Dp
+            a = np.where(pos, Dp/h*_bernoulli(-pe), np.maximum(A, 0.0))
+            b = np.where(pos, Dp/h*_bernoulli(pe), np.maximum(-A, 0.0))
+        # flujo F = a p_i − b p_{i+1} a través de la cara entre i e i+1
+        left = np.take(idx, np.arange(shape[d] - 1), axis=d).ravel()
+        right = np.take(idx, np.arange(1, shape[d]), axis=d).ravel()
+        a, b = a.ravel()/h, b.ravel()/h
+        rows += [left, left, right, right]
+        cols += [left, right, left, right]
+        vals += [-a, b, a, -b]
+    return sp.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(N, N))
+
+
+def _van_leer(a, b):
+    """Pendiente limitada de van Leer (media armónica de a y b, 0 si cambian de signo)."""
+    ab = a*b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ab > 0, 2.0*ab/(a + b), 0.0)
+
+
+def advective_correction(centers, drift, diffusion):
+    """
+    Corrección de segundo orden del flujo upwind en los ejes sin difusión:
+    devuelve C(p) (N,) con la divergencia del flujo antidifusivo limitado
+    F = A·(p_cara − p_upwind), p_cara reconstruida con pendientes de van Leer
+    (primer orden en la primera y última cara). None si todos los ejes difunden.
+    """
+    shape = tuple(len(c) for c in centers)
+    N = int(np.prod(shape))
+    idx = np.arange(N).reshape(shape)
+    parts = []
+    for d, c in enumerate(centers):
+        faces = [0.5*(cc[:-1] + cc[1:]) if k == d else cc for k, cc in enumerate(centers)]
+        X = np.meshgrid(*faces, indexing="ij")
+        if diffusion(X)[d] is not None:
+            continue
+        A = np.broadcast_to(drift(X)[d], X[0].shape).ravel()
+        n = shape[d]
+        k = np.arange(n - 1)
+        cell = [np.take(idx, np.clip(k + j, 0, n - 1), axis=d).ravel() for j in (-1, 0, 1, 2)]
+        # cara k con vecinos k−1 (A > 0) o k+2 (A < 0) dentro de la malla
+        kk = np.broadcast_to(np.expand_dims(k, tuple(j for j in range(len(shape)) if j != d)), X[0].shape).ravel()
+        pos = A > 0
+        valid = np.where(pos, kk >= 1, kk <= n - 3)
+        parts.append((A/(c[1] - c[0]), pos, valid, cell))
+    if not parts:
+        return None
+
+    def C(p):
+        out = np.zeros(N)
+        for Ah, pos, valid, (im1, i0, ip1, ip2) in parts:
+            dc = p[ip1] - p[i0]
+            slope = np.where(pos, _van_leer(p[i0] - p[im1], dc), -_van_leer(p[ip2] - p[ip1], dc))
+            F = np.where(valid, 0.5*Ah*slope, 0.0)
+            out += np.bincount(ip1, F, N) - np.bincount(i0, F, N)
+        return out
+    return C
+
+
+def stationary_density(L, pin=None, method="gmres", tol=1e-10, drop_tol=1e-4, fill_factor=30,
+                       maxiter=1000, restart=50, correction=None, dc_tol=1e-4, dc_maxiter=40):
+    """
+    Resuelve L p = 0 con p[pin] = 1 (fila pin sustituida) y devuelve (p ≥ 0 sin normalizar, info).
+    method: 'gmres' | 'bicgstab' (precondicionados con ILU) | 'direct'. Si el ILU o el
+    método iterativo fallan se recurre a la solución directa (info['fallback']).
+    maxiter acota las iteraciones internas totales (en GMRES, ciclos de `restart`).
+    correction: C(p) de advective_correction; se resuelve L p = −C(p) por corrección
+    diferida (hasta que max|Δp|/max p < dc_tol o dc_maxiter) reutilizando el
+    precondicionador o la LU.
+    """
+    N = L.shape[0]
+    pin = N // 2 if pin is None else int(pin)
+    keep = np.ones(N)
+    keep[pin] = 0.0
+    M = (sp.diags(keep) @ L + sp.csr_matrix(([1.0], ([pin], [pin])), shape=(N, N))).tocsc()
+    rhs = np.zeros(N)
+    rhs[pin] = 1.0
+    t0 = time.perf_counter()
+    info = dict(method=method, pin=pin, iterations=0)
+    count = [0]
+
+    def cb(_):
+        count[0] += 1
+
+    def direct():
+        try:
+            lu = spla.splu(M)
+        except RuntimeError:
+            lu = None  # factor singular (típicamente H≈0: sin difusión ni amortiguamiento)
+        if lu is None or not np.all(np.isfinite(lu.solve(rhs))):
+            raise ValueError("Operador de Fokker–Planck singular: ¿H≈0 en el atractor (V + V0 < 0)?")
+        return lambda b, x0: lu.solve(b)
+
+    solve = None
+    if method != "direct":
+        try:
+            ilu = spla.spilu(M, drop_tol=drop_tol, fill_factor=fill_factor)
+        except RuntimeError:
+            ilu = None
+        if ilu is not None:
+            prec = spla.LinearOperator(M.shape, ilu.solve)
+            restart = max(1, min(restart, maxiter))
+
+            def solve(b, x0):
+                if method == "gmres":
+                    x, flag = spla.gmres(M, b, x0=x0, rtol=tol, restart=restart, maxiter=-(-maxiter // restart),
+                                         M=prec, callback=cb, callback_type="pr_norm")
+                else:
+                    x, flag = spla.bicgstab(M, b, x0=x0, rtol=tol, maxiter=maxiter, M=prec, callback=cb)
+                return x if flag == 0 else None
+        p = solve(rhs, None) if solve is not None else None
+        info["converged"] = p is not None
+        if p is None:
+            # sin convergencia: solución directa (el sistema es pequeño en 2D/3D)
+            info["fallback"] = "direct"
+            solve = None
+    if solve is None:
+        solve = direct()
+        p = solve(rhs, None)
+
+    n_dc = 0
+    if correction is not None:
+        for n_dc in range(1, dc_maxiter + 1):
+            p_new = solve(rhs - keep*correction(p), p)
+            if p_new is None:  # el iterativo dejó de converger: LU para el resto
+                info["fallback"] = "direct"
+                solve = direct()
+                p_new = solve(rhs - keep*correction(p), p)
+            change = np.abs(p_new - p).max() / np.abs(p_new).max()
+            p = p_new
+            if change < dc_tol:
+                break
+        info["residual"] = float(np.linalg.norm(M @ p - rhs + keep*correction(p)))
+    else:
+        info["residual"] = float(np.linalg.norm(M @ p - rhs))
+    info.update(iterations=count[0], dc_iterations=n_dc, seconds=time.perf_counter() - t0)
+    return np.clip(p, 0.0, None), info
+
+
+def _potential(p):
+    m2, lam = p.m_phi**2, p.lambda_phi
+
+    def V(phi):
+        return -0.5*m2*phi**2 + 0.25*lam*phi**4
+
+    def dV(phi):
+        return -m2*phi + lam*phi**3
+    return V, dV
+
+
+def _w_of(kin, V):
+    """w = p/ρ con el mismo suelo para ρ que Fig. 4."""
+    rho = kin + V
+    return (kin - V) / np.where(rho > 1e-16, rho, 1e-16)
+
+
+def default_bounds(params, model):
+    """Caja heurística: φ hasta 2× el mínimo del potencial, ζ hasta ~8σ del OU estacionario."""
+    p = as_params(params)
+    V, _ = _potential(p)
+    phi_min = np.sqrt(p.m_phi**2/p.lambda_phi) if p.lambda_phi > 0 else 1.0
+    phi_lim = 2.0*max(phi_min, 0.5)
+    dV_barrier = abs(V(0.0) - V(phi_min))
+    H_ref = np.sqrt(max(p.V0 + dV_barrier, 1e-4))
+    D_ref = p.alpha_phi*3.0*H_ref*H_ref/(2.0*np.pi)/p.tau_phi**2
+    zeta_lim = max(8.0*np.sqrt(D_ref*p.tau_phi), 1e-3)
+    b = dict(phi=(-phi_lim, phi_lim), zeta=(-zeta_lim, zeta_lim))
+    if model == "slice":
+        pi_lim = 2.0*np.sqrt(2.0*(dV_barrier + max(p.V0, 0.0)) + 1e-6)
+        b["dphi"] = (-pi_lim, pi_lim)
+    return b
+
+
+def solve_stationary(params=None, model="single", shape=None, bounds=None, method="auto", tol=1e-10,
+                     maxiter=1000, flux="vanleer"):
+    """
+    Densidad estacionaria del modelo reducido y momentos de w.
+    method="auto": LU directa hasta DIRECT_MAX_CELLS celdas, GMRES+ILU por encima.
+    flux: 'vanleer' (segundo orden limitado en φ, dφ) | 'upwind' (primer orden).
+    Devuelve dict con axes, centers, density (normalizada a ∫p = 1), marginales 1D,
+    mean_w, sigma_w (= Var(w)), H_min y la info del solver.
+    """
+    p = as_params(params)
+    names = AXES[model]
+    shape = tuple(shape or ((256, 128) if model == "single" else (32, 32, 24)))
+    box = dict(default_bounds(p, model), **(bounds or {}))
+    centers = []
+    for name, n in zip(names, shape):
+        lo, hi = box[name]
+        h = (hi - lo)/n
+        centers.append(lo + h*(np.arange(n) + 0.5))
+    V, dV = _potential(p)
+    tau, alpha = p.tau_phi, p.alpha_phi
+
+    def hubble(phi, dphi=0.0):
+        return np.sqrt(np.maximum(0.5*dphi**2 + V(phi) + p.V0, 1e-16))
+
+    def D_zeta(H):
+        return alpha*3.0*H*(H/(2.0*np.pi))/tau**2
+
+    if model == "single":
+        def drift(X):
+            phi, zeta = X
+            H = hubble(phi)
+            return [(zeta - dV(phi))/(3.0*H), -zeta/tau]
+
+        def diffusion(X):
+            return [None, D_zeta(hubble(X[0]))]
+    else:
+        def drift(X):
+            phi, dphi, zeta = X
+            H = hubble(phi, dphi)
+            return [dphi, -3.0*H*dphi - dV(phi) + zeta, -zeta/tau]
+
+        def diffusion(X):
+            return [None, None, D_zeta(hubble(X[0], X[1]))]
+
+    L = fp_operator(centers, drift, diffusion)
+    X = np.meshgrid(*centers, indexing="ij")
+    # celda de anclaje: la más cercana al mínimo φ* > 0 del potencial con el resto de ejes en 0
+    phi_star = np.sqrt(p.m_phi**2/p.lambda_phi) if p.lambda_phi > 0 else 0.0
+    target = [phi_star] + [0.0]*(len(names) - 1)
+    pin = int(np.ravel_multi_index([np.argmin(np.abs(c - t)) for c, t in zip(centers, target)], shape))
+    if method == "auto":
+        method = "direct" if np.prod(shape) <= DIRECT_MAX_CELLS else "gmres"
+    skw = dict(method=method, tol=tol, maxiter=maxiter,
+               correction=advective_correction(centers, drift, diffusion) if flux == "vanleer" else None)
+    dens, info = stationary_density(L, pin=pin, **skw)
+    # si la celda de anclaje quedó con poca masa, se repite anclando en el máximo
+    if dens.size and dens[pin] < 1e-6*dens.max():
+        dens, info = stationary_density(L, pin=int(np.argmax(dens)), **skw)
+    vol = np.prod([c[1] - c[0] for c in centers])
+    dens = dens.reshape(shape)
+    dens /= dens.sum()*vol
+
+    if model == "single":
+        H = hubble(X[0])
+        kin = 0.5*((X[1] - dV(X[0]))/(3.0*H))**2
+        H_min = float(hubble(centers[0]).min())
+    else:
+        H = hubble(X[0], X[1])
+        kin = 0.5*X[1]**2
+        H_min = float(H.min())
+    w = _w_of(kin, V(X[0]))
+    mean_w = float(np.sum(w*dens)*vol)
+    sigma_w = float(np.sum((w - mean_w)**2*dens)*vol)
+    marginals = {}
+    for d, name in enumerate(names):
+        other = tuple(k for k in range(len(names)) if k != d)
+        marginals[name] = dens.sum(axis=other)*vol/(centers[d][1] - centers[d][0])
+    info.update(n_cells=int(np.prod(shape)), nnz=int(L.nnz), flux=flux)
+    return dict(model=model, axes=names, centers=centers, density=dens, marginals=marginals,
+                mean_w=mean_w, sigma_w=sigma_w, H_min=H_min, info=info)
+
+
+def _parse_kv(items, cast=float):
+    out = {}
+    for s in items or []:
+        k, _, v = s.partition("=")
+        out[k.strip()] = cast(v)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Densidad estacionaria de Fokker–Planck (φ, ζ) o (φ, dφ, ζ) y momentos de w.")
+    ap.add_argument("--model", choices=sorted(AXES), default="single")
+    ap.add_argument("--grid", type=str, default=None, help="Celdas por eje, p.ej. 256,128 o 32,32,24.")
+    ap.add_argument("--bounds", action="append", default=[], help="eje=lo:hi (phi, dphi, zeta; repetible).")
+    ap.add_argument("--param-json", type=str, default=None, help="JSON de parámetros base (por defecto, los de las figuras).")
+    ap.add_argument("--set", action="append", default=[], help="Parámetro=valor (repetible), p.ej. --set V0=0.6.")
+    ap.add_argument("--solver", choices=["auto", "gmres", "bicgstab", "direct"], default="auto",
+                    help=f"auto: LU directa hasta {DIRECT_MAX_CELLS} celdas, GMRES+ILU por encima.")
+    ap.add_argument("--flux", choices=["vanleer", "upwind"], default="vanleer",
+                    help="Flujo advectivo en φ, dφ: segundo orden limitado o upwind de primer orden.")
+    ap.add_argument("--tol", type=float, default=1e-10)
+    ap.add_argument("--maxiter", type=int, default=1000, help="Iteraciones internas máximas antes del directo.")
+    ap.add_argument("--outdir", type=str, default="assets")
+    args = ap.parse_args()
+
+    base = load_model_params(args.param_json) if args.param_json else as_params(None)
+    params = base.replace(**_parse_kv(args.set))
+    shape = tuple(int(s) for s in args.grid.split(",")) if args.grid else None
+    bounds = {k: tuple(float(x) for x in v.split(":")) for k, v in _parse_kv(args.bounds, str).items()}
+    try:
+        res = solve_stationary(params, model=args.model, shape=shape, bounds=bounds, method=args.solver,
+                               tol=args.tol, maxiter=args.maxiter, flux=args.flux)
+    except ValueError as e:
+        raise SystemExit(f"[!] {e}")
+    os.makedirs(args.outdir, exist_ok=True)
+
+    info = res["info"]
+    txt_path = os.path.join(args.outdir, f"fp-{args.model}.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write(f"Fokker–Planck estacionario ({args.model}: {', '.join(res['axes'])}), "
+                f"malla {res['density'].shape}, {info['n_cells']} celdas, nnz={info['nnz']}\n")
+        f.write(f"solver={info['method']}{' → ' + info['fallback'] if 'fallback' in info else ''} | "
+                f"iteraciones={info['iterations']} | flujo={info['flux']} (correcciones={info['dc_iterations']}) | "
+                f"residuo={info['residual']:.3g} | {info['seconds']:.2f} s\n")
+        f.write(f"<w>={res['mean_w']:.6g} | σ_w=Var(w)={res['sigma_w']:.6g} | H_min={res['H_min']:.3g}\n")
+        if res["H_min"] < 1e-6:
+            f.write("AVISO: H≈0 en parte de la malla (V + V0 < 0); la densidad estacionaria no está bien definida.\n")
+        for name, c in zip(res["axes"], res["centers"]):
+            m = res["marginals"][name]
+            mu = float(np.sum(c*m)/np.sum(m))
+            f.write(f"  {name:<5} [{c[0]:.4g}, {c[-1]:.4g}] | media={mu:.4g} | "
+                    f"std={np.sqrt(np.sum((c - mu)**2*m)/np.sum(m)):.4g}\n")
+
+    # Figura: densidad conjunta (φ, ζ) y marginal de φ
+    dens = res["density"]
+    if args.model == "slice":
+        dens = dens.sum(axis=1)*(res["centers"][1][1] - res["centers"][1][0])
+    phi, zeta = res["centers"][0], res["centers"][-1]
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
+    im = ax1.pcolormesh(phi, zeta, dens.T, shading="auto")
+    fig.colorbar(im, ax=ax1, label="p(φ, ζ)")
+    ax1.set_xlabel("φ"); ax1.set_ylabel("ζ")
+    ax2.plot(phi, res["marginals"]["phi"], linewidth=1.6)
+    ax2.set_xlabel("φ"); ax2.set_ylabel("p(φ)")
+    ax2.grid(True, alpha=0.3)
+    fig.suptitle(f"Densidad estacionaria ({args.model}): <w>={res['mean_w']:.4g}, σ_w={res['sigma_w']:.3g}")
+    fig.tight_layout()
+    png_path = os.path.join(args.outdir, f"fp-{args.model}.png")
+    fig.savefig(png_path, dpi=300)
+    plt.close(fig)
+
+    print(f"[OK] Guardado: {png_path}, {txt_path}")
+
+
+if __name__ == "__main__":
+    main()
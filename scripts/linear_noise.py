@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Aproximación de ruido lineal: PSD analítica y Q(τ) del modelo de dos campos
+alrededor de su atractor (contraste para las Figs. 2 y 4, sin simular).
+
+Cerca del mínimo (φ*, χ*) de V, con π = ζ = 0 y H* = sqrt(V*), el sistema
+linealizado es un oscilador 2D amortiguado forzado por dos OU:
+    δx'' + 3H* δx' + K δx = ζ,     K = Hessiano de V en (φ*, χ*)
+    dζ_i = −ζ_i/τ_i dt + sqrt(2Γ_i T)/τ_i dW_i,   Γ_i = 3α_i H*,  T = H*/(2π)
+(la variación de H no entra a primer orden porque multiplica π* = 0 y ∂V = 0).
+El espectro es racional:
+    S_x(ω) = Σ_i |M_xi(ω)|² · (2Γ_i T/τ_i²) / (ω² + τ_i⁻²),   M = (K − ω² + iω·3H*)⁻¹
+y se devuelve en una cara por unidad de frecuencia (∫₀^∞ P(f) df = Var(x)).
+f0, Δf y Q se miden sobre la PSD completa con el mismo estimador que los
+espectros simulados (peak_and_width_batch), vectorizado sobre miles de τ a la
+vez; evaluada en la rejilla de frecuencias de la simulación es directamente
+comparable con Q_sim. Aparte se da la resonancia sola (f0_res, Δf_res, Q_res,
+con el lóbulo de baja frecuencia del OU aplanado): NaN si ese lóbulo (τ
+grande) no deja un máximo interior con su media altura.
+Si H* ≈ 0 (V* ≤ 0, como con los parámetros por defecto: V0 < m⁴/4λ) no hay
+amortiguamiento ni ruido en el atractor y los resultados son NaN.
+
+Uso:
+    python scripts/linear_noise.py --set V0=0.6
+    python scripts/linear_noise.py --set V0=0.6 --tau-min 0.05 --tau-max 20 --n-tau 5000
+"""
+import argparse
+import csv
+import os
+import sys
+from functools import partial
+
+import numpy as np
+from scipy.optimize import minimize
+import matplotlib.pyplot as plt
+
+from spectral_batch import peak_and_width_batch, lorentz_fit_batch
+
+# utils/ (parámetros tipados) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import as_params, load_model_params  # noqa: E402
+
+H_MIN = 1e-6
+
+
+def _V(x, p):
+    phi, chi = x
+    return (-0.5*p.m_phi**2*phi**2 + 0.25*p.lambda_phi*phi**4
+            + 0.5*p.m_chi**2*chi**2 + 0.25*p.lambda_chi*chi**4
+            + 0.5*p.g**2*phi**2*chi**2 + p.V0)
+
+
+def _grad(x, p):
+    phi, chi = x
+    return np.array([-p.m_phi**2*phi + p.lambda_phi*phi**3 + p.g**2*phi*chi**2,
+                     p.m_chi**2*chi + p.lambda_chi*chi**3 + p.g**2*chi*phi**2])
+
+
+def _hessian(phi, chi, p):
+    g2 = p.g**2
+    return np.array([[-p.m_phi**2 + 3*p.lambda_phi*phi**2 + g2*chi**2, 2*g2*phi*chi],
+                     [2*g2*phi*chi, p.m_chi**2 + 3*p.lambda_chi*chi**2 + g2*phi**2]])
+
+
+def find_attractor(params=None):
+    """
+    Mínimo de V alcanzado desde (phi0, chi0) (descenso con gradiente analítico).
+    Devuelve dict(phi, chi, V, H, hessian, stable); H = NaN si V* ≤ 0 (H* ≈ 0).
+    """
+    p = as_params(params)
+    res = minimize(_V, np.array([p.phi0, p.chi0]), args=(p,), jac=_grad, method="BFGS",
+                   options=dict(gtol=1e-12))
+    phi, chi = res.x
+    K = _hessian(phi, chi, p)
+    Vs = float(_V(res.x, p))
+    H = np.sqrt(Vs) if Vs > H_MIN**2 else np.nan
+    return dict(phi=float(phi), chi=float(chi), V=Vs, H=float(H), hessian=K,
+                stable=bool(np.all(np.linalg.eigvalsh(K) > 0)))
+
+
+def natural_frequencies(params=None, attractor=None):
+    """Frecuencias propias sqrt(eig K)/(2π) del oscilador linealizado (sin amortiguar)."""
+    att = attractor or find_attractor(params)
+    return np.sqrt(np.clip(np.linalg.eigvalsh(att["hessian"]), 0.0, None)) / (2.0*np.pi)
+
+
+def linear_psd(freqs, tau, params=None, tau_chi=None, attractor=None):
+    """
+    PSD analítica de una cara (R, F) de φ y χ para cada τ (R,) (τ_φ = τ_χ = τ salvo tau_chi).
+    Devuelve (P_phi, P_chi); NaN si H* ≈ 0.
+    """
+    p = as_params(params)
+    att = attractor or find_attractor(p)
+    tau_phi = np.atleast_1d(np.asarray(tau, float))[:, None]
+    tau_chi = tau_phi if tau_chi is None else np.atleast_1d(np.asarray(tau_chi, float))[:, None]
+    w = 2.0*np.pi*np.asarray(freqs, float)[None, :]
+    H = att["H"]
+    if not np.isfinite(H):
+        nan = np.full((tau_phi.shape[0], w.shape[1]), np.nan)
+        return nan, nan.copy()
+    T = H/(2.0*np.pi)
+    (a, b), (c, d) = att["hessian"]
+    # M = (K − ω² + iω·3H)⁻¹, inversa 2×2 explícita
+    damp = -w**2 + 1j*w*3.0*H
+    det = (a + damp)*(d + damp) - b*c
+    M = ((d + damp)/det, -b/det, -c/det, (a + damp)/det)
+    # espectro (dos caras, en ω) del forzamiento OU de cada campo
+    S_phi = (2.0*p.alpha_phi*3.0*H*T/tau_phi**2) / (w**2 + tau_phi**-2)
+    S_chi = (2.0*p.alpha_chi*3.0*H*T/tau_chi**2) / (w**2 + tau_chi**-2)
+    P_phi = 2.0*(np.abs(M[0])**2*S_phi + np.abs(M[1])**2*S_chi)
+    P_chi = 2.0*(np.abs(M[2])**2*S_phi + np.abs(M[3])**2*S_chi)
+    return P_phi, P_chi
+
+
+def default_freqs(params=None, attractor=None, n_freq=8192):
+    """Malla uniforme hasta ~3× la frecuencia propia mayor (más el ancho del amortiguamiento)."""
+    att = attractor or find_attractor(params)
+    H = att["H"] if np.isfinite(att["H"]) else 0.0
+    f_max = 3.0*max(natural_frequencies(attractor=att).max(), 1e-3) + 5.0*3.0*H/(2.0*np.pi)
+    return np.linspace(0.0, f_max, n_freq)
+
+
+def linear_q(tau, params=None, tau_chi=None, metric_source="avg", peak_fit="fwhm", freqs=None, n_freq=8192):
+    """
+    f0, Δf, Q = f0/Δf del espectro lineal para cada τ (como Fig. 4: φ, χ o promedio
+    de espectros normalizados), medidos sobre la PSD completa; f0_res, delf_res y
+    Q_res, solo sobre la resonancia (NaN en los casos sobreamortiguados).
+    Devuelve dict con arrays (R,) y freqs, psd (R, F).
+    """
+    p = as_params(params)
+    att = find_attractor(p)
+    freqs = default_freqs(attractor=att, n_freq=n_freq) if freqs is None else np.asarray(freqs, float)
+    P_phi, P_chi = linear_psd(freqs, tau, p, tau_chi=tau_chi, attractor=att)
+    R = P_phi.shape[0]
+    if not np.isfinite(att["H"]):
+        nan = np.full(R, np.nan)
+        return dict(tau=np.atleast_1d(tau), f0=nan, delf=nan.copy(), Q=nan.copy(), f0_res=nan.copy(),
+                    delf_res=nan.copy(), Q_res=nan.copy(), freqs=freqs, psd=P_phi, attractor=att)
+
+    def norm(P):
+        return P / P.max(axis=1, keepdims=True)
+    psd = {"phi": norm(P_phi), "chi": norm(P_chi)}.get(metric_source, 0.5*(norm(P_phi) + norm(P_chi)))
+    # PSD exacta: un lóbulo que llega a f=0 tiene su cruce izquierdo reflejado en −fR
+    estimator = lorentz_fit_batch if peak_fit == "lorentz" else partial(peak_and_width_batch, reflect_dc=True)
+    f0, delf, Q = estimator(freqs, psd)
+    # solo la resonancia: se aplana el lóbulo de baja frecuencia del OU hasta su primer mínimo local
+    rising = np.diff(psd, axis=1) > 0
+    i_min = np.where(rising.any(axis=1), np.argmax(rising, axis=1), psd.shape[1] - 1)
+    cols = np.arange(psd.shape[1])[None, :]
+    floor = psd[np.arange(R), i_min][:, None]
+    masked = np.where(cols < i_min[:, None], floor, psd)
+    f0_res, delf_res, Q_res = estimator(freqs, masked)
+    # sin máximo interior, o con el lóbulo por encima de la media altura: no hay Q de resonancia
+    bad = (i_min >= psd.shape[1] - 1) | (floor[:, 0] >= 0.5*masked.max(axis=1))
+    f0_res, delf_res, Q_res = (np.where(bad, np.nan, x) for x in (f0_res, delf_res, Q_res))
+    return dict(tau=np.atleast_1d(tau), f0=f0, delf=delf, Q=Q, f0_res=f0_res, delf_res=delf_res,
+                Q_res=Q_res, freqs=freqs, psd=psd, attractor=att)
+
+
+def _parse_kv(items):
+    out = {}
+    for s in items or []:
+        k, _, v = s.partition("=")
+        out[k.strip()] = float(v)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Q(τ) y PSD analíticas (ruido lineal alrededor del atractor).")
+    ap.add_argument("--tau-min", type=float, default=0.05)
+    ap.add_argument("--tau-max", type=float, default=10.0)
+    ap.add_argument("--n-tau", type=int, default=2000, help="Valores de τ (malla logarítmica).")
+    ap.add_argument("--n-freq", type=int, default=8192)
+    ap.add_argument("--metric-source", choices=["phi", "chi", "avg"], default="avg")
+    ap.add_argument("--peak-fit", choices=["fwhm", "lorentz"], default="fwhm")
+    ap.add_argument("--param-json", type=str, default=None, help="JSON de parámetros base (por defecto, los de las figuras).")
+    ap.add_argument("--set", action="append", default=[], help="Parámetro=valor (repetible), p.ej. --set V0=0.6.")
+    ap.add_argument("--outdir", type=str, default="assets")
+    args = ap.parse_args()
+
+    base = load_model_params(args.param_json) if args.param_json else as_params(None)
+    params = base.replace(**_parse_kv(args.set))
+    tau = np.geomspace(args.tau_min, args.tau_max, args.n_tau)
+    res = linear_q(tau, params, metric_source=args.metric_source, peak_fit=args.peak_fit, n_freq=args.n_freq)
+    att = res["attractor"]
+    os.makedirs(args.outdir, exist_ok=True)
+
+    csv_path = os.path.join(args.outdir, "fig4-linear.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["tau", "Q", "f0", "delf", "Q_res", "f0_res", "delf_res"])
+        for row in zip(tau, res["Q"], res["f0"], res["delf"], res["Q_res"], res["f0_res"], res["delf_res"]):
+            w.writerow(row)
+
+    txt_path = os.path.join(args.outdir, "fig4-linear.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write(f"Atractor: φ*={att['phi']:.6g}, χ*={att['chi']:.6g}, V*={att['V']:.6g}, H*={att['H']:.6g}, "
+                f"estable={att['stable']}\n")
+        f.write("Frecuencias propias: " + ", ".join(f"{x:.6g}" for x in natural_frequencies(attractor=att)) + "\n")
+        if not np.isfinite(att["H"]):
+            f.write("AVISO: H*≈0 (V* ≤ 0): sin amortiguamiento ni ruido en el atractor; Q(τ) = NaN.\n")
+        else:
+            i = int(np.nanargmax(res["Q"]))
+            f.write(f"{len(tau)} valores de τ en [{tau[0]:.4g}, {tau[-1]:.4g}] | "
+                    f"Q máx={res['Q'][i]:.4g} en τ={tau[i]:.4g} (f0={res['f0'][i]:.4g}, Δf={res['delf'][i]:.4g})\n")
+            res_ok = np.isfinite(res["Q_res"])
+            f.write(f"Resonancia aislada (Q_res) en {int(res_ok.sum())}/{len(tau)} valores de τ"
+                    + (f" (τ ≤ {tau[res_ok].max():.4g})" if res_ok.any() else "") + "\n")
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
+    ax1.semilogx(tau, res["Q"], linewidth=1.6, label="PSD completa")
+    ax1.semilogx(tau, res["Q_res"], "--", linewidth=1.2, label="solo resonancia")
+    ax1.legend()
+    ax1.set_xlabel(r"$\tau$"); ax1.set_ylabel("Q (lineal)")
+    ax1.grid(True, which="both", alpha=0.3)
+    for t in np.geomspace(tau[0], tau[-1], 4):
+        j = int(np.argmin(np.abs(tau - t)))
+        ax2.plot(res["freqs"], res["psd"][j], linewidth=1.2, label=rf"$\tau$={tau[j]:.3g}")
+    ax2.set_xlabel("f"); ax2.set_ylabel("PSD (normalizada)")
+    ax2.grid(True, alpha=0.3); ax2.legend()
+    fig.suptitle(f"Ruido lineal alrededor del atractor (H*={att['H']:.3g})")
+    fig.tight_layout()
+    png_path = os.path.join(args.outdir, "fig4-linear.png")
+    fig.savefig(png_path, dpi=300)
+    plt.close(fig)
+
+    print(f"[OK] Guardado: {png_path}, {csv_path}, {txt_path}")
+
+
+if __name__ == "__main__":
+    main()
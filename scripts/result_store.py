@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén append-only (JSON-lines) de resultados por tarea (τ, r) del barrido de Fig. 4.
+
+Cada línea es un registro independiente:
+    {"config": <hash>, "tau": τ, "r": r, "Q": ..., "f0": ..., "delf": ...,
+     "sigma_w": ..., "pooled": {Welford}, "seed": ..., "time": ...}
+que se escribe (flush + fsync) en cuanto termina la tarea. Al reanudar, las
+tareas ya presentes con el mismo hash de configuración (pasos, dt, parámetros,
+semillas, estimador...) se saltan. Una última línea truncada por una
+interrupción se ignora al leer.
+
+Las tablas/figuras se reconstruyen desde el almacén en cualquier momento:
+    python scripts/gen_fig4_barrido_tau.py --store runs/fig4.jsonl --rebuild
+"""
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from streaming_stats import Welford
+
+
+def config_hash(config):
+    """Hash estable (sha1 corto) de una configuración JSON-serializable."""
+    raw = json.dumps(config, sort_keys=True, default=float, separators=(",", ":"))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _tau_key(tau):
+    return round(float(tau), 12)
+
+
+class ResultStore:
+    """
+        store = ResultStore("runs/fig4.jsonl")
+        if not store.has(cfg, tau, r):
+            store.append(cfg, tau, r, Q=..., sigma_w=..., pooled=acc)
+        pt = store.point(cfg, tau)          # arrays por realización (como sweep_point)
+    """
+
+    FIELDS = ("Q", "f0", "delf", "sigma_w")
+
+    def __init__(self, path):
+        self.path = path
+        self._rows = {}  # (config, tau, r) -> registro
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # línea truncada (interrupción durante la escritura)
+                    self._rows[(rec["config"], _tau_key(rec["tau"]), int(rec["r"]))] = rec
+        elif os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def has(self, config, tau, r):
+        return (config, _tau_key(tau), int(r)) in self._rows
+
+    def append(self, config, tau, r, pooled=None, **values):
+        rec = dict(config=config, tau=float(tau), r=int(r), time=time.time(),
+                   **{k: (float(v) if isinstance(v, (float, np.floating)) else v) for k, v in values.items()})
+        if pooled is not None:
+            rec["pooled"] = pooled.to_dict()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._rows[(config, _tau_key(tau), int(r))] = rec
+        return rec
+
+    def taus(self, config):
+        return sorted({t for c, t, _ in self._rows if c == config})
+
+    def configs(self):
+        """{hash: nº de tareas} presentes en el almacén."""
+        out = {}
+        for c, _, _ in self._rows:
+            out[c] = out.get(c, 0) + 1
+        return out
+
+    def point(self, config, tau, realizations=None):
+        """Realizaciones guardadas de un τ (todas o las indicadas) en el formato de sweep_point."""
+        t = _tau_key(tau)
+        rs = sorted(r for c, tt, r in self._rows if c == config and tt == t) if realizations is None \
+            else [int(r) for r in realizations]
+        recs = [self._rows[(config, t, r)] for r in rs]
+        pt = {k: np.array([rec.get(k, np.nan) for rec in recs], float) for k in self.FIELDS}
+        pt["r"] = np.array(rs, int)
+        pooled = Welford()
+        for rec in recs:
+            if "pooled" in rec:
+                pooled.merge(Welford.from_dict(rec["pooled"]))
+        pt["pooled"] = pooled
+        return pt
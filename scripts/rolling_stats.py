@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Estadísticas móviles en O(N) (media, varianza, mín/máx y cuantiles aproximados).
+
+- Media y varianza: sumas acumuladas (desplazadas por un valor de referencia
+  para no perder precisión), coste O(N) independiente de la ventana M.
+- Mín/máx: algoritmo de van Herk / Gil–Werman por bloques de M muestras
+  (acumulados prefijo/sufijo con np.maximum.accumulate), también O(N).
+- Cuantiles: exactos en puntos ancla cada `stride` muestras e interpolados
+  linealmente entre anclas (coste ~ N·log M para stride ~ M/16).
+
+La ventana está centrada igual que np.convolve(x, ones(M)/M, mode="same"):
+la muestra i usa [i - (M-1) + (M-1)//2, i + (M-1)//2]. Con edge="zero" la media
+reproduce exactamente ese convolve (relleno con ceros en los bordes); con
+edge="shrink" se promedia solo sobre las muestras disponibles.
+
+RollingStats procesa la serie por trozos (simulación en streaming) con un
+búfer circular de las últimas M-1 muestras y devuelve las estadísticas de cada
+muestra en cuanto su ventana está completa; flush() cierra el borde final.
+Las funciones rolling_* son un push + flush sobre la serie entera.
+"""
+import numpy as np
+
+
+def _trailing_max(x, M, fn=np.fmax):
+    """Máximo (o mínimo con fn=np.fmin) de cada ventana final de M muestras: van Herk/Gil–Werman."""
+    n = x.size
+    if n < M:
+        return np.empty(0)
+    nb = -(-n // M)
+    pad = np.full(nb * M, np.nan)
+    pad[:n] = x
+    blocks = pad.reshape(nb, M)
+    pre = fn.accumulate(blocks, axis=1).ravel()[:n]
+    suf = fn.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()[:n]
+    e = np.arange(M - 1, n)
+    return fn(suf[e - M + 1], pre[e])
+
+
+class RollingStats:
+    """
+    Estadísticas sobre una ventana centrada de M muestras, alimentada por trozos.
+
+        rs = RollingStats(2000)
+        for chunk in stream:
+            out = rs.push(chunk)      # dict de arrays para las muestras ya resueltas
+        out = rs.flush()              # últimas (M-1)//2 muestras
+
+    stats ⊂ {"mean", "var", "min", "max"}; quantiles = (q1, q2, ...) añade
+    cuantiles aproximados (anclas cada `stride` muestras).
+    """
+
+    def __init__(self, M, stats=("mean",), edge="zero", quantiles=(), stride=None):
+        self.M = max(1, int(M))
+        self.right = (self.M - 1) // 2
+        self.left = self.M - 1 - self.right
+        self.stats = tuple(stats)
+        self.edge = edge
+        self.quantiles = tuple(quantiles)
+        self.stride = max(1, int(stride or self.M // 16 or 1))
+        self.ref = None
+        # Relleno inicial (NaN = fuera de la serie): la primera salida ya ve su ventana completa
+        self._buf = np.full(self.left, np.nan)
+        self._n_out = 0
+        self._q_prev = None  # último ancla de cuantiles (índice, valores) para interpolar
+
+    def push(self, chunk):
+        chunk = np.asarray(chunk, dtype=float).ravel()
+        if self.ref is None and chunk.size:
+            finite = chunk[np.isfinite(chunk)]
+            self.ref = float(finite[0]) if finite.size else 0.0
+        return self._process(np.concatenate([self._buf, chunk]))
+
+    def flush(self):
+        return self._process(np.concatenate([self._buf, np.full(self.right, np.nan)]), final=True)
+
+    def _process(self, ext, final=False):
+        M = self.M
+        n_win = max(ext.size - M + 1, 0)
+        out = {}
+        if n_win:
+            ref = self.ref or 0.0
+            valid = ~np.isnan(ext)
+            y = np.where(valid, ext - ref, 0.0)
+            zero = np.zeros(1)
+            cs = np.concatenate([zero, np.cumsum(y)])
+            cnt = np.concatenate([zero, np.cumsum(valid)])
+            s = cs[M:] - cs[:-M]
+            c = cnt[M:] - cnt[:-M]
+            c_safe = np.maximum(c, 1)
+            if "mean" in self.stats:
+                if self.edge == "zero":
+                    out["mean"] = (s + ref * c) / M
+                else:
+                    out["mean"] = s / c_safe + ref
+            if "var" in self.stats:
+                cs2 = np.concatenate([zero, np.cumsum(y * y)])
+                s2 = cs2[M:] - cs2[:-M]
+                out["var"] = np.maximum(s2 / c_safe - (s / c_safe)**2, 0.0)
+            if "max" in self.stats:
+                out["max"] = _trailing_max(ext, M, np.fmax)
+            if "min" in self.stats:
+                out["min"] = _trailing_max(ext, M, np.fmin)
+            if self.quantiles:
+                out["quantiles"] = self._quantiles(ext, n_win, final)
+        # Conserva las últimas M-1 muestras (búfer circular) para el próximo trozo
+        self._buf = ext[max(0, ext.size - (M - 1)):] if M > 1 else ext[:0]
+        self._n_out += n_win
+        return out
+
+    def _quantiles(self, ext, n_win, final):
+        """Cuantiles exactos en las anclas (índice global múltiplo de stride) e interpolación lineal."""
+        M, st = self.M, self.stride
+        i0 = self._n_out
+        first = -(-i0 // st) * st
+        anchors = np.arange(first, i0 + n_win, st)
+        if final and (anchors.size == 0 or anchors[-1] != i0 + n_win - 1):
+            anchors = np.append(anchors, i0 + n_win - 1)
+        win = np.lib.stride_tricks.sliding_window_view(ext, M)[anchors - i0]
+        qv = np.nanquantile(win, self.quantiles, axis=1).T  # (n_anchor, n_q)
+        xs, ys = anchors, qv
+        if self._q_prev is not None:
+            xs = np.concatenate([[self._q_prev[0]], xs])
+            ys = np.vstack([self._q_prev[1][None, :], ys])
+        if anchors.size:
+            self._q_prev = (anchors[-1], qv[-1])
+        idx = np.arange(i0, i0 + n_win)
+        if xs.size == 0:
+            return np.full((n_win, len(self.quantiles)), np.nan)
+        # Las muestras posteriores al último ancla del trozo se completan con su valor
+        # (el siguiente trozo no las revisita: aproximación de orden stride/M)
+        return np.column_stack([np.interp(idx, xs, ys[:, k]) for k in range(ys.shape[1])])
+
+
+def _run(x, M, **kw):
+    rs = RollingStats(M, **kw)
+    a, b = rs.push(x), rs.flush()
+    return {k: np.concatenate([a[k], b[k]]) if k in b else a[k] for k in a}
+
+
+def rolling_mean(x, M, edge="zero"):
+    """Media móvil centrada; con edge="zero" es idéntica a np.convolve(x, ones(M)/M, "same")."""
+    x = np.asarray(x, dtype=float)
+    if M <= 1:
+        return x
+    if M > x.size:  # convolve "same" devuelve entonces max(M, N) muestras
+        return np.convolve(x, np.ones(M) / M, mode="same")
+    return _run(x, M, stats=("mean",), edge=edge)["mean"]
+
+
+def rolling_var(x, M):
+    """Varianza móvil (poblacional) sobre las muestras disponibles de la ventana centrada."""
+    return _run(np.asarray(x, dtype=float), M, stats=("var",))["var"]
+
+
+def rolling_minmax(x, M):
+    out = _run(np.asarray(x, dtype=float), M, stats=("min", "max"))
+    return out["min"], out["max"]
+
+
+def rolling_quantile(x, M, q, stride=None):
+    """Cuantiles móviles aproximados: q escalar -> (N,), q secuencia -> (N, len(q))."""
+    qs = np.atleast_1d(q)
+    out = _run(np.asarray(x, dtype=float), M, stats=(), quantiles=tuple(qs), stride=stride)["quantiles"]
+    return out[:, 0] if np.ndim(q) == 0 else out
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Análisis de sensibilidad global (índices de Sobol) de Q y σ_w frente a los
+parámetros del modelo de dos campos (φ/χ), con diseño de Saltelli sobre una
+secuencia de Sobol (scipy.stats.qmc) y el simulador por lotes de batch_sim.
+
+Diseño: una secuencia Sobol de dimensión 2k da las matrices A y B (N×k); para
+cada parámetro i, AB_i es A con la columna i tomada de B. Son N(k+2)
+simulaciones, evaluadas en paralelo por bloques.
+
+Estimadores (Saltelli et al. 2010; Jansen 1999), con V = Var[f(A) ∪ f(B)]:
+    S1_i = mean( f(B) · (f(AB_i) − f(A)) ) / V
+    ST_i = mean( (f(A) − f(AB_i))² ) / (2V)
+Los errores son la desviación típica bootstrap sobre las filas del diseño.
+Por defecto todas las simulaciones comparten la realización del ruido
+(--noise common), de modo que f(A) − f(AB_i) refleja solo el cambio del parámetro i.
+σ_w abarca órdenes de magnitud, así que se analiza log10 σ_w.
+
+Salidas:
+- assets/sensitivity-sobol.csv  (param, lo, hi, S1/ST ± error para Q y log10 σ_w)
+- assets/sensitivity-sobol.txt
+- assets/sensitivity-sobol.png
+
+Uso:
+    python scripts/sobol_sensitivity.py --n 64 --workers 4
+    python scripts/sobol_sensitivity.py --params g,tau_phi,tau_chi,alpha_phi --rel-width 0.3
+    python scripts/sobol_sensitivity.py --bounds tau_phi=0.5:5 --bounds tau_chi=0.5:5
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.stats import qmc
+import matplotlib.pyplot as plt
+
+from batch_sim import evaluate
+
+# utils/ (parámetros tipados) vive en la raíz del repo
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.parameters import MODEL_FIELDS, ParamBatch, load_model_params, as_params  # noqa: E402
+
+OUTPUTS = ("Q", "log10_sigma_w")
+
+
+def parameter_box(base, names, rel_width=0.2, abs_width=0.1, bounds=None):
+    """Intervalos [lo, hi]: ±rel_width relativo al valor base (±abs_width si es 0), o los dados en bounds."""
+    base = as_params(base)
+    box = []
+    for k in names:
+        if bounds and k in bounds:
+            box.append(bounds[k])
+            continue
+        v = getattr(base, k)
+        lo, hi = (v*(1 - rel_width), v*(1 + rel_width)) if v != 0 else (-abs_width, abs_width)
+        box.append((min(lo, hi), max(lo, hi)))
+    return np.array(box, float)
+
+
+def saltelli_design(box, n, seed=0):
+    """Matrices A, B (n×k) y AB (k, n, k) a partir de una secuencia Sobol de dimensión 2k."""
+    k = len(box)
+    u = qmc.Sobol(d=2*k, scramble=True, seed=seed).random(n)
+    A = qmc.scale(u[:, :k], box[:, 0], box[:, 1])
+    B = qmc.scale(u[:, k:], box[:, 0], box[:, 1])
+    AB = np.repeat(A[None], k, axis=0)
+    for i in range(k):
+        AB[i, :, i] = B[:, i]
+    return A, B, AB
+
+
+def sobol_indices(fA, fB, fAB):
+    """S1 (Saltelli 2010) y ST (Jansen) de cada parámetro; filas con NaN se descartan por índice."""
+    k = fAB.shape[0]
+    S1, ST = np.full(k, np.nan), np.full(k, np.nan)
+    for i in range(k):
+        ok = np.isfinite(fA) & np.isfinite(fB) & np.isfinite(fAB[i])
+        if ok.sum() < 2:
+            continue
+        a, b, ab = fA[ok], fB[ok], fAB[i, ok]
+        V = np.var(np.concatenate([a, b]), ddof=1)
+        if V > 0:
+            S1[i] = np.mean(b * (ab - a)) / V
+            ST[i] = 0.5 * np.mean((a - ab)**2) / V
+    return S1, ST
+
+
+def bootstrap_indices(fA, fB, fAB, n_boot=500, seed=0):
+    """Desviación típica bootstrap (remuestreo de filas del diseño) de S1 y ST."""
+    rng = np.random.default_rng(seed)
+    n = fA.size
+    S1b, STb = [], []
+    for _ in range(n_boot):
+        idx = rng.integers(0, n, n)
+        s1, st = sobol_indices(fA[idx], fB[idx], fAB[:, idx])
+        S1b.append(s1); STb.append(st)
+    return np.nanstd(S1b, axis=0, ddof=1), np.nanstd(STb, axis=0, ddof=1)
+
+
+def run_sensitivity(names, box, n=64, base=None, seed=0, workers=1, block=64, n_boot=500,
+                    noise="common", **sim):
+    """Evalúa el diseño de Saltelli y devuelve {salida: (S1, S1_err, ST, ST_err)} y las evaluaciones."""
+    k = len(names)
+    A, B, AB = saltelli_design(box, n, seed=seed)
+    X = np.vstack([A, B, AB.reshape(k*n, k)])
+    batch = ParamBatch.broadcast(base, **{name: X[:, j] for j, name in enumerate(names)})
+    out = evaluate(batch, workers=workers, block=block, seed=seed, noise=noise, **sim)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Y = {"Q": out["Q"], "log10_sigma_w": np.log10(out["sigma_w"])}
+    res = {}
+    for key in OUTPUTS:
+        y = np.where(np.isfinite(Y[key]), Y[key], np.nan)
+        fA, fB, fAB = y[:n], y[n:2*n], y[2*n:].reshape(k, n)
+        S1, ST = sobol_indices(fA, fB, fAB)
+        S1e, STe = bootstrap_indices(fA, fB, fAB, n_boot=n_boot, seed=seed)
+        res[key] = (S1, S1e, ST, STe)
+    return res, dict(X=X, **Y)
+
+
+def _parse_bounds(items):
+    out = {}
+    for s in items or []:
+        name, _, rng = s.partition("=")
+        lo, _, hi = rng.partition(":")
+        out[name.strip()] = (float(lo), float(hi))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Índices de Sobol (S1, ST) de Q y σ_w sobre los parámetros φ/χ.")
+    ap.add_argument("--params", type=str, default=",".join(MODEL_FIELDS),
+                    help="Parámetros a variar (coma); el resto queda en su valor base.")
+    ap.add_argument("--param-json", type=str, default=None, help="JSON de parámetros base (por defecto, los de las figuras).")
+    ap.add_argument("--rel-width", type=float, default=0.2, help="Semiancho relativo del intervalo de cada parámetro.")
+    ap.add_argument("--abs-width", type=float, default=0.1, help="Semiancho absoluto para parámetros con valor base 0.")
+    ap.add_argument("--bounds", action="append", default=[], help="name=lo:hi (repetible; prevalece sobre --rel-width).")
+    ap.add_argument("--n", type=int, default=64, help="Filas del diseño (potencia de 2); total N·(k+2) simulaciones.")
+    ap.add_argument("--n-boot", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0, help="Semilla del diseño Sobol y del ruido.")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--block", type=int, default=64, help="Miembros por lote vectorizado.")
+    ap.add_argument("--steps", type=int, default=160000)
+    ap.add_argument("--dt", type=float, default=0.002)
+    ap.add_argument("--burn-in", type=int, default=20000)
+    ap.add_argument("--tail-frac", type=float, default=0.4)
+    ap.add_argument("--metric-source", choices=["phi", "chi", "avg"], default="avg")
+    ap.add_argument("--peak-fit", choices=["fwhm", "lorentz"], default="fwhm")
+    ap.add_argument("--noise", choices=["common", "independent"], default="common",
+                    help="common: misma realización del ruido en todo el diseño; independent: semilla por bloque.")
+    ap.add_argument("--evals-out", type=str, default=None, help="NPZ opcional con el diseño X y las salidas evaluadas.")
+    ap.add_argument("--outdir", type=str, default="assets")
+    args = ap.parse_args()
+
+    names = [s.strip() for s in args.params.split(",") if s.strip()]
+    unknown = set(names) - set(MODEL_FIELDS)
+    if unknown:
+        ap.error(f"Parámetros desconocidos: {sorted(unknown)}")
+    base = load_model_params(args.param_json) if args.param_json else as_params(None)
+    box = parameter_box(base, names, args.rel_width, args.abs_width, _parse_bounds(args.bounds))
+    os.makedirs(args.outdir, exist_ok=True)
+
+    t0 = time.perf_counter()
+    res, evals = run_sensitivity(names, box, n=args.n, base=base, seed=args.seed, workers=args.workers,
+                                 block=args.block, n_boot=args.n_boot, steps=args.steps, dt=args.dt,
+                                 burn_in=args.burn_in, tail_frac=args.tail_frac,
+                                 metric_source=args.metric_source, peak_fit=args.peak_fit, noise=args.noise)
+    elapsed = time.perf_counter() - t0
+    if args.evals_out:
+        np.savez_compressed(args.evals_out, names=np.array(names), box=box, **evals)
+
+    # CSV
+    csv_path = os.path.join(args.outdir, "sensitivity-sobol.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["param", "lo", "hi"] + [f"{s}_{o}" for o in OUTPUTS for s in ("S1", "S1_err", "ST", "ST_err")])
+        for j, name in enumerate(names):
+            w.writerow([name, box[j, 0], box[j, 1]] + [res[o][m][j] for o in OUTPUTS for m in range(4)])
+
+    # TXT
+    txt_path = os.path.join(args.outdir, "sensitivity-sobol.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write(f"Diseño Saltelli/Sobol: N={args.n}, k={len(names)}, {len(evals['X'])} simulaciones"
+                f" en {elapsed:.1f} s (steps={args.steps}, dt={args.dt}, semilla={args.seed}, ruido={args.noise})\n")
+        for o in OUTPUTS:
+            n_bad = int(np.count_nonzero(~np.isfinite(evals[o])))
+            f.write(f"\n{o} (evaluaciones no finitas: {n_bad})\n")
+            S1, S1e, ST, STe = res[o]
+            for j in np.argsort(-np.nan_to_num(ST, nan=-np.inf)):
+                f.write(f"  {names[j]:<11} [{box[j, 0]:.4g}, {box[j, 1]:.4g}] | "
+                        f"S1={S1[j]:.3f}±{S1e[j]:.3f} | ST={ST[j]:.3f}±{STe[j]:.3f}\n")
+
+    # Figura (S1 y ST por parámetro, una fila por salida)
+    x = np.arange(len(names))
+    fig, axes = plt.subplots(len(OUTPUTS), 1, figsize=(max(6.4, 0.6*len(names)), 6.4), sharex=True)
+    for ax, o in zip(np.atleast_1d(axes), OUTPUTS):
+        S1, S1e, ST, STe = res[o]
+        ax.bar(x - 0.2, S1, 0.4, yerr=S1e, capsize=2, label=r"$S_1$")
+        ax.bar(x + 0.2, ST, 0.4, yerr=STe, capsize=2, label=r"$S_T$")
+        ax.set_ylabel({"Q": "Q", "log10_sigma_w": r"$\log_{10}\sigma_w$"}[o])
+        ax.axhline(0, color="k", linewidth=0.6)
+        ax.grid(True, axis="y", alpha=0.3)
+    axes[0].legend()
+    axes[-1].set_xticks(x)
+    axes[-1].set_xticklabels(names, rotation=45, ha="right")
+    fig.suptitle("Índices de Sobol (bootstrap ±1σ)")
+    fig.tight_layout()
+    png_path = os.path.join(args.outdir, "sensitivity-sobol.png")
+    fig.savefig(png_path, dpi=300)
+    plt.close(fig)
+
+    print(f"[OK] Guardado: {png_path}, {csv_path}, {txt_path}")
+
+
+if __name__ == "__main__":
+    main()
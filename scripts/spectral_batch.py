@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+"""
+Análisis espectral por lotes para las Figs. 2 y 4.
+
+Las funciones trabajan sobre pilas de espectros (R, F) — una fila por serie o
+realización — sin bucles de Python:
+- power_spectra(X, dt):           PSD con ventana Hann de cada fila (una sola rfft).
+- WelchPSD(nperseg, dt):          PSD de Welch acumulada por trozos (series en streaming).
+- peak_and_width_batch(f, P):     pico (excluye f=0), cruces a media altura con
+                                  interpolación lineal, Δf y Q=f0/Δf por fila.
+                                  Reproduce exactamente el recorrido izquierda/derecha
+                                  del peak_and_width original (reflect_dc=True: cruce
+                                  izquierdo reflejado en f=0, para PSD analíticas).
+- lorentz_fit_batch(f, P, ...):   ajuste de Lorentziana por mínimos cuadrados
+                                  (Levenberg–Marquardt vectorizado); anchos por debajo
+                                  de un bin vuelven a la estimación por media altura.
+
+Uso desde los scripts de figuras (scripts/ está en sys.path al ejecutarlos):
+    from spectral_batch import power_spectra, peak_and_width_batch
+"""
+import numpy as np
+
+
+def power_spectra(X, dt, normalize=True):
+    """PSD (0..Nyquist) con ventana Hann de cada fila de X (R, N). Devuelve freqs, psd (R, F)."""
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    X = X - X.mean(axis=1, keepdims=True)
+    N = X.shape[1]
+    if N < 8:
+        raise ValueError("Serie demasiado corta para FFT.")
+    window = np.hanning(N)
+    psd = np.abs(np.fft.rfft(X * window, axis=1))**2 / np.sum(window**2)
+    freqs = np.fft.rfftfreq(N, dt)
+    if normalize:
+        m = psd.max(axis=1, keepdims=True)
+        psd = psd / np.where(m > 0, m, 1.0)
+    return freqs, psd
+
+
+class WelchPSD:
+    """
+    PSD de Welch acumulada por trozos (segmentos Hann de nperseg muestras, solape
+    `overlap`, media restada por segmento) para series que no caben en memoria:
+
+        acc = WelchPSD(nperseg, dt, n_series=2)
+        for ch in chunks:
+            acc.push(np.vstack([ch["phi"], ch["chi"]]))
+        freqs, psd = acc.result()
+
+    Solo se guardan las muestras de un segmento incompleto y la suma de periodogramas.
+    La resolución es 1/(nperseg·dt), no la de la serie completa.
+    """
+
+    def __init__(self, nperseg, dt, n_series=1, overlap=0.5):
+        self.nperseg = int(nperseg)
+        if self.nperseg < 8:
+            raise ValueError("nperseg demasiado pequeño para FFT.")
+        self.step = max(1, int(round(self.nperseg * (1.0 - overlap))))
+        self.window = np.hanning(self.nperseg)
+        self.scale = np.sum(self.window**2)
+        self.freqs = np.fft.rfftfreq(self.nperseg, dt)
+        self.n_seg = 0
+        self._sum = np.zeros((int(n_series), self.freqs.size))
+        self._buf = np.empty((int(n_series), 0))
+
+    def push(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        buf = np.concatenate([self._buf, X], axis=1)
+        L, st = self.nperseg, self.step
+        n_seg = (buf.shape[1] - L) // st + 1 if buf.shape[1] >= L else 0
+        if n_seg:
+            segs = np.lib.stride_tricks.sliding_window_view(buf, L, axis=1)[:, ::st][:, :n_seg]
+            segs = segs - segs.mean(axis=2, keepdims=True)
+            self._sum += np.sum(np.abs(np.fft.rfft(segs * self.window, axis=2))**2, axis=1) / self.scale
+            self.n_seg += n_seg
+        self._buf = buf[:, n_seg * st:]
+        return self
+
+    def result(self, normalize=True):
+        """freqs (F,), psd (R, F) promediada sobre los segmentos completos."""
+        if self.n_seg == 0:
+            raise ValueError("Serie más corta que nperseg; reduce nperseg.")
+        psd = self._sum / self.n_seg
+        if normalize:
+            m = psd.max(axis=1, keepdims=True)
+            psd = psd / np.where(m > 0, m, 1.0)
+        return self.freqs, psd
+
+
+def _interp_half(x1, y1, x2, y2, yhalf):
+    """Versión vectorizada de interp_half (x donde y=yhalf entre (x1,y1) y (x2,y2))."""
+    dx = x2 - x1
+    dy = y2 - y1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = x1 + (yhalf - y1) * dx / dy
+    x = np.where(dy == 0, 0.5 * (x1 + x2), x)
+    return np.where(dx == 0, x1, x)
+
+
+def peak_and_width_batch(freqs, psd, reflect_dc=False):
+    """
+    f0, Δf, Q (cada uno de forma (R,)) para una pila psd (R, F) sobre la rejilla freqs (F,).
+    Filas sin potencia o con el pico en un borde devuelven Δf = Q = NaN; sin cruce a
+    media altura, el cruce se extrapola entre los dos bins del borde (como el original).
+    reflect_dc=True: si el pico no baja de la media altura antes de f=0, el cruce
+    izquierdo es −fR (la PSD de una cara es la mitad de un espectro par) y las filas
+    sin cruce a la derecha devuelven NaN.
+    """
+    freqs = np.asarray(freqs, float)
+    P = np.atleast_2d(np.asarray(psd, float))
+    R, F = P.shape
+    if freqs.size != F:
+        raise ValueError("freqs y psd deben tener misma longitud.")
+    rows = np.arange(R)
+    start = 1 if freqs[0] == 0 else 0
+    # argmax sobre filas contiguas (rápido); solo se repite en las filas cuyo máximo cae en f=0
+    idx = np.argmax(P, axis=1)
+    redo = idx < start
+    if redo.any():
+        idx[redo] = start + np.argmax(P[redo, start:], axis=1)
+    f0 = freqs[idx]
+    p0 = P[rows, idx]
+    half = 0.5 * p0
+
+    # El recorrido se detiene en el primer bin < half (o en el borde del espectro).
+    # Se busca en una ventana de W bins a cada lado del pico, que solo se amplía
+    # para las filas que aún no han cruzado: el coste es O(R·W) y no O(R·F).
+    iL = np.zeros(R, dtype=int)
+    iR = np.full(R, F - 1)
+    todo = rows
+    W = 64
+    while todo.size:
+        k = np.arange(1, W + 1)[None, :]
+        jl = idx[todo, None] - k
+        jr = idx[todo, None] + k
+        bl = (jl >= 0) & (P[todo[:, None], np.clip(jl, 0, F - 1)] < half[todo, None])
+        br = (jr < F) & (P[todo[:, None], np.clip(jr, 0, F - 1)] < half[todo, None])
+        hit_l = bl.any(axis=1)
+        hit_r = br.any(axis=1)
+        iL[todo] = np.where(hit_l, idx[todo] - 1 - np.argmax(bl, axis=1), 0)
+        iR[todo] = np.where(hit_r, idx[todo] + 1 + np.argmax(br, axis=1), F - 1)
+        # Pendientes: sin cruce y con espectro aún por recorrer
+        pend = (~hit_l & (idx[todo] - W > 0)) | (~hit_r & (idx[todo] + W < F - 1))
+        todo = todo[pend]
+        W *= 4
+
+    iL1 = np.minimum(iL + 1, F - 1)
+    iR0 = np.maximum(iR - 1, 0)
+    fL = _interp_half(freqs[iL], P[rows, iL], freqs[iL1], P[rows, iL1], half)
+    fR = _interp_half(freqs[iR0], P[rows, iR0], freqs[iR], P[rows, iR], half)
+
+    ok = (p0 > 0) & (iL != idx) & (iR != idx)
+    if reflect_dc:
+        # lóbulo que llega a f=0: el cruce izquierdo es el reflejo −fR; sin cruce a
+        # la derecha (o sin f=0 en la rejilla) el ancho no está definido
+        no_l = P[rows, iL] >= half
+        fL = np.where(no_l, -fR, fL)
+        ok &= (P[rows, iR] < half) & (~no_l | (freqs[0] == 0))
+    delf = np.where(ok, np.maximum(fR - fL, 1e-16), np.nan)
+    Q = f0 / delf
+    return f0, delf, Q
+
+
+def lorentz_fit_batch(freqs, psd, n_iter=20, span=3.0):
+    """
+    Ajuste P(f) ≈ A / (1 + ((f - f0)/γ)²) + c alrededor del pico de cada fila.
+    Usa la estimación por media altura como punto de partida y ajusta en una
+    ventana de ±span·Δf con pasos de Levenberg–Marquardt (amortiguamiento por
+    fila). Si el ajuste no converge a un γ finito de al menos un bin (ancho del
+    lóbulo principal) o se aleja del pico, la fila conserva la estimación por
+    media altura. Devuelve f0, Δf = 2γ, Q = f0/Δf (forma (R,)).
+    """
+    freqs = np.asarray(freqs, float)
+    P = np.atleast_2d(np.asarray(psd, float))
+    R, F = P.shape
+    f0, delf, _ = peak_and_width_batch(freqs, P)
+    df = freqs[1] - freqs[0]
+    ok = np.isfinite(delf)
+    gam = np.where(ok, 0.5 * delf, df)
+
+    # Ventana común de K bins centrada en el pico; bins fuera de ±span·Δf pesan 0
+    half_k = int(np.clip(np.ceil(span * np.nanmax(np.where(ok, delf, df)) / df), 3, F // 2))
+    idx = np.rint((f0 - freqs[0]) / df).astype(int)
+    k = idx[:, None] + np.arange(-half_k, half_k + 1)[None, :]
+    inside = (k >= 0) & (k < F)
+    k = np.clip(k, 0, F - 1)
+    x = freqs[k]
+    y = np.take_along_axis(P, k, axis=1)
+    wgt = (inside & (np.abs(x - f0[:, None]) <= span * np.where(ok, delf, df)[:, None]) & (x > 0)).astype(float)
+
+    def model(theta):
+        A, m, g, c = theta.T
+        u = (x - m[:, None]) / g[:, None]
+        L = 1.0 / (1.0 + u**2)
+        res = y - (A[:, None] * L + c[:, None])
+        return u, L, res, np.sum(wgt * res**2, axis=1)
+
+    A = np.take_along_axis(P, idx[:, None], axis=1)[:, 0]
+    c = np.zeros(R)
+    theta = np.stack([A, f0.copy(), gam, c], axis=1)
+    u, L, res, cost = model(theta)
+    lam = np.full(R, 1e-3)
+    for _ in range(n_iter):
+        A, m, g, c = theta.T
+        # Jacobiano (R, K, 4)
+        dA = L
+        dm = A[:, None] * 2.0 * u * L**2 / g[:, None]
+        dg = A[:, None] * 2.0 * u**2 * L**2 / g[:, None]
+        J = np.stack([dA, dm, dg, np.ones_like(L)], axis=2)
+        Jw = J * wgt[:, :, None]
+        JtJ = np.einsum("rki,rkj->rij", Jw, J)
+        D = np.einsum("rii->ri", JtJ) + 1e-12
+        lhs = JtJ + (lam[:, None] * D)[:, :, None] * np.eye(4)
+        step = np.linalg.solve(lhs, np.einsum("rki,rk->ri", Jw, res)[:, :, None])[:, :, 0]
+
+        trial = theta + step
+        trial[:, 2] = np.clip(np.abs(trial[:, 2]), 1e-3 * df, None)
+        u_t, L_t, res_t, cost_t = model(trial)
+        better = np.isfinite(cost_t) & (cost_t < cost)
+        theta = np.where(better[:, None], trial, theta)
+        u = np.where(better[:, None], u_t, u)
+        L = np.where(better[:, None], L_t, L)
+        res = np.where(better[:, None], res_t, res)
+        cost = np.where(better, cost_t, cost)
+        lam = np.where(better, np.maximum(lam * 0.1, 1e-12), lam * 10.0)
+        moving = better & (np.abs(step[:, 1]) >= 1e-9 * df)
+        if not moving.any() and not (~better & (lam < 1e4)).any():
+            break
+
+    m, g = theta[:, 1], theta[:, 2]
+    good = (ok & np.isfinite(m) & np.isfinite(g) & (g >= df)
+            & (np.abs(m - f0) < span * np.where(ok, delf, df)))
+    f_fit = np.where(good, m, f0)
+    d_fit = np.where(good, 2.0 * g, delf)
+    return f_fit, d_fit, f_fit / d_fit
+
+
+# ----------------- Coherencia por autocorrelación -----------------
+def damped_cosine_fit(t, C, f_guess, tau_guess, n_iter=30):
+    """
+    Ajuste por lotes C(t) ≈ A·exp(-t/τc)·cos(2π f t + φ) (Levenberg–Marquardt simple).
+    t (L,), C (R, L), f_guess y tau_guess (R,). Devuelve f (R,), τc (R,).
+    """
+    t = np.asarray(t, float)[None, :]
+    C = np.atleast_2d(np.asarray(C, float))
+    R = C.shape[0]
+    theta = np.stack([np.ones(R), np.asarray(f_guess, float) * np.ones(R),
+                      1.0 / (np.asarray(tau_guess, float) * np.ones(R)), np.zeros(R)], axis=1)
+    lam = np.full(R, 1e-3)
+
+    def model(th):
+        A, f, k, ph = (v[:, None] for v in th.T)
+        E = np.exp(-k * t)
+        arg = 2.0 * np.pi * f * t + ph
+        return A * E * np.cos(arg), A, E, arg
+
+    y, A, E, arg = model(theta)
+    cost = np.sum((C - y)**2, axis=1)
+    for _ in range(n_iter):
+        c, s = np.cos(arg), np.sin(arg)
+        J = np.stack([E * c, -2.0 * np.pi * t * A * E * s, -t * A * E * c, -A * E * s], axis=2)
+        Jt = J.transpose(0, 2, 1)
+        JtJ = Jt @ J
+        g = (Jt @ (C - y)[:, :, None])[:, :, 0]
+        D = JtJ + lam[:, None, None] * (np.eye(4) * np.diagonal(JtJ, axis1=1, axis2=2)[:, :, None] + 1e-12 * np.eye(4))
+        step = np.linalg.solve(D, g[:, :, None])[:, :, 0]
+        trial = theta + step
+        trial[:, 2] = np.maximum(trial[:, 2], 1e-12)
+        y_t, A_t, E_t, arg_t = model(trial)
+        cost_t = np.sum((C - y_t)**2, axis=1)
+        better = cost_t < cost
+        # Acepta los pasos que bajan el coste; en el resto aumenta el amortiguamiento
+        theta = np.where(better[:, None], trial, theta)
+        cost = np.where(better, cost_t, cost)
+        lam = np.where(better, lam * 0.3, lam * 10.0)
+        y, A, E, arg = model(theta)
+        if np.all(np.abs(step[:, 1]) <= 1e-10 * np.abs(theta[:, 1]) + 1e-14):
+            break
+    # Normaliza el signo de (A, f): f > 0
+    f = np.abs(theta[:, 1])
+    return f, 1.0 / theta[:, 2]
+
+
+def acf_coherence(X, dt, n_seg=8, n_boot=200, ci=0.68, max_lag=None, seed=0):
+    """
+    Q por autocorrelación: se ajusta un coseno amortiguado a la ACF de cada fila
+    de X (R, N):  f0, τc  ->  Q = π·f0·τc  (equivale a f0/Δf de una Lorentziana,
+    Δf = 1/(π τc)).
+    Para el intervalo de confianza la serie se divide en n_seg bloques y se
+    acumulan por bloque los productos x_i·x_{i+k} (con i en el bloque; i+k puede
+    caer en el siguiente), de modo que la suma de bloques es exactamente la ACF
+    completa. El bootstrap remuestrea bloques con reemplazo y todos los ajustes
+    (R·n_boot) se hacen en un único lote.
+    Devuelve dict de arrays (R,): f0, delf, tau_c, Q, Q_lo, Q_hi.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    R, N = X.shape
+    n_seg = max(1, int(n_seg))
+    L = N // n_seg
+    if L < 16:
+        raise ValueError("Serie demasiado corta para la ACF por bloques.")
+    X = X - X.mean(axis=1, keepdims=True)
+
+    # Punto de partida: pico y ancho del espectro medio de los bloques (Welch)
+    freqs, P = power_spectra(X[:, :L * n_seg].reshape(R * n_seg, L), dt, normalize=False)
+    f0, delf, _ = peak_and_width_batch(freqs, P.reshape(R, n_seg, -1).mean(axis=1))
+    tau0 = np.where(np.isfinite(delf), 1.0 / (np.pi * np.where(np.isfinite(delf), delf, 1.0)), 10.0 / f0)
+
+    # Retardos cortos (~τc, al menos dos periodos): a retardos largos la ACF es
+    # casi solo ruido correlacionado y empeora el ajuste
+    if max_lag is None:
+        max_lag = int(np.ceil(np.nanmax(np.maximum(tau0, 2.0 / f0)) / dt))
+    max_lag = int(np.clip(max_lag, 8, N // 4))
+
+    # Productos retardados por bloque: corr(bloque, bloque extendido en max_lag) vía FFT
+    Xp = np.concatenate([X, np.zeros((R, max_lag))], axis=1)
+    starts = np.arange(n_seg) * L
+    a = X[:, :L * n_seg].reshape(R, n_seg, L)
+    b = Xp[:, starts[:, None] + np.arange(L + max_lag)[None, :]]           # (R, S, L+max_lag)
+    n = 1 << int(np.ceil(np.log2(L + max_lag)))
+    num = np.fft.irfft(np.conj(np.fft.rfft(a, n=n, axis=2)) * np.fft.rfft(b, n=n, axis=2),
+                       n=n, axis=2)[:, :, :max_lag]
+    k = np.arange(max_lag)
+    # Pares por bloque y retardo (i+k < N); las muestras sobrantes solo actúan como x_{i+k}
+    cnt = np.clip(np.minimum(L, N - starts[:, None] - k[None, :]), 0, None).astype(float)  # (S, max_lag)
+
+    # Submuestreo de retardos: ~16 puntos por periodo bastan para el ajuste
+    stride = max(1, int(1.0 / (16.0 * np.nanmax(f0) * dt)))
+    lags = k[::stride]
+    t = lags * dt
+    num, cnt = num[:, :, lags], cnt[:, lags]
+
+    def acf_of(nm, ct):
+        c = nm / ct
+        return c / c[..., :1]
+
+    f_hat, tau_hat = damped_cosine_fit(t, acf_of(num.sum(axis=1), cnt.sum(axis=0)), f0, tau0)
+
+    out = dict(f0=f_hat, tau_c=tau_hat, Q=np.pi * f_hat * tau_hat, delf=1.0 / (np.pi * tau_hat))
+    if n_boot and n_seg > 1:
+        rng = np.random.default_rng(seed)
+        idx = rng.integers(0, n_seg, size=(n_boot, n_seg))
+        boot = acf_of(num[:, idx].sum(axis=2), cnt[idx].sum(axis=1)).reshape(R * n_boot, -1)
+        fb, tb = damped_cosine_fit(t, boot, np.repeat(f_hat, n_boot), np.repeat(tau_hat, n_boot))
+        Qb = (np.pi * fb * tb).reshape(R, n_boot)
+        q = 0.5 * (1.0 - ci)
+        out["Q_lo"], out["Q_hi"] = np.nanquantile(Qb, [q, 1.0 - q], axis=1)
+    else:
+        out["Q_lo"] = out["Q_hi"] = np.full(R, np.nan)
+    return out
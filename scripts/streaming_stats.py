@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Acumuladores en streaming y fusionables para w_total (Figs. 3 y 4).
+
+- Welford: media y varianza por trozos (fórmula de Chan et al. para combinar
+  un trozo o otro acumulador), numéricamente estable y sin guardar la serie.
+- StreamingHistogram: histograma de bins fijos [lo, hi) con contadores de
+  underflow/overflow/NaN; dos histogramas con los mismos bins se suman.
+
+Ambos se serializan a dict (to_dict / from_dict) para fusionar resultados de
+realizaciones o procesos distintos.
+"""
+import numpy as np
+
+
+class Welford:
+    """Media y varianza acumuladas: update(chunk), merge(otro), var(ddof)."""
+
+    __slots__ = ("n", "mean", "m2")
+
+    def __init__(self, n=0, mean=0.0, m2=0.0):
+        self.n = int(n)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+
+    def _combine(self, n_b, mean_b, m2_b):
+        n = self.n + n_b
+        if n_b == 0:
+            return
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta**2 * self.n * n_b / n
+        self.n = n
+
+    def update(self, chunk):
+        x = np.asarray(chunk, dtype=float).ravel()
+        x = x[np.isfinite(x)]
+        if x.size:
+            m = float(x.mean())
+            self._combine(x.size, m, float(np.sum((x - m)**2)))
+        return self
+
+    def merge(self, other):
+        self._combine(other.n, other.mean, other.m2)
+        return self
+
+    def var(self, ddof=0):
+        return self.m2 / (self.n - ddof) if self.n > ddof else np.nan
+
+    def std(self, ddof=0):
+        return float(np.sqrt(self.var(ddof)))
+
+    def to_dict(self):
+        return dict(n=self.n, mean=self.mean, m2=self.m2)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d["n"], d["mean"], d["m2"])
+
+
+class StreamingHistogram:
+    """Histograma de bins fijos entre lo y hi (el borde hi entra en el último bin, como np.histogram)."""
+
+    def __init__(self, lo, hi, bins=40):
+        if not hi > lo:
+            raise ValueError("El rango del histograma debe cumplir hi > lo.")
+        self.lo, self.hi, self.bins = float(lo), float(hi), int(bins)
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+        self.nan = 0
+
+    @property
+    def edges(self):
+        return np.linspace(self.lo, self.hi, self.bins + 1)
+
+    def update(self, chunk):
+        x = np.asarray(chunk, dtype=float).ravel()
+        nan = np.isnan(x)
+        if nan.any():
+            self.nan += int(np.count_nonzero(nan))
+            x = x[~nan]
+        self.underflow += int(np.count_nonzero(x < self.lo))
+        self.overflow += int(np.count_nonzero(x > self.hi))
+        x = x[(x >= self.lo) & (x <= self.hi)]
+        k = np.minimum(((x - self.lo) * (self.bins / (self.hi - self.lo))).astype(np.int64), self.bins - 1)
+        self.counts += np.bincount(k, minlength=self.bins)
+        return self
+
+    def merge(self, other):
+        if (other.lo, other.hi, other.bins) != (self.lo, self.hi, self.bins):
+            raise ValueError("Solo se pueden fusionar histogramas con los mismos bins.")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.nan += other.nan
+        return self
+
+    @property
+    def total(self):
+        """Muestras dentro del rango."""
+        return int(self.counts.sum())
+
+    def density(self):
+        """Densidad normalizada sobre las muestras dentro del rango (como density=True)."""
+        width = (self.hi - self.lo) / self.bins
+        return self.counts / max(self.total, 1) / width
+
+    def to_dict(self):
+        return dict(lo=self.lo, hi=self.hi, bins=self.bins, counts=self.counts.tolist(),
+                    underflow=self.underflow, overflow=self.overflow, nan=self.nan)
+
+    @classmethod
+    def from_dict(cls, d):
+        h = cls(d["lo"], d["hi"], d["bins"])
+        h.counts = np.asarray(d["counts"], dtype=np.int64)
+        h.underflow, h.overflow, h.nan = int(d["underflow"]), int(d["overflow"]), int(d.get("nan", 0))
+        return h
+
+
+def merge_files(paths):
+    """Fusiona JSON {"welford": ..., "hist": ...} de varias corridas (p.ej. --hist-out de Fig. 3)."""
+    import json
+    acc, hist = Welford(), None
+    for p in paths:
+        with open(p, "r", encoding="utf-8") as f:
+            d = json.load(f)
+        acc.merge(Welford.from_dict(d["welford"]))
+        if "hist" in d:
+            h = StreamingHistogram.from_dict(d["hist"])
+            hist = h if hist is None else hist.merge(h)
+    return acc, hist
+
+
+def main():
+    import argparse
+    import json
+    ap = argparse.ArgumentParser(description="Fusiona acumuladores de w_total (JSON) de varias corridas.")
+    ap.add_argument("inputs", nargs="+", help="Archivos JSON de entrada.")
+    ap.add_argument("--out", type=str, required=True, help="JSON fusionado.")
+    args = ap.parse_args()
+    acc, hist = merge_files(args.inputs)
+    out = dict(welford=acc.to_dict())
+    if hist is not None:
+        out["hist"] = hist.to_dict()
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(out, f)
+    print(f"[OK] {len(args.inputs)} corridas: n={acc.n}, <w>={acc.mean:.6g}, Var(w)={acc.var():.6g} → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
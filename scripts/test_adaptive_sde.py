@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del integrador adaptativo frente al paso fijo (python -m pytest scripts)."""
+import numpy as np
+import pytest
+
+from adaptive_sde import DT_MAX, as_params, default_dt_max, integrate_adaptive, q_regression
+
+
+def test_dt_max_por_defecto_resuelve_el_ou():
+    p = as_params(None).replace(V0=0.6)
+    assert default_dt_max(p.replace(tau_phi=2.0, tau_chi=2.0)) == DT_MAX
+    assert default_dt_max(p.replace(tau_phi=0.05, tau_chi=1.0)) == pytest.approx(0.005)
+    out = integrate_adaptive(p.replace(tau_phi=2.0, tau_chi=2.0), t_end=50.0, t_burn=10.0, seed=1)
+    assert np.diff(out["t_steps"]).max() <= DT_MAX * (1 + 1e-9)
+
+
+def test_control_de_error_rechaza_con_ruido_fuerte():
+    # Con τ = 2 el paso queda clavado en dt_max; con τ = 0.3 el control sí rechaza y reduce h.
+    p = as_params(None).replace(V0=0.6)
+    weak = integrate_adaptive(p.replace(tau_phi=2.0, tau_chi=2.0), t_end=50.0, t_burn=10.0, seed=1)
+    strong = integrate_adaptive(p.replace(tau_phi=0.3, tau_chi=0.3), t_end=50.0, t_burn=10.0, seed=1)
+    assert weak["n_reject"] == 0
+    assert strong["n_reject"] > 0.02 * strong["n_accept"]
+    assert np.diff(strong["t_steps"]).min() < 0.5 * default_dt_max(p.replace(tau_phi=0.3, tau_chi=0.3))
+
+
+def test_regresion_q_frente_a_paso_fijo():
+    # Con dt_max = 0.1 y τ = 2 el Q adaptativo salía ~0.45 frente a ~0.25 del paso fijo.
+    rows = q_regression(as_params(None).replace(V0=0.6), [0.3, 2.0], n_seeds=6, steps=100000,
+                        burn_in=10000, nperseg=8192, seed=3)
+    for r in rows:
+        assert np.isfinite(r["z"]) and abs(r["z"]) < 3.0, r
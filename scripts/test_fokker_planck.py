@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del solver de Fokker–Planck estacionario (python -m pytest scripts)."""
+import numpy as np
+import pytest
+
+from fokker_planck import _potential, _w_of, as_params, fp_operator, solve_stationary, stationary_density
+
+
+def _ou_operator(n, k=1.0, D=0.5, half=4.0):
+    c = np.linspace(-half, half, n + 1)
+    c = 0.5 * (c[1:] + c[:-1])
+    L = fp_operator([c, c], lambda X: [-k * X[0], -k * X[1]],
+                    lambda X: [np.full_like(X[0], D), np.full_like(X[1], D)])
+    return c, L
+
+
+def test_operador_conserva_masa():
+    _, L = _ou_operator(40)
+    np.testing.assert_allclose(np.asarray(L.sum(axis=0)).ravel(), 0.0, atol=1e-10)
+
+
+def test_ou_2d_varianza_estacionaria():
+    c, L = _ou_operator(120)
+    p, info = stationary_density(L, method="direct")
+    p = p.reshape(len(c), len(c))
+    p /= p.sum()
+    assert np.all(p >= 0)
+    assert np.sum(p.sum(axis=1) * c**2) == pytest.approx(0.5, rel=1e-3)   # D/k
+
+
+@pytest.mark.parametrize("method", ["gmres", "bicgstab"])
+def test_iteraciones_acotadas_y_respaldo_directo(method):
+    c, L = _ou_operator(120)
+    ref, _ = stationary_density(L, method="direct")
+    p, info = stationary_density(L, method=method, maxiter=40, restart=20)
+    assert info["iterations"] <= 40
+    if not info.get("converged", False):
+        assert info["fallback"] == "direct"
+    np.testing.assert_allclose(p / p.sum(), ref / ref.sum(), atol=1e-8)
+
+
+def test_auto_usa_directo_en_2d():
+    res = solve_stationary({"V0": 0.6}, model="single", shape=(64, 32))
+    assert res["info"]["method"] == "direct"
+    vol = np.prod([c[1] - c[0] for c in res["centers"]])
+    assert res["density"].sum() * vol == pytest.approx(1.0)
+
+
+def _monte_carlo(p, model, R=2000, dt=0.01, t_burn=40.0, t_end=240.0, every=10, seed=0):
+    """Euler–Maruyama vectorizado de los modelos reducidos: std de cada eje y Var(w)."""
+    rng = np.random.default_rng(seed)
+    V, dV = _potential(p)
+    phi = np.full(R, np.sqrt(p.m_phi**2/p.lambda_phi))
+    pi = np.zeros(R)
+    zeta = np.zeros(R)
+    n_burn, n = int(t_burn/dt), int(t_end/dt)
+    samples = []
+    for k in range(n):
+        H = np.sqrt(np.maximum((0.5*pi**2 if model == "slice" else 0.0) + V(phi) + p.V0, 1e-16))
+        D = p.alpha_phi*3.0*H*(H/(2.0*np.pi))/p.tau_phi**2
+        zeta = zeta - zeta/p.tau_phi*dt + np.sqrt(2.0*D*dt)*rng.standard_normal(R)
+        if model == "slice":
+            pi = pi + (-3.0*H*pi - dV(phi) + zeta)*dt
+        else:
+            pi = (zeta - dV(phi))/(3.0*H)
+        phi = phi + pi*dt
+        if k >= n_burn and k % every == 0:
+            samples.append(np.stack([phi, pi, zeta, _w_of(0.5*pi**2, V(phi))]))
+    x = np.concatenate(samples, axis=1)
+    std = dict(phi=x[0].std(), dphi=x[1].std(), zeta=x[2].std())
+    return std, x[3].var()
+
+
+def _std(res, name):
+    c = res["centers"][res["axes"].index(name)]
+    m = res["marginals"][name]
+    mu = np.sum(c*m)/np.sum(m)
+    return np.sqrt(np.sum((c - mu)**2*m)/np.sum(m))
+
+
+def test_single_frente_a_monte_carlo():
+    p = as_params(None).replace(V0=0.6)
+    std, var_w = _monte_carlo(p, "single")
+    res = solve_stationary(p, model="single", shape=(128, 64), bounds=dict(phi=(1.25, 1.58), zeta=(-0.25, 0.25)))
+    for name in res["axes"]:
+        assert _std(res, name) == pytest.approx(std[name], rel=0.03)
+    assert res["sigma_w"] == pytest.approx(var_w, rel=0.1)
+
+
+def test_corte_3d_frente_a_monte_carlo():
+    # Malla por defecto (32×32×24, LU): el flujo limitado corrige el ensanchamiento del upwind.
+    p = as_params(None).replace(V0=0.6)
+    std, var_w = _monte_carlo(p, "slice")
+    bounds = dict(phi=(1.25, 1.58), dphi=(-0.12, 0.12), zeta=(-0.25, 0.25))
+    res = solve_stationary(p, model="slice", bounds=bounds)
+    up = solve_stationary(p, model="slice", bounds=bounds, flux="upwind")
+    assert res["info"]["method"] == "direct" and res["info"]["dc_iterations"] > 0
+    for name in res["axes"]:
+        assert _std(res, name) == pytest.approx(std[name], rel=0.08)
+    assert res["sigma_w"] == pytest.approx(var_w, rel=0.25)
+    for name in ("phi", "dphi"):
+        assert abs(_std(res, name) - std[name]) < 0.5*abs(_std(up, name) - std[name])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la Q(τ) de ruido lineal frente a la simulación (python -m pytest scripts)."""
+import numpy as np
+import pytest
+
+from batch_sim import simulate_batch
+from linear_noise import as_params, linear_q
+from spectral_batch import WelchPSD, peak_and_width_batch
+from utils.parameters import ParamBatch  # linear_noise ya añade la raíz del repo al path
+
+
+def test_q_finita_en_todo_tau():
+    # Antes la máscara del lóbulo OU dejaba Q = NaN para τ ≳ 0.35 con V0 = 0.6.
+    tau = np.geomspace(0.05, 10.0, 200)
+    res = linear_q(tau, as_params(None).replace(V0=0.6))
+    assert np.all(np.isfinite(res["Q"]) & (res["Q"] > 0))
+    # la resonancia aislada solo existe mientras el lóbulo queda bajo la media altura
+    assert np.isfinite(res["Q_res"][0]) and np.isnan(res["Q_res"][-1])
+    ok = np.isfinite(res["Q_res"])
+    assert np.allclose(res["Q_res"][ok], res["Q"][ok])
+
+
+def test_sin_amortiguamiento_en_el_atractor_da_nan():
+    res = linear_q([0.5, 2.0], None)      # parámetros por defecto: V* < 0, H* ≈ 0
+    assert np.isnan(res["attractor"]["H"]) and np.all(np.isnan(res["Q"]))
+
+
+@pytest.mark.parametrize("tau", [0.1, 0.3])
+def test_q_lineal_coincide_con_simulacion(tau):
+    # Ruido débil (régimen lineal): Welch de φ simulado frente a la PSD analítica
+    # medida con el mismo estimador y la misma rejilla.
+    dt, R, nperseg = 0.01, 16, 2048
+    p = as_params(None).replace(V0=0.6, tau_phi=tau, tau_chi=tau, alpha_phi=0.005, alpha_chi=0.005)
+    sim = simulate_batch(ParamBatch.broadcast(p, phi0=np.full(R, p.phi0)),
+                         steps=60000, dt=dt, burn_in=4000, seed=1)
+    acc = WelchPSD(nperseg, dt, n_series=R)
+    acc.push(sim["PHI"])
+    freqs, P = acc.result(normalize=False)
+    f0_s, _, Q_s = peak_and_width_batch(freqs, P.mean(axis=0, keepdims=True))
+    lin = linear_q([tau], p, metric_source="phi", freqs=freqs)
+    assert abs(f0_s[0] - lin["f0"][0]) <= 1.01 * (freqs[1] - freqs[0])
+    assert Q_s[0] == pytest.approx(lin["Q"][0], rel=0.2)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de rolling_stats: por trozos == serie entera (python -m pytest scripts)."""
+import numpy as np
+import pytest
+
+from rolling_stats import RollingStats, rolling_mean, rolling_minmax, rolling_var
+
+STATS = ("mean", "var", "min", "max")
+
+
+def _chunked(x, M, size, **kw):
+    rs = RollingStats(M, **kw)
+    parts = [rs.push(x[i:i + size]) for i in range(0, x.size, size)] + [rs.flush()]
+    return {k: np.concatenate([p[k] for p in parts if k in p]) for k in kw.get("stats", ("mean",))}
+
+
+@pytest.mark.parametrize("size", [1, 7, 300, 714, 1999, 2000, 2500, 5000])
+@pytest.mark.parametrize("edge", ["zero", "shrink"])
+def test_trozos_igual_que_serie_entera(size, edge):
+    x = np.random.default_rng(1).standard_normal(5000).cumsum()
+    M = 2000
+    whole = _chunked(x, M, x.size, stats=STATS, edge=edge)
+    parts = _chunked(x, M, size, stats=STATS, edge=edge)
+    for k in STATS:
+        assert parts[k].shape == (x.size,)
+        np.testing.assert_allclose(parts[k], whole[k], rtol=1e-10, atol=1e-10)
+
+
+def test_media_igual_que_convolve():
+    x = np.random.default_rng(2).standard_normal(3001)
+    for M in (1, 2, 5, 64, 1000):
+        np.testing.assert_allclose(rolling_mean(x, M), np.convolve(x, np.ones(M) / M, mode="same"),
+                                   rtol=1e-12, atol=1e-12)
+
+
+def test_var_y_minmax_contra_referencia():
+    x = np.random.default_rng(3).standard_normal(500)
+    M = 31
+    lo, hi = rolling_minmax(x, M)
+    var = rolling_var(x, M)
+    left, right = M - 1 - (M - 1) // 2, (M - 1) // 2
+    for i in (0, 10, 250, 499):
+        w = x[max(0, i - left):i + right + 1]
+        assert lo[i] == w.min() and hi[i] == w.max()
+        assert var[i] == pytest.approx(w.var(), rel=1e-9, abs=1e-12)
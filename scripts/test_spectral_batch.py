@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de los estimadores de pico/ancho de spectral_batch (python -m pytest scripts)."""
+import numpy as np
+import pytest
+
+from spectral_batch import lorentz_fit_batch, peak_and_width_batch, power_spectra
+
+
+def _lorentz_rows(gammas, f0=2.0, df=0.01, F=800, noise=0.02, seed=0):
+    rng = np.random.default_rng(seed)
+    f = np.arange(F) * df
+    P = 1.0 / (1.0 + ((f[None, :] - f0) / np.asarray(gammas)[:, None])**2) + 0.01
+    return f, P * (1.0 + noise * rng.standard_normal(P.shape))
+
+
+def test_lorentz_recupera_ancho_resuelto():
+    gammas = np.array([0.03, 0.05, 0.1, 0.2])
+    f, P = _lorentz_rows(gammas)
+    f0, delf, Q = lorentz_fit_batch(f, P)
+    assert np.allclose(f0, 2.0, atol=0.01)
+    assert np.allclose(delf, 2 * gammas, rtol=0.05)
+    assert np.allclose(Q, f0 / delf)
+
+
+def test_lorentz_no_baja_de_un_bin_y_cae_a_fwhm():
+    # Difusión de fase con líneas más estrechas que la resolución: el ajuste no
+    # puede dar Δf por debajo del lóbulo principal (antes: Q ~ 1e4 frente a 300).
+    rng = np.random.default_rng(3)
+    dt, n, R = 0.01, 40000, 32
+    D = np.geomspace(1e-4, 1.0, R)
+    phase = np.cumsum(np.sqrt(2 * D[:, None] * dt) * rng.standard_normal((R, n)), axis=1)
+    X = np.cos(2 * np.pi * 2.0 * np.arange(n) * dt + phase) + 0.1 * rng.standard_normal((R, n))
+    f, P = power_spectra(X, dt)
+    df = f[1] - f[0]
+    _, d_fw, _ = peak_and_width_batch(f, P)
+    _, d_lz, Q_lz = lorentz_fit_batch(f, P)
+    fitted = d_lz != d_fw
+    assert np.all(d_lz[fitted] >= 2 * df)
+    assert np.all(np.isfinite(Q_lz) == np.isfinite(d_fw))
+
+
+def test_fwhm_de_lorentziana_sin_ruido():
+    gammas = np.array([0.05, 0.1])
+    f, P = _lorentz_rows(gammas, noise=0.0)
+    f0, delf, _ = peak_and_width_batch(f, P - 0.01)
+    assert np.allclose(f0, 2.0)
+    assert delf == pytest.approx(2 * gammas, rel=0.02)
+
+
+def test_pico_interior_sin_cruce_izquierdo_conserva_q_de_fig2_fig4():
+    # Semántica del peak_and_width original (Figs. 2 y 4): el cruce que falta se
+    # extrapola entre los dos bins del borde, sin reflejo en f=0.
+    f = np.arange(8.0)
+    P = np.array([[0.8, 0.9, 1.0, 0.4, 0.2, 0.1, 0.1, 0.1],    # izquierda sobre la media altura
+                  [0.1, 0.2, 0.4, 1.0, 0.9, 0.8, 0.7, 0.6]])   # sin cruce a la derecha
+    f0, delf, Q = peak_and_width_batch(f, P)
+    assert np.allclose(f0, [2.0, 3.0])
+    assert delf == pytest.approx([(2.0 + 5.0/6.0) + 3.0, 8.0 - (2.0 + 1.0/6.0)])
+    assert Q[0] == pytest.approx(2.0 / (23.0/6.0 + 2.0))
+
+
+def test_lobulo_en_f0_refleja_el_cruce_izquierdo():
+    # Espectro de OU (máximo en f=0) con reflect_dc: Δf = 2·f_media sobre el espectro par.
+    f = np.linspace(0.0, 5.0, 2001)
+    fc = 0.5
+    P = 1.0 / (1.0 + (f / fc)**2)
+    _, delf, _ = peak_and_width_batch(f, P[None, :], reflect_dc=True)
+    assert delf[0] == pytest.approx(2 * fc, rel=0.01)
+    # sin cruce a la derecha el ancho no está definido
+    _, delf, Q = peak_and_width_batch(f[:100], P[None, :100], reflect_dc=True)
+    assert np.isnan(delf[0]) and np.isnan(Q[0])
@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+Formato binario columnar para trayectorias (t, phi, dphi, chi, dchi, ...) y salidas
+de las figuras, pensado para 10^7+ filas.
+
+Estructura de un archivo .traj:
+    [0:8)     magia b"TRAJv1\\0\\0"
+    [8:16)    uint64 LE: tamaño reservado para la cabecera (múltiplo de 64)
+    [16:...)  cabecera JSON (UTF-8, rellena con espacios): params, seed, dt,
+              versión del código, nrows y columnas {name, dtype, offset}
+    bloques   una columna tras otra, contiguas, little-endian y alineadas a 64 B
+
+Cada columna se lee como np.memmap (sin copia ni parseo). La escritura es por
+trozos: el escritor reserva `capacity` filas por columna y la cabecera se
+reescribe al cerrar con el número real de filas.
+
+Para los CSV heredados (mientras sigan llegando): iter_csv lee solo las columnas
+necesarias, con dtype explícito y en trozos de tamaño fijo; open_state_stream
+da el mismo flujo por trozos para .traj o CSV, de modo que los consumidores en
+streaming (PSD de Welch en Fig. 2, acumuladores de Fig. 3) no cargan la serie.
+
+CLI:
+    python scripts/trajectory_io.py convert data/state.csv data/state.traj [--dt 0.002] [--float32]
+    python scripts/trajectory_io.py info data/state.traj
+    python scripts/trajectory_io.py to-csv data/state.traj data/state.csv
+"""
+import itertools
+import json
+import os
+import subprocess
+
+import numpy as np
+
+MAGIC = b"TRAJv1\0\0"
+ALIGN = 64
+STATE_COLUMNS = ("t", "phi", "dphi", "chi", "dchi")
+
+
+def _align(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def code_version():
+    """Commit corto del repo (o 'unknown' si no hay git)."""
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def is_trajectory(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class TrajectoryWriter:
+    """
+    Escritor por trozos:
+        with TrajectoryWriter(path, ["t", "phi"], capacity=N, dt=dt, seed=7, params=p) as w:
+            w.append(t=t_chunk, phi=phi_chunk)
+    """
+
+    def __init__(self, path, columns, capacity, dtype="<f8", dt=None, seed=None, params=None, meta=None):
+        self.path = path
+        dtypes = columns if isinstance(columns, dict) else {c: dtype for c in columns}
+        self.capacity = int(capacity)
+        self.nrows = 0
+        self.header = dict(format="traj", version=1, code_version=code_version(),
+                           dt=dt, seed=seed, params=params or {}, meta=meta or {},
+                           nrows=0, capacity=self.capacity, columns=[])
+        # Espacio de cabecera con margen para reescribirla al cerrar
+        probe = dict(self.header, columns=[dict(name=n, dtype=np.dtype(d).newbyteorder("<").str, offset=0)
+                                           for n, d in dtypes.items()])
+        self.header_size = _align(16 + len(json.dumps(probe).encode("utf-8")) + 1024)
+        offset = self.header_size
+        for name, d in dtypes.items():
+            dt_ = np.dtype(d).newbyteorder("<")
+            self.header["columns"].append(dict(name=name, dtype=dt_.str, offset=offset))
+            offset = _align(offset + self.capacity * dt_.itemsize)
+        self._cols = {c["name"]: c for c in self.header["columns"]}
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._f = open(path, "wb+")
+        self._f.truncate(offset)
+        self._write_header()
+
+    def _write_header(self):
+        raw = json.dumps(dict(self.header, nrows=self.nrows)).encode("utf-8")
+        if 16 + len(raw) > self.header_size:
+            raise ValueError("La cabecera no cabe en el espacio reservado.")
+        self._f.seek(0)
+        self._f.write(MAGIC + np.uint64(self.header_size).astype("<u8").tobytes())
+        self._f.write(raw.ljust(self.header_size - 16, b" "))
+
+    def append(self, **cols):
+        n = {len(v) for v in cols.values()}
+        if len(n) != 1 or set(cols) != set(self._cols):
+            raise ValueError("append() necesita todas las columnas con la misma longitud.")
+        n = n.pop()
+        if self.nrows + n > self.capacity:
+            raise ValueError(f"Capacidad superada ({self.capacity} filas).")
+        for name, v in cols.items():
+            c = self._cols[name]
+            arr = np.ascontiguousarray(v, dtype=c["dtype"])
+            self._f.seek(c["offset"] + self.nrows * arr.itemsize)
+            self._f.write(arr.tobytes())
+        self.nrows += n
+
+    def close(self):
+        if self._f is not None:
+            self._write_header()
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Trajectory:
+    """Lectura sin copia: traj["phi"] es un np.memmap de solo lectura."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} no es un archivo .traj")
+            size = int(np.frombuffer(f.read(8), dtype="<u8")[0])
+            self.header = json.loads(f.read(size - 16).decode("utf-8"))
+        self.nrows = int(self.header["nrows"])
+        self._cols = {c["name"]: c for c in self.header["columns"]}
+
+    @property
+    def columns(self):
+        return list(self._cols)
+
+    @property
+    def dt(self):
+        return self.header.get("dt")
+
+    @property
+    def params(self):
+        return self.header.get("params", {})
+
+    def __contains__(self, name):
+        return name in self._cols
+
+    def __getitem__(self, name):
+        c = self._cols[name]
+        if self.nrows == 0:
+            return np.empty(0, dtype=c["dtype"])
+        return np.memmap(self.path, dtype=c["dtype"], mode="r", offset=c["offset"], shape=(self.nrows,))
+
+    def iter_chunks(self, columns=None, chunksize=1 << 20):
+        """Trozos {col: vista} de chunksize filas (vistas del memmap, sin copia)."""
+        cols = {n: self[n] for n in (columns or self.columns)}
+        for i in range(0, self.nrows, chunksize):
+            yield {n: v[i:i + chunksize] for n, v in cols.items()}
+
+
+def write_trajectory(path, columns, dt=None, seed=None, params=None, meta=None, dtype="<f8"):
+    """Escribe un dict {nombre: array} de una vez."""
+    n = len(next(iter(columns.values())))
+    with TrajectoryWriter(path, {k: dtype for k in columns}, n, dt=dt, seed=seed,
+                          params=params, meta=meta) as w:
+        w.append(**columns)
+    return path
+
+
+def load_state(path, dt_cli=None):
+    """
+    Columnas de estado (t, phi, dphi, chi, dchi) y dt de un .traj.
+    Si falta t se reconstruye con el dt de la cabecera o con dt_cli.
+    """
+    tr = Trajectory(path)
+    missing = [c for c in STATE_COLUMNS[1:] if c not in tr]
+    if missing:
+        raise ValueError(f"{path} no contiene las columnas {missing}.")
+    dt = tr.dt if tr.dt is not None else dt_cli
+    if "t" in tr:
+        t = tr["t"]
+        if dt is None:
+            dt = float((t[-1] - t[0]) / max(len(t) - 1, 1))
+    else:
+        if dt is None:
+            raise ValueError("El archivo no tiene columna de tiempo ni dt; indica --dt.")
+        t = np.arange(tr.nrows) * dt
+    return t, tr["phi"], tr["dphi"], tr["chi"], tr["dchi"], float(dt)
+
+
+COLUMN_ALIASES = dict(
+    t=("t", "time"),
+    phi=("phi", "ϕ"),
+    dphi=("dphi", "phi_dot", "phidot", "dphidt", "ϕdot"),
+    chi=("chi",),
+    dchi=("dchi", "chi_dot", "chidot", "dchidt"),
+)
+
+
+def _canonical(name):
+    """Nombre canónico (t, phi, dphi, chi, dchi) de un alias; el resto se deja igual."""
+    return next((c for c, alts in COLUMN_ALIASES.items() if name in alts), name)
+
+
+def _csv_layout(path):
+    """(tiene_encabezado, nombres en minúsculas o None, nº de campos) a partir de la primera línea."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        fields = [s.strip() for s in f.readline().strip().split(",")]
+    has_header = not all(_is_number(s) for s in fields)
+    return has_header, ([s.lower() for s in fields] if has_header else None), len(fields)
+
+
+def _default_names(names, n_fields):
+    if names is not None:
+        return [_canonical(n) for n in names]
+    return [STATE_COLUMNS[i] if i < len(STATE_COLUMNS) else f"c{i}" for i in range(n_fields)]
+
+
+def _resolve_columns(names, n_fields, columns):
+    """
+    Índice de cada columna pedida: por nombre o alias (COLUMN_ALIASES) y, si falta
+    alguna de estado, posicional t,phi,dphi,chi,dchi (como los load_from_csv heredados).
+    La columna t es opcional.
+    """
+    idx = {}
+    for c in columns if names is not None else ():
+        for cand in COLUMN_ALIASES.get(c, (c,)):
+            if cand in names:
+                idx[c] = names.index(cand)
+                break
+    missing = [c for c in columns if c not in idx and c != "t"]
+    if missing or names is None:
+        if n_fields >= len(STATE_COLUMNS) and all(c in STATE_COLUMNS for c in columns):
+            idx = {c: STATE_COLUMNS.index(c) for c in columns}
+        elif missing:
+            raise ValueError(f"El CSV no contiene las columnas {missing} (ni el orden t,phi,dphi,chi,dchi).")
+    return idx
+
+
+def iter_csv(path, columns=STATE_COLUMNS, chunksize=1 << 18, dtype=np.float64):
+    """
+    Lectura en streaming de un CSV grande: solo las columnas pedidas (usecols), con
+    dtype explícito (float64/float32) y en trozos de chunksize filas. Produce dicts
+    {col: array contiguo}; nunca se materializa el DataFrame completo.
+    columns=None lee todas las columnas con sus nombres canónicos (t,phi,dphi,chi,dchi
+    para los alias conocidos; posicionales si no hay encabezado).
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        raise RuntimeError("Para leer CSV se requiere pandas (pip install pandas).")
+
+    has_header, names, n_fields = _csv_layout(path)
+    if columns is None:
+        columns = _default_names(names, n_fields)
+        idx = dict(zip(columns, range(n_fields)))
+    else:
+        idx = _resolve_columns(names, n_fields, columns)
+    usecols = sorted(set(idx.values()))
+    pos = {c: usecols.index(i) for c, i in idx.items()}
+    reader = pd.read_csv(path, header=0 if has_header else None, usecols=usecols,
+                         dtype=dtype, chunksize=chunksize)
+    for df in reader:
+        vals = df.to_numpy(dtype=dtype, copy=False)
+        yield {c: np.ascontiguousarray(vals[:, p]) for c, p in pos.items()}
+
+
+def count_rows(path):
+    """Filas de datos de un .traj (cabecera) o de un CSV (conteo de saltos de línea por bloques)."""
+    if is_trajectory(path):
+        return Trajectory(path).nrows
+    n, last = 0, b"\n"
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(1 << 24), b""):
+            n += buf.count(b"\n")
+            last = buf[-1:]
+    n += last != b"\n"
+    return n - int(_csv_layout(path)[0])
+
+
+def open_state_stream(path, columns=STATE_COLUMNS[1:], chunksize=1 << 18, dtype=np.float64, dt_cli=None):
+    """
+    Flujo por trozos de columnas de estado de un .traj o de un CSV.
+    Devuelve (dt, chunks); cada trozo es {col: array} e incluye siempre t
+    (reconstruida con dt si el archivo no la trae). dt sale de la cabecera del
+    .traj, de la columna t del primer trozo o de dt_cli.
+    """
+    wanted = tuple(c for c in columns if c != "t")
+    if is_trajectory(path):
+        tr = Trajectory(path)
+        missing = [c for c in wanted if c not in tr]
+        if missing:
+            raise ValueError(f"{path} no contiene las columnas {missing}.")
+        raw = tr.iter_chunks((["t"] if "t" in tr else []) + list(wanted), chunksize)
+        dt = tr.dt
+    else:
+        raw = iter_csv(path, ("t",) + wanted, chunksize, dtype)
+        dt = None
+    first = next(raw, None)
+    if first is None:
+        raise ValueError(f"{path} no tiene filas.")
+    has_t = "t" in first
+    if dt is None and has_t and len(first["t"]) > 1:
+        dt = float((first["t"][-1] - first["t"][0]) / (len(first["t"]) - 1))
+    dt = dt if dt is not None else dt_cli
+    if dt is None:
+        raise ValueError("El archivo no tiene columna de tiempo ni dt; indica --dt.")
+
+    def chunks():
+        i0 = 0
+        for ch in itertools.chain([first], raw):
+            out = {c: np.asarray(ch[c], dtype=dtype) for c in wanted}
+            n = len(out[wanted[0]]) if wanted else len(ch["t"])
+            out["t"] = np.asarray(ch["t"], dtype=np.float64) if has_t else (i0 + np.arange(n)) * dt
+            i0 += n
+            yield out
+
+    return float(dt), chunks()
+
+
+def read_csv_state(path, columns=STATE_COLUMNS, dt_cli=None, dtype=np.float64, chunksize=1 << 20):
+    """
+    Carga en memoria solo las columnas pedidas de un CSV (vía iter_csv, sin DataFrame
+    completo). Devuelve ({col: array}, dt); t se reconstruye con dt_cli si falta.
+    """
+    parts = {}
+    for ch in iter_csv(path, columns, chunksize, dtype):
+        for c, v in ch.items():
+            parts.setdefault(c, []).append(v)
+    cols = {c: np.concatenate(v) for c, v in parts.items()}
+    if "t" in columns and "t" not in cols:
+        if dt_cli is None:
+            raise ValueError("CSV no tiene columna de tiempo; indica --dt.")
+        cols["t"] = np.arange(len(next(iter(cols.values())))) * dt_cli
+    t = cols.get("t")
+    dt = float(np.mean(np.diff(t))) if t is not None and len(t) > 1 else dt_cli
+    return cols, dt
+
+
+def convert_csv(csv_path, out_path, dt=None, dtype="<f8", chunksize=1 << 20):
+    """CSV heredado (t,phi,dphi,chi,dchi con o sin encabezado) -> .traj, por trozos."""
+    _, names, n_fields = _csv_layout(csv_path)
+    names = _default_names(names, n_fields)
+    capacity = count_rows(csv_path)
+    t_first = t_last = None
+    with TrajectoryWriter(out_path, {n: dtype for n in names}, capacity, dt=dt,
+                          meta=dict(source=os.path.basename(csv_path))) as w:
+        for cols in iter_csv(csv_path, None, chunksize, np.float64):
+            if "t" in cols and len(cols["t"]):
+                t_first = cols["t"][0] if t_first is None else t_first
+                t_last = cols["t"][-1]
+            w.append(**cols)
+        if dt is None and t_first is not None and w.nrows > 1:
+            w.header["dt"] = float((t_last - t_first) / (w.nrows - 1))
+    return out_path
+
+
+def _is_number(s):
+    try:
+        float(s)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description="Utilidades del formato binario de trayectorias (.traj).")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    c = sub.add_parser("convert", help="CSV heredado -> .traj")
+    c.add_argument("csv"); c.add_argument("out")
+    c.add_argument("--dt", type=float, default=None, help="Δt si el CSV no trae columna t.")
+    c.add_argument("--float32", action="store_true", help="Guardar columnas en float32.")
+    i = sub.add_parser("info", help="Muestra la cabecera de un .traj")
+    i.add_argument("path")
+    x = sub.add_parser("to-csv", help=".traj -> CSV")
+    x.add_argument("path"); x.add_argument("out")
+    args = ap.parse_args()
+
+    if args.cmd == "convert":
+        convert_csv(args.csv, args.out, dt=args.dt, dtype="<f4" if args.float32 else "<f8")
+        tr = Trajectory(args.out)
+        print(f"[OK] {tr.nrows} filas, columnas {tr.columns} → {args.out}")
+    elif args.cmd == "info":
+        tr = Trajectory(args.path)
+        print(json.dumps(dict(tr.header, nrows=tr.nrows), indent=2, ensure_ascii=False))
+    else:
+        tr = Trajectory(args.path)
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(",".join(tr.columns) + "\n")
+            for ch in tr.iter_chunks():
+                np.savetxt(f, np.column_stack([ch[n] for n in tr.columns]), delimiter=",", fmt="%.9g")
+        print(f"[OK] {tr.nrows} filas → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
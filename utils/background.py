@@ -0,0 +1,85 @@
+# 📦 utils/background.py
+#
+# Fondo cosmológico del Modelo III (code/model_III_ou_fluids.py) en forma
+# vectorizada: w(z), E(z), distancia comóvil y μ(z) para un LOTE de vectores de
+# parámetros sobre una rejilla z común. Las integrales se hacen con trapecios
+# acumulados en lugar de quad por punto, de modo que P modelos x N redshifts
+# cuestan unas pocas operaciones de numpy.
+#
+# Parámetros (claves del diccionario; escalares o arrays de forma (P,)):
+#   omega_m, tau, w0, delta_w, omega, H0
+# Universo plano: Ω_DE = 1 - Ω_m.
+
+import numpy as np
+from scipy.integrate import cumulative_trapezoid
+
+C_KMS = 299792.458  # velocidad de la luz [km/s]
+
+# Rejilla z por defecto (cubre Pantheon+, BAO y H(z) cosmic chronometers)
+Z_GRID = np.linspace(0.0, 3.0, 1201)
+
+PARAM_NAMES = ("omega_m", "tau", "w0", "delta_w", "omega", "H0")
+DEFAULTS = dict(omega_m=0.3, tau=0.5, w0=-1.0, delta_w=0.15, omega=2.0, H0=70.0)
+
+
+def as_batch(params):
+    """Dict de parámetros -> dict de arrays columna (P, 1) con defaults para lo que falte."""
+    p = dict(DEFAULTS)
+    p.update(params)
+    arrs = {k: np.atleast_1d(np.asarray(p[k], float)) for k in PARAM_NAMES}
+    P = max(a.size for a in arrs.values())
+    return {k: np.broadcast_to(a, (P,)).reshape(P, 1) for k, a in arrs.items()}
+
+
+def w_memory(z, tau, w0, delta_w, omega):
+    """w(z) = w0 + Δw · exp(-z/τ) · cos(ω·ln(1+z)), con broadcasting."""
+    return w0 + delta_w * np.exp(-z / tau) * np.cos(omega * np.log1p(z))
+
+
+def background(params, z=Z_GRID):
+    """
+    Devuelve dict con arrays (P, len(z)):
+      w, E = H/H0, D_C (comóvil, en unidades de c/H0) y mu (con H0 del lote).
+    z debe empezar en 0 y ser creciente (las integrales se acumulan desde z=0).
+    """
+    z = np.asarray(z, float)
+    if z[0] != 0.0:
+        raise ValueError("La rejilla z debe empezar en 0.")
+    p = as_batch(params)
+    w = w_memory(z, p["tau"], p["w0"], p["delta_w"], p["omega"])
+
+    # ∫₀ᶻ (1+w)/(1+z') dz'  y  E² = Ωm(1+z)³ + Ω_DE·exp(3∫...)
+    I = cumulative_trapezoid((1.0 + w) / (1.0 + z), z, axis=-1, initial=0.0)
+    E = np.sqrt(p["omega_m"] * (1.0 + z)**3 + (1.0 - p["omega_m"]) * np.exp(3.0 * I))
+
+    D_C = cumulative_trapezoid(1.0 / E, z, axis=-1, initial=0.0)
+    with np.errstate(divide="ignore"):
+        mu = 5.0 * np.log10((1.0 + z) * D_C * (C_KMS / p["H0"])) + 25.0
+    return dict(z=z, w=w, E=E, D_C=D_C, mu=mu, H0=p["H0"])
+
+
+def hubble(b):
+    """H(z) [km/s/Mpc] sobre la rejilla de un resultado de background()."""
+    return b["H0"] * b["E"]
+
+
+def dv_mpc(b):
+    """Distancia de volumen BAO D_V(z) = [z·D_M²·c/H]^(1/3) en Mpc."""
+    D_M = b["D_C"] * (C_KMS / b["H0"])
+    return np.cbrt(b["z"] * D_M**2 * C_KMS / hubble(b))
+
+
+def interp_matrix(z_grid, z_obs):
+    """Índices y pesos de interpolación lineal de z_grid a z_obs (se calculan una vez)."""
+    z_grid = np.asarray(z_grid, float)
+    z_obs = np.asarray(z_obs, float)
+    if z_obs.min() < z_grid[0] or z_obs.max() > z_grid[-1]:
+        raise ValueError("z observados fuera de la rejilla del fondo.")
+    i = np.clip(np.searchsorted(z_grid, z_obs, side="right") - 1, 0, len(z_grid) - 2)
+    t = (z_obs - z_grid[i]) / (z_grid[i + 1] - z_grid[i])
+    return i, t
+
+
+def interp_rows(y, i, t):
+    """Interpola cada fila de y (P, G) en los puntos (i, t) -> (P, N)."""
+    return y[:, i] * (1.0 - t) + y[:, i + 1] * t
@@ -0,0 +1,222 @@
+# 📦 utils/emulator.py
+#
+# Emulador (sustituto) de μ(z) y H(z) en función de los parámetros de una
+# familia de utils/fit_mcmc.py. Se entrena fuera de línea sobre un diseño
+# cuasi-aleatorio (Sobol) del prior:
+#   1) PCA de las curvas μ(z) y ln H(z) (se conservan las componentes que
+#      explican la varianza hasta pca_tol),
+#   2) regresión polinómica de los coeficientes PCA sobre una base de
+#      Chebyshev de grado total `degree` en los parámetros escalados a [-1, 1].
+# Con un conjunto de validación independiente se guarda el error máximo.
+# En consulta, los puntos fuera del dominio entrenado se evalúan de forma exacta,
+# y también todos si el error validado supera las tolerancias (tol_mu, tol_H).
+#
+# Entrenar (desde la raíz del repo):
+#   python -m utils.emulator --family memory --n-train 4096 --degree 5 \
+#       --out data/emulators/memory.npz
+
+import argparse
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+from numpy.polynomial import chebyshev
+from scipy.stats import qmc
+
+from utils import background as bg
+from utils.fit_mcmc import FAMILIES, family_background
+
+# Redshifts donde se emulan μ y H (z=0 excluido: μ diverge)
+Z_EMU = np.geomspace(0.01, 2.5, 160)
+
+# Error máximo validado admitido para servir desde el sustituto (mismo umbral
+# en μ que utils/grid_tables.DEFAULT_TOL_MU); por encima se calcula exacto.
+DEFAULT_TOL_MU = 0.02   # mag
+DEFAULT_TOL_H = 0.01    # relativo
+
+
+def exact_observables(family, theta, z=Z_EMU, z_grid=bg.Z_GRID):
+    """μ(z) [mag] y H(z) [km/s/Mpc] exactos para un lote theta (P, ndim)."""
+    b = family_background(family, theta, z_grid)
+    i, t = bg.interp_matrix(z_grid, z)
+    D_C = bg.interp_rows(b["D_C"], i, t)
+    mu = 5.0 * np.log10((1.0 + z) * D_C * (bg.C_KMS / b["H0"])) + 25.0
+    H = bg.interp_rows(bg.hubble(b), i, t)
+    return mu, H
+
+
+def _multi_indices(ndim, degree):
+    """Multi-índices de grado total <= degree."""
+    return np.array([m for m in itertools.product(range(degree + 1), repeat=ndim)
+                     if sum(m) <= degree], dtype=int)
+
+
+def _features(x, multi):
+    """Base de Chebyshev producto: x (P, ndim) en [-1,1] -> (P, n_terms)."""
+    degree = int(multi.max())
+    V = np.stack([chebyshev.chebvander(x[:, d], degree) for d in range(x.shape[1])], axis=1)
+    # V: (P, ndim, degree+1); producto sobre dimensiones de T_{m_d}(x_d)
+    return np.prod(V[:, np.arange(x.shape[1]), multi], axis=2)
+
+
+class _PCARegressor:
+    """PCA + regresión lineal en la base de features; todo en arrays (serializable)."""
+
+    def __init__(self, mean, comps, coef):
+        self.mean, self.comps, self.coef = mean, comps, coef
+
+    @classmethod
+    def fit(cls, F, Y, pca_tol=1e-10, ridge=1e-10):
+        mean = Y.mean(axis=0)
+        U, s, Vt = np.linalg.svd(Y - mean, full_matrices=False)
+        frac = 1.0 - np.cumsum(s**2) / np.sum(s**2)
+        k = int(np.searchsorted(-frac, -pca_tol) + 1)
+        comps = Vt[:k]
+        W = (Y - mean) @ comps.T
+        A = F.T @ F + ridge * np.eye(F.shape[1])
+        coef = np.linalg.solve(A, F.T @ W)
+        return cls(mean, comps, coef)
+
+    def predict(self, F):
+        return self.mean + (F @ self.coef) @ self.comps
+
+
+class Emulator:
+    """
+    Emulador entrenado de una familia: predict(theta) -> (μ, H) en Z_EMU.
+    tol_mu [mag], tol_H [relativo]: error validado admitido para servir el sustituto
+    (None: sin límite en esa magnitud).
+    """
+
+    def __init__(self, family, lo, hi, multi, z, mu_model, lnH_model, max_err=None,
+                 tol_mu=DEFAULT_TOL_MU, tol_H=DEFAULT_TOL_H):
+        self.family = family
+        self.lo, self.hi = np.asarray(lo, float), np.asarray(hi, float)
+        self.multi = multi
+        self.z = np.asarray(z, float)
+        self.mu_model = mu_model
+        self.lnH_model = lnH_model
+        self.max_err = max_err or {}
+        self.tol_mu, self.tol_H = tol_mu, tol_H
+
+    def _scale(self, theta):
+        return 2.0 * (theta - self.lo) / (self.hi - self.lo) - 1.0
+
+    def inside(self, theta):
+        theta = np.atleast_2d(theta)
+        return np.all((theta >= self.lo) & (theta <= self.hi), axis=1)
+
+    def accurate(self):
+        """True si el error validado cumple las tolerancias (sin validar: False)."""
+        return all(tol is None or self.max_err.get(key, np.inf) <= tol
+                   for key, tol in (("mu_mag", self.tol_mu), ("H_rel", self.tol_H)))
+
+    def predict_raw(self, theta):
+        """Solo el sustituto (sin comprobar dominio)."""
+        F = _features(self._scale(np.atleast_2d(np.asarray(theta, float))), self.multi)
+        return self.mu_model.predict(F), np.exp(self.lnH_model.predict(F))
+
+    def predict(self, theta):
+        """
+        μ, H para un lote; los puntos fuera del dominio entrenado se calculan exactos,
+        y todos si el emulador no cumple tol_mu / tol_H.
+        """
+        theta = np.atleast_2d(np.asarray(theta, float))
+        ok = self.inside(theta) & self.accurate()
+        mu = np.empty((theta.shape[0], self.z.size)); H = np.empty_like(mu)
+        if ok.any():
+            mu[ok], H[ok] = self.predict_raw(theta[ok])
+        if (~ok).any():
+            mu[~ok], H[~ok] = exact_observables(self.family, theta[~ok], self.z)
+        return mu, H
+
+    # --- persistencia ---
+    def save(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, family=self.family, lo=self.lo, hi=self.hi, multi=self.multi, z=self.z,
+                 mu_mean=self.mu_model.mean, mu_comps=self.mu_model.comps, mu_coef=self.mu_model.coef,
+                 H_mean=self.lnH_model.mean, H_comps=self.lnH_model.comps, H_coef=self.lnH_model.coef,
+                 max_err=json.dumps(self.max_err))
+
+    @classmethod
+    def load(cls, path, tol_mu=DEFAULT_TOL_MU, tol_H=DEFAULT_TOL_H):
+        with np.load(path) as f:
+            return cls(str(f["family"]), f["lo"], f["hi"], f["multi"], f["z"],
+                       _PCARegressor(f["mu_mean"], f["mu_comps"], f["mu_coef"]),
+                       _PCARegressor(f["H_mean"], f["H_comps"], f["H_coef"]),
+                       max_err=json.loads(str(f["max_err"])), tol_mu=tol_mu, tol_H=tol_H)
+
+
+def train(family, n_train=4096, n_valid=1024, degree=5, pca_tol=1e-10,
+          bounds=None, z=Z_EMU, seed=0, batch=1024):
+    """Entrena sobre un diseño Sobol del prior y valida en puntos independientes."""
+    names = list(FAMILIES[family])
+    box = np.array([(bounds or {}).get(k, FAMILIES[family][k]) for k in names], float)
+    lo, hi = box[:, 0], box[:, 1]
+
+    def design(n, s):
+        u = qmc.Sobol(d=len(names), scramble=True, seed=s).random(n)
+        return qmc.scale(u, lo, hi)
+
+    def evaluate(theta):
+        out = [exact_observables(family, theta[i:i + batch], z) for i in range(0, len(theta), batch)]
+        return np.concatenate([o[0] for o in out]), np.concatenate([o[1] for o in out])
+
+    t0 = time.perf_counter()
+    X = design(n_train, seed)
+    mu, H = evaluate(X)
+    multi = _multi_indices(len(names), degree)
+    if len(multi) >= n_train:
+        raise ValueError(f"Grado {degree} necesita más de {len(multi)} puntos de entrenamiento.")
+    emu = Emulator(family, lo, hi, multi, z, None, None)
+    F = _features(emu._scale(X), multi)
+    emu.mu_model = _PCARegressor.fit(F, mu, pca_tol)
+    emu.lnH_model = _PCARegressor.fit(F, np.log(H), pca_tol)
+    t_train = time.perf_counter() - t0
+
+    Xv = design(n_valid, seed + 1)
+    mu_v, H_v = evaluate(Xv)
+    mu_e, H_e = emu.predict_raw(Xv)
+    emu.max_err = dict(mu_mag=float(np.max(np.abs(mu_e - mu_v))),
+                       H_rel=float(np.max(np.abs(H_e / H_v - 1.0))),
+                       n_valid=n_valid, n_train=n_train, degree=degree,
+                       n_pca_mu=int(emu.mu_model.comps.shape[0]),
+                       n_pca_H=int(emu.lnH_model.comps.shape[0]),
+                       train_s=t_train)
+    return emu
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Entrena el emulador de μ(z), H(z) de una familia.")
+    ap.add_argument("--family", choices=list(FAMILIES), default="memory", help="Familia de modelos.")
+    ap.add_argument("--n-train", type=int, default=4096, help="Puntos del diseño de entrenamiento.")
+    ap.add_argument("--n-valid", type=int, default=1024, help="Puntos de validación.")
+    ap.add_argument("--degree", type=int, default=5, help="Grado total del polinomio de Chebyshev.")
+    ap.add_argument("--pca-tol", type=float, default=1e-10, help="Varianza residual admitida en la PCA.")
+    ap.add_argument("--seed", type=int, default=0, help="Semilla del diseño Sobol.")
+    ap.add_argument("--out", type=str, default=None, help="NPZ de salida (data/emulators/<familia>.npz).")
+    args = ap.parse_args()
+
+    out = args.out or os.path.join("data", "emulators", f"{args.family}.npz")
+    emu = train(args.family, n_train=args.n_train, n_valid=args.n_valid,
+                degree=args.degree, pca_tol=args.pca_tol, seed=args.seed)
+    emu.save(out)
+
+    theta = np.random.default_rng(0).uniform(emu.lo, emu.hi, (10000, emu.lo.size))
+    t0 = time.perf_counter()
+    emu.predict_raw(theta)
+    us = (time.perf_counter() - t0) / len(theta) * 1e6
+    e = emu.max_err
+    print(f"[OK] Emulador {args.family} → {out}\n"
+          f"     error máx (validación): μ={e['mu_mag']:.3g} mag, H={100 * e['H_rel']:.3g}%\n"
+          f"     PCA: {e['n_pca_mu']} (μ), {e['n_pca_H']} (H) | consulta: {us:.2f} µs/punto")
+    if not emu.accurate():
+        print(f"[!] {args.family}: error > tolerancia (μ {DEFAULT_TOL_MU} mag, H {100 * DEFAULT_TOL_H:g}%); "
+              f"predict() usará el cálculo exacto. Aumenta --n-train / --degree.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+# 📦 utils/fisher.py
+#
+# Pronósticos de Fisher para los parámetros de w_memory (Modelo III).
+# Las derivadas de μ(z), H(z) y D_V(z) respecto a TODOS los parámetros se
+# obtienen en una sola pasada vectorizada del fondo (utils/background.py):
+#   - "central": lote con θ ± h_i e_i (2·ndim + 1 modelos)
+#   - "complex": paso complejo θ + i·h e_i (ndim modelos, sin error de cancelación)
+# Después cada survey solo interpola esas derivadas a sus redshifts y suma
+# JᵀC⁻¹J, así que cientos de configuraciones cuestan segundos.
+#
+# Formato de un survey (dict / JSON):
+#   {"name": "SNe+BAO",
+#    "sne": {"z_min": 0.01, "z_max": 1.5, "n": 2000, "sigma_mu": 0.12},
+#    "bao": {"z": [0.3, 0.5, 0.7, 1.0], "frac_err": 0.01},
+#    "hz":  {"z": [0.2, 0.6, 1.2], "frac_err": 0.03}}
+# En SNe se añade el offset de magnitud M como parámetro de ruido y se marginaliza.
+#
+# Ejemplo:
+#   python -m utils.fisher --fiducial delta_w=0.15,omega=2 --surveys data/surveys.json
+
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+from scipy.integrate import cumulative_trapezoid
+
+from utils import background as bg
+
+FIDUCIAL = dict(bg.DEFAULTS)
+
+# Pasos relativos (o absolutos si el valor fiducial es 0)
+STEP = 1e-4
+
+EXAMPLE_SURVEYS = [
+    {"name": "SNe (Pantheon+-like)",
+     "sne": {"z_min": 0.01, "z_max": 2.3, "n": 1700, "sigma_mu": 0.15}},
+    {"name": "SNe + BAO (DESI-like)",
+     "sne": {"z_min": 0.01, "z_max": 2.3, "n": 1700, "sigma_mu": 0.15},
+     "bao": {"z": [0.3, 0.51, 0.71, 0.93, 1.32, 1.49, 2.33], "frac_err": 0.01}},
+    {"name": "SNe + BAO + H(z)",
+     "sne": {"z_min": 0.01, "z_max": 2.3, "n": 1700, "sigma_mu": 0.15},
+     "bao": {"z": [0.3, 0.51, 0.71, 0.93, 1.32, 1.49, 2.33], "frac_err": 0.01},
+     "hz": {"z": [0.1, 0.3, 0.5, 0.7, 0.9, 1.2, 1.5, 1.8], "frac_err": 0.05}},
+]
+
+
+def _observables(b):
+    """μ, H y D_V sobre la rejilla (μ depende de H0; en SNe el offset M absorbe esa dependencia)."""
+    z = b["z"]
+    D_M = b["D_C"] * (bg.C_KMS / b["H0"])
+    H = b["H0"] * b["E"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mu = 5.0 * np.log10((1.0 + z) * D_M) + 25.0
+        DV = (z * D_M**2 * bg.C_KMS / H)**(1.0 / 3.0)
+    return {"mu": mu, "H": H, "DV": DV}
+
+
+def _complex_background(params, z):
+    """Versión de background() que admite parámetros complejos (paso complejo)."""
+    p = {k: np.asarray(v).reshape(-1, 1) for k, v in params.items()}
+    w = bg.w_memory(z, p["tau"], p["w0"], p["delta_w"], p["omega"])
+    I = cumulative_trapezoid((1.0 + w) / (1.0 + z), z, axis=-1, initial=0.0)
+    E = np.sqrt(p["omega_m"] * (1.0 + z)**3 + (1.0 - p["omega_m"]) * np.exp(3.0 * I))
+    D_C = cumulative_trapezoid(1.0 / E, z, axis=-1, initial=0.0)
+    return dict(z=z, E=E, D_C=D_C, H0=p["H0"])
+
+
+def derivatives(fiducial=None, names=None, z=None, method="central", step=STEP):
+    """
+    Derivadas ∂O/∂θ_i en la rejilla z para O ∈ {mu, H, DV}.
+    Devuelve (names, z, fid_obs, derivs) con derivs[O] de forma (ndim, len(z)).
+    """
+    fid = dict(FIDUCIAL, **(fiducial or {}))
+    names = list(names or bg.PARAM_NAMES)
+    z = bg.Z_GRID if z is None else np.asarray(z, float)
+    x0 = np.array([fid[k] for k in names], float)
+    h = np.where(x0 != 0, step * np.abs(x0), step)
+    nd = len(names)
+
+    if method == "complex":
+        theta = np.tile(x0, (nd + 1, 1)).astype(complex)
+        theta[1:] += 1j * np.diag(h)
+        b = _complex_background(dict(fid, **{k: theta[:, i] for i, k in enumerate(names)}), z)
+        obs = _observables(b)
+        fid_obs = {k: v[0].real for k, v in obs.items()}
+        derivs = {k: v[1:].imag / h[:, None] for k, v in obs.items()}
+    else:
+        theta = np.tile(x0, (2 * nd + 1, 1))
+        theta[1:nd + 1] += np.diag(h)
+        theta[nd + 1:] -= np.diag(h)
+        b = bg.background(dict(fid, **{k: theta[:, i] for i, k in enumerate(names)}), z)
+        obs = _observables(b)
+        fid_obs = {k: v[0] for k, v in obs.items()}
+        with np.errstate(invalid="ignore"):  # μ(z=0) = -inf
+            derivs = {k: (v[1:nd + 1] - v[nd + 1:]) / (2.0 * h[:, None]) for k, v in obs.items()}
+    return names, z, fid_obs, derivs
+
+
+def _block(z_obs, sigma, key, z, fid_obs, derivs):
+    """Contribución JᵀC⁻¹J de un observable con errores diagonales."""
+    i, t = bg.interp_matrix(z, z_obs)
+    J = derivs[key][:, i] * (1.0 - t) + derivs[key][:, i + 1] * t  # (ndim, N)
+    return (J / sigma**2) @ J.T, J, sigma
+
+
+def survey_fisher(survey, names, z, fid_obs, derivs):
+    """Matriz de Fisher de un survey (con M marginalizado si hay SNe)."""
+    nd = len(names)
+    F = np.zeros((nd, nd))
+    if "sne" in survey:
+        s = survey["sne"]
+        z_sn = np.asarray(s["z"], float) if "z" in s else np.linspace(s["z_min"], s["z_max"], int(s["n"]))
+        sig = np.broadcast_to(np.asarray(s["sigma_mu"], float), z_sn.shape)
+        _, J, _ = _block(z_sn, sig, "mu", z, fid_obs, derivs)
+        # Parámetro extra M (∂μ/∂M = 1) y marginalización por complemento de Schur
+        Jm = np.vstack([J, np.ones_like(z_sn)])
+        Fm = (Jm / sig**2) @ Jm.T
+        F += Fm[:nd, :nd] - np.outer(Fm[:nd, nd], Fm[nd, :nd]) / Fm[nd, nd]
+    for key, obs in (("bao", "DV"), ("hz", "H")):
+        if key in survey:
+            s = survey[key]
+            z_o = np.asarray(s["z"], float)
+            i, t = bg.interp_matrix(z, z_o)
+            val = fid_obs[obs][i] * (1.0 - t) + fid_obs[obs][i + 1] * t
+            sig = np.asarray(s["frac_err"], float) * val if "frac_err" in s else np.asarray(s["sigma"], float)
+            F += _block(z_o, np.broadcast_to(sig, z_o.shape), obs, z, fid_obs, derivs)[0]
+    return F
+
+
+def marginal_errors(F, priors=None, names=None):
+    """σ marginalizados sqrt(diag(F⁻¹)); priors = {nombre: σ_prior} se suman a la diagonal."""
+    F = np.array(F, float)
+    if priors:
+        for k, s in priors.items():
+            i = names.index(k)
+            F[i, i] += 1.0 / s**2
+    # Direcciones no restringidas (autovalores ~0, p.ej. H0 con solo SNe) -> σ infinito
+    lam, V = np.linalg.eigh(F)
+    free = lam <= 1e-12 * max(lam.max(), 1e-300)
+    inv = np.where(free, 0.0, 1.0 / np.where(free, 1.0, lam))
+    cov = (V * inv) @ V.T
+    var = np.diag(cov).copy()
+    var[np.any(np.abs(V[:, free]) > 1e-6, axis=1)] = np.inf
+    return np.sqrt(np.clip(var, 0.0, None)), cov
+
+
+def forecast(surveys, fiducial=None, names=None, method="central", priors=None):
+    """Lista de dicts {name, sigma_<param>..., cond_<param>...} para cada survey."""
+    names, z, fid_obs, derivs = derivatives(fiducial, names, method=method)
+    fid = dict(FIDUCIAL, **(fiducial or {}))
+    rows = []
+    for s in surveys:
+        F = survey_fisher(s, names, z, fid_obs, derivs)
+        sig, _ = marginal_errors(F, priors, names)
+        row = {"name": s.get("name", "")}
+        for k, sk, Fkk in zip(names, sig, np.diag(F)):
+            row[f"sigma_{k}"] = float(sk)
+            row[f"cond_{k}"] = float(1.0 / np.sqrt(Fkk)) if Fkk > 0 else np.inf
+        if "delta_w" in names:
+            row["snr_delta_w"] = float(fid["delta_w"] / row["sigma_delta_w"]) if row["sigma_delta_w"] > 0 else np.inf
+        rows.append(row)
+    return rows
+
+
+def _parse_kv(s):
+    out = {}
+    for item in filter(None, (x.strip() for x in s.split(","))):
+        k, v = item.split("=")
+        out[k.strip()] = float(v)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pronósticos de Fisher para w_memory.")
+    ap.add_argument("--fiducial", type=_parse_kv, default={}, help="p.ej. delta_w=0.15,omega=2")
+    ap.add_argument("--params", type=str, default=",".join(bg.PARAM_NAMES), help="Parámetros libres.")
+    ap.add_argument("--priors", type=_parse_kv, default={}, help="Priors gaussianos σ, p.ej. H0=1.0")
+    ap.add_argument("--surveys", type=str, default=None, help="JSON con lista de surveys.")
+    ap.add_argument("--method", choices=["central", "complex"], default="complex", help="Derivadas.")
+    ap.add_argument("--out-csv", type=str, default="assets/fisher-forecast.csv", help="CSV de salida.")
+    args = ap.parse_args()
+
+    if args.surveys:
+        with open(args.surveys, "r", encoding="utf-8") as f:
+            surveys = json.load(f)
+    else:
+        surveys = EXAMPLE_SURVEYS
+    names = [k.strip() for k in args.params.split(",") if k.strip()]
+
+    t0 = time.perf_counter()
+    rows = forecast(surveys, args.fiducial, names, method=args.method, priors=args.priors)
+    elapsed = time.perf_counter() - t0
+
+    if os.path.dirname(args.out_csv):
+        os.makedirs(os.path.dirname(args.out_csv), exist_ok=True)
+    with open(args.out_csv, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+    for r in rows[:20]:
+        errs = ", ".join(f"σ({k})={r[f'sigma_{k}']:.3g}" for k in names)
+        snr = f" | Δw/σ = {r['snr_delta_w']:.2f}" if "snr_delta_w" in r else ""
+        print(f"{r['name']}: {errs}{snr}")
+    print(f"[OK] {len(rows)} surveys en {elapsed:.2f}s → {args.out_csv}")
+
+
+if __name__ == "__main__":
+    main()
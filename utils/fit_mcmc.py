@@ -0,0 +1,293 @@
+# 📦 utils/fit_mcmc.py
+#
+# Ajuste bayesiano (emcee) de las familias de modelos contra datos locales:
+#   lcdm    — ΛCDM plano (Ω_m, H0)
+#   memory  — w_memory del Modelo III (Ω_m, H0, w0, Δw, ω, τ)
+#   pt      — PT-simétrico de Simulator_tau.py (src.cosmology)
+#   fluid   — Fluido con memoria de Simulator_tau.py (src.cosmology)
+#
+# Datos (cualquier combinación):
+#   --sne  catálogo Pantheon+ (+ --sne-cov)           -> utils/likelihood_sne.py
+#   --bao  tabla z, D_V/r_d, σ                         (r_d fijo con --rd)
+#   --hz   tabla z, H(z) [km/s/Mpc], σ
+#
+# La log-posterior está vectorizada (emcee vectorize=True): todos los walkers se
+# evalúan en un solo lote sobre una rejilla z común. Con --pool N se usa en su
+# lugar un pool de procesos (una evaluación por walker). La cadena se guarda
+# cada --checkpoint-every pasos y el ajuste se reanuda desde ese archivo.
+#
+# Ejemplo (desde la raíz del repo):
+#   python -m utils.fit_mcmc --family memory --sne data/Pantheon+SH0ES.dat \
+#       --sne-cov data/Pantheon+SH0ES_STAT+SYS.cov --hz data/hz.txt --steps 5000
+
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from utils import background as bg
+from utils.likelihood_sne import SNeLikelihood
+
+try:
+    import emcee
+except ImportError:
+    emcee = None
+
+# Nombres y priors planos (mín, máx) por familia
+FAMILIES = {
+    "lcdm": {
+        "omega_m": (0.05, 0.6), "H0": (50.0, 90.0),
+    },
+    "memory": {
+        "omega_m": (0.05, 0.6), "H0": (50.0, 90.0), "w0": (-1.5, -0.5),
+        "delta_w": (0.0, 0.5), "omega": (0.0, 10.0), "tau": (0.05, 5.0),
+    },
+    "pt": {
+        "Om": (0.05, 0.6), "H0": (50.0, 90.0), "A": (0.0, 0.3), "omega": (0.0, 10.0),
+        "z_tau": (0.1, 5.0), "delta": (0.0, 2 * np.pi), "b_over_a": (0.0, 1.0),
+    },
+    "fluid": {
+        "Om": (0.05, 0.6), "H0": (50.0, 90.0), "A": (0.0, 0.3), "omega": (0.0, 10.0),
+        "z_tau": (0.1, 5.0), "delta": (0.0, 2 * np.pi), "tau_mem": (0.1, 3.0),
+    },
+}
+
+SIM_TAU_MODELS = {"pt": "PT-simétrico", "fluid": "Fluido con memoria"}
+
+
+# ----------------- Fondo por familia -----------------
+def family_background(family, theta, z=bg.Z_GRID):
+    """Fondo (dict con z, E, D_C, H0) para un lote theta de forma (P, ndim)."""
+    names = list(FAMILIES[family])
+    theta = np.atleast_2d(theta)
+    params = {k: theta[:, i] for i, k in enumerate(names)}
+    if family == "lcdm":
+        return bg.background(dict(params, delta_w=0.0, w0=-1.0), z)
+    if family == "memory":
+        return bg.background(params, z)
+
+    # Familias de Simulator_tau: E(z) solo existe por punto -> bucle sobre el lote
+    from scipy.integrate import cumulative_trapezoid
+    from utils.grid_tables import Ez_curve
+    model = SIM_TAU_MODELS[family]
+    E = np.stack([Ez_curve(model, {k: float(v[j]) for k, v in params.items()}, z)
+                  for j in range(theta.shape[0])])
+    D_C = cumulative_trapezoid(1.0 / E, z, axis=-1, initial=0.0)
+    return dict(z=np.asarray(z, float), E=E, D_C=D_C, H0=params["H0"].reshape(-1, 1))
+
+
+# ----------------- Verosimilitudes BAO y H(z) -----------------
+def load_points(path):
+    """Tabla de texto con columnas z, valor, σ (comentarios con #)."""
+    arr = np.loadtxt(path, comments="#", ndmin=2)
+    return arr[:, 0], arr[:, 1], arr[:, 2]
+
+
+class PointsLikelihood:
+    """χ² diagonal de un observable interpolado desde la rejilla del fondo."""
+
+    def __init__(self, z, y, sigma, observable, z_grid=bg.Z_GRID):
+        self.z, self.y, self.sigma = (np.asarray(a, float) for a in (z, y, sigma))
+        self.observable = observable
+        self._i, self._t = bg.interp_matrix(z_grid, self.z)
+
+    def loglike_background(self, b):
+        model = bg.interp_rows(self.observable(b), self._i, self._t)
+        return -0.5 * np.sum(((self.y - model) / self.sigma)**2, axis=1)
+
+
+class DVOverRd:
+    """Observable D_V/r_d (clase y no lambda para poder enviarse al pool)."""
+
+    def __init__(self, rd):
+        self.rd = rd
+
+    def __call__(self, b):
+        return bg.dv_mpc(b) / self.rd
+
+
+def bao_likelihood(path, rd=147.09, z_grid=bg.Z_GRID):
+    z, y, s = load_points(path)
+    return PointsLikelihood(z, y, s, DVOverRd(rd), z_grid)
+
+
+def hz_likelihood(path, z_grid=bg.Z_GRID):
+    z, y, s = load_points(path)
+    return PointsLikelihood(z, y, s, bg.hubble, z_grid)
+
+
+# ----------------- Posterior -----------------
+class LogPosterior:
+    """log p(θ|datos) vectorizada: θ (P, ndim) -> (P,). Picklable para el pool."""
+
+    def __init__(self, family, likelihoods, z_grid=bg.Z_GRID):
+        self.family = family
+        self.likelihoods = likelihoods
+        self.z_grid = z_grid
+        bounds = np.array(list(FAMILIES[family].values()), float)
+        self.lo, self.hi = bounds[:, 0], bounds[:, 1]
+
+    def __call__(self, theta):
+        theta = np.asarray(theta, float)
+        single = theta.ndim == 1
+        theta = np.atleast_2d(theta)
+        lp = np.full(theta.shape[0], -np.inf)
+        ok = np.all((theta >= self.lo) & (theta <= self.hi), axis=1)
+        if ok.any():
+            b = family_background(self.family, theta[ok], self.z_grid)
+            ll = sum(L.loglike_background(b) for L in self.likelihoods)
+            lp[ok] = np.where(np.isfinite(ll), ll, -np.inf)
+        return lp[0] if single else lp
+
+
+# ----------------- Checkpoints -----------------
+def save_checkpoint(path, chain, log_prob, random_state, meta):
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, chain=chain, log_prob=log_prob,
+             random_state=np.array(random_state, dtype=object),
+             meta=json.dumps(meta))
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    with np.load(path, allow_pickle=True) as f:
+        return (f["chain"], f["log_prob"], tuple(f["random_state"]),
+                json.loads(str(f["meta"])))
+
+
+# ----------------- Ajuste -----------------
+def run_fit(family, likelihoods, nwalkers=32, steps=2000, checkpoint=None,
+            checkpoint_every=100, pool_size=0, seed=0, z_grid=bg.Z_GRID):
+    """
+    Muestrea la posterior; reanuda desde checkpoint si existe.
+    Devuelve (chain (steps, walkers, ndim), log_prob, stats).
+    """
+    if emcee is None:
+        raise RuntimeError("Se requiere emcee (pip install emcee).")
+    names = list(FAMILIES[family])
+    ndim = len(names)
+    log_post = LogPosterior(family, likelihoods, z_grid)
+    meta = dict(family=family, names=names, nwalkers=nwalkers)
+
+    chain_prev = np.empty((0, nwalkers, ndim)); lp_prev = np.empty((0, nwalkers))
+    random_state = None
+    if checkpoint and os.path.exists(checkpoint):
+        chain_prev, lp_prev, random_state, meta_prev = load_checkpoint(checkpoint)
+        if meta_prev["family"] != family or meta_prev["nwalkers"] != nwalkers:
+            raise ValueError(f"Checkpoint {checkpoint} no corresponde a esta configuración.")
+        print(f"[OK] Reanudando desde {checkpoint}: {len(chain_prev)} pasos hechos.")
+    remaining = steps - len(chain_prev)
+    if remaining <= 0:
+        return chain_prev, lp_prev, dict(samples_per_s=np.nan, elapsed_s=0.0)
+
+    if len(chain_prev):
+        p0 = chain_prev[-1]
+    else:
+        # Walkers iniciales: bola pequeña en el centro del prior
+        rng = np.random.default_rng(seed)
+        center = 0.5 * (log_post.lo + log_post.hi)
+        width = 0.02 * (log_post.hi - log_post.lo)
+        p0 = center + width * rng.standard_normal((nwalkers, ndim))
+
+    pool = Pool(pool_size) if pool_size > 0 else None
+    try:
+        sampler = emcee.EnsembleSampler(nwalkers, ndim, log_post,
+                                        vectorize=pool is None, pool=pool)
+        if random_state is not None:
+            sampler.random_state = random_state
+        else:
+            sampler.random_state = np.random.RandomState(seed).get_state()
+
+        t0 = time.perf_counter()
+        done = 0
+        while done < remaining:
+            n = min(checkpoint_every, remaining - done)
+            state = sampler.run_mcmc(p0, n, progress=False)
+            p0 = state
+            done += n
+            rate = nwalkers * done / (time.perf_counter() - t0)
+            chain = np.concatenate([chain_prev, sampler.get_chain()])
+            log_prob = np.concatenate([lp_prev, sampler.get_log_prob()])
+            if checkpoint:
+                save_checkpoint(checkpoint, chain, log_prob, sampler.random_state, meta)
+            print(f"  paso {len(chain)}/{steps} | {rate:.1f} muestras/s | "
+                  f"aceptación {np.mean(sampler.acceptance_fraction):.2f}")
+        elapsed = time.perf_counter() - t0
+    finally:
+        if pool is not None:
+            pool.close()
+
+    stats = dict(samples_per_s=nwalkers * remaining / elapsed, elapsed_s=elapsed,
+                 acceptance=float(np.mean(sampler.acceptance_fraction)))
+    return chain, log_prob, stats
+
+
+def summarize(chain, names, burn=0.25):
+    """Mediana y percentiles 16/84 tras descartar la fracción burn inicial."""
+    flat = chain[int(burn * len(chain)):].reshape(-1, chain.shape[-1])
+    q = np.percentile(flat, [16, 50, 84], axis=0)
+    return {k: (q[1, i], q[1, i] - q[0, i], q[2, i] - q[1, i]) for i, k in enumerate(names)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Ajuste MCMC (emcee) de lcdm/memory/pt/fluid.")
+    ap.add_argument("--family", choices=list(FAMILIES), default="memory", help="Familia de modelos.")
+    ap.add_argument("--sne", type=str, default=None, help="Catálogo SNe formato Pantheon+.")
+    ap.add_argument("--sne-cov", type=str, default=None, help="Covarianza STAT+SYS de las SNe.")
+    ap.add_argument("--bao", type=str, default=None, help="Tabla z, D_V/r_d, σ.")
+    ap.add_argument("--rd", type=float, default=147.09, help="r_d [Mpc] para BAO.")
+    ap.add_argument("--hz", type=str, default=None, help="Tabla z, H(z), σ.")
+    ap.add_argument("--nwalkers", type=int, default=32, help="Walkers de emcee.")
+    ap.add_argument("--steps", type=int, default=2000, help="Pasos totales (incluye los ya hechos).")
+    ap.add_argument("--pool", type=int, default=0, help="Procesos (0 = log-posterior vectorizada).")
+    ap.add_argument("--checkpoint", type=str, default="assets/mcmc-chain.npz", help="Archivo de checkpoint.")
+    ap.add_argument("--checkpoint-every", type=int, default=100, help="Pasos entre checkpoints.")
+    ap.add_argument("--burn", type=float, default=0.25, help="Fracción descartada en el resumen.")
+    ap.add_argument("--seed", type=int, default=0, help="Semilla RNG.")
+    ap.add_argument("--out-txt", type=str, default="assets/mcmc-summary.txt", help="TXT resumen.")
+    ap.add_argument("--corner", type=str, default=None, help="PNG corner plot (requiere corner).")
+    args = ap.parse_args()
+
+    likelihoods = []
+    if args.sne:
+        likelihoods.append(SNeLikelihood.from_files(args.sne, args.sne_cov))
+    if args.bao:
+        likelihoods.append(bao_likelihood(args.bao, rd=args.rd))
+    if args.hz:
+        likelihoods.append(hz_likelihood(args.hz))
+    if not likelihoods:
+        raise ValueError("Indica al menos un conjunto de datos (--sne, --bao o --hz).")
+
+    for path in (args.checkpoint, args.out_txt):
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    chain, _, stats = run_fit(args.family, likelihoods, nwalkers=args.nwalkers,
+                              steps=args.steps, checkpoint=args.checkpoint,
+                              checkpoint_every=args.checkpoint_every,
+                              pool_size=args.pool, seed=args.seed)
+    names = list(FAMILIES[args.family])
+    summary = summarize(chain, names, burn=args.burn)
+
+    with open(args.out_txt, "w", encoding="utf-8") as f:
+        f.write(f"Ajuste MCMC — familia {args.family}, {args.nwalkers} walkers, {len(chain)} pasos\n")
+        for k, (m, lo, hi) in summary.items():
+            f.write(f"{k:>9} = {m:.5g} -{lo:.3g} +{hi:.3g}\n")
+        f.write(f"Rendimiento: {stats['samples_per_s']:.1f} muestras/s "
+                f"({stats['elapsed_s']:.1f} s en esta sesión)\n")
+    print(f"[OK] Resumen: {args.out_txt}\n[OK] Cadena: {args.checkpoint}\n"
+          f"[OK] {stats['samples_per_s']:.1f} muestras/s")
+
+    if args.corner:
+        import corner
+        flat = chain[int(args.burn * len(chain)):].reshape(-1, len(names))
+        fig = corner.corner(flat, labels=names)
+        fig.savefig(args.corner, dpi=150)
+        print(f"[OK] Corner: {args.corner}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# 📦 utils/grid_tables.py
+#
+# Tablas precalculadas de E(z) y μ(z) sobre las rejillas de los sliders de
+# Simulator_tau.py, guardadas como arrays .npy mapeados en memoria e
+# interpoladas de forma multilineal. Fuera del dominio tabulado (o si el error
+# validado de la tabla supera la tolerancia) se recurre al cálculo exacto.
+#
+# Precalcular (una vez, desde la raíz del repo):
+#   python -m utils.grid_tables --out data/tables --workers 8
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.cosmology.common import Ez_LCDM, mu_theory
+from src.cosmology.model_pt import Ez_PT
+from src.cosmology.model_fluid import Ez_FLUID
+
+DEFAULT_DIR = os.path.join("data", "tables")
+
+# Rejilla de z que usa la app (debe coincidir para servir desde tabla)
+Z_GRID = np.linspace(0, 2.0, 400)
+
+MODEL_FUNCS = {
+    "LCDM": Ez_LCDM,
+    "PT-simétrico": Ez_PT,
+    "Fluido con memoria": Ez_FLUID,
+}
+
+# Parámetros de los que depende cada modelo (orden = ejes de la tabla)
+MODEL_AXES = {
+    "LCDM": ["Om", "H0"],
+    "PT-simétrico": ["Om", "H0", "A", "omega", "z_tau", "delta", "b_over_a"],
+    "Fluido con memoria": ["Om", "H0", "A", "omega", "z_tau", "delta", "tau_mem"],
+}
+
+# Nodos por eje: (mín, máx, n) sobre el rango de cada slider. El término
+# cos(ω ln(1+z) + δ) es el que más curva: ω cada 0.5 y δ cada π/6; los demás
+# ejes, más suaves, con pocos nodos (~125 MB por tabla float32 de PT/Fluido).
+DEFAULT_NODES = {
+    "Om": (0.15, 0.45, 4),
+    "H0": (60.0, 78.0, 3),
+    "A": (0.0, 0.3, 3),
+    "omega": (0.0, 10.0, 21),
+    "z_tau": (0.1, 5.0, 4),
+    "delta": (0.0, 6.283, 13),
+    "b_over_a": (0.0, 1.0, 2),
+    "tau_mem": (0.1, 3.0, 2),
+}
+
+# Error máximo validado admitido en μ [mag] para servir desde tabla
+DEFAULT_TOL_MU = 0.02
+
+# Valores neutros para parámetros que un modelo no usa
+NEUTRAL = dict(Om=0.315, H0=70.0, A=0.0, omega=0.0, z_tau=1.0, delta=0.0,
+               b_over_a=0.0, tau_mem=1.0)
+
+
+def _slug(model):
+    return {"LCDM": "lcdm", "PT-simétrico": "pt", "Fluido con memoria": "fluid"}[model]
+
+
+def Ez_curve(model, p, z=Z_GRID):
+    """E(z) del modelo para un punto de parámetros (faltantes -> NEUTRAL)."""
+    q = dict(NEUTRAL)
+    q.update(p)
+    Ez_fn = MODEL_FUNCS[model]
+    if model == "LCDM":
+        Ez = Ez_fn(z, Om=q["Om"])
+    elif model == "PT-simétrico":
+        Ez = Ez_fn(z, Om=q["Om"], H0=q["H0"], A=q["A"], omega=q["omega"],
+                   z_tau=q["z_tau"], delta=q["delta"], b_over_a=q["b_over_a"])
+    else:
+        Ez = Ez_fn(z, Om=q["Om"], H0=q["H0"], A=q["A"], omega=q["omega"],
+                   z_tau=q["z_tau"], delta=q["delta"], tau_mem=q["tau_mem"])
+    return np.asarray(Ez, float)
+
+
+def exact_curves(model, p, z=Z_GRID):
+    """Cálculo directo de E(z) y μ(z) (mismo camino que la app sin tablas)."""
+    q = dict(NEUTRAL)
+    q.update(p)
+    Ez_fn = MODEL_FUNCS[model]
+    Ez = Ez_curve(model, q, z)
+    mu = mu_theory(z, H0=q["H0"], Ez_fn=Ez_fn,
+                   Om=q["Om"], A=q["A"], omega=q["omega"], z_tau=q["z_tau"],
+                   delta=q["delta"], b_over_a=q["b_over_a"], tau_mem=q["tau_mem"])
+    return np.asarray(Ez, float), np.asarray(mu, float)
+
+
+class GridTable:
+    """Tabla de un modelo: nodos por eje + arrays (n_nodos, n_z) en memmap."""
+
+    __slots__ = ("model", "axes", "nodes", "z", "Ez", "mu", "max_err")
+
+    def __init__(self, model, axes, nodes, z, Ez, mu, max_err=None):
+        self.model = model
+        self.axes = list(axes)
+        self.nodes = [np.asarray(n, float) for n in nodes]
+        self.z = np.asarray(z, float)
+        self.Ez = Ez
+        self.mu = mu
+        self.max_err = max_err or {}
+
+    @property
+    def shape(self):
+        return tuple(len(n) for n in self.nodes)
+
+    def covers(self, p, z=None):
+        """True si el punto p (y la rejilla z) cae dentro del dominio tabulado."""
+        if z is not None and (len(z) != len(self.z) or not np.allclose(z, self.z)):
+            return False
+        for ax, nodes in zip(self.axes, self.nodes):
+            v = p.get(ax, NEUTRAL[ax])
+            if not (nodes[0] - 1e-12 <= v <= nodes[-1] + 1e-12):
+                return False
+        return True
+
+    def _corners(self, p):
+        """Índices planos y pesos de los 2^d vértices de la celda que contiene p."""
+        lo, w = [], []
+        for ax, nodes in zip(self.axes, self.nodes):
+            v = float(p.get(ax, NEUTRAL[ax]))
+            if len(nodes) == 1:
+                lo.append(0); w.append(0.0)
+                continue
+            i = int(np.clip(np.searchsorted(nodes, v, side="right") - 1, 0, len(nodes) - 2))
+            lo.append(i)
+            w.append((v - nodes[i]) / (nodes[i + 1] - nodes[i]))
+        lo = np.array(lo); w = np.clip(np.array(w), 0.0, 1.0)
+
+        bits = np.array(list(itertools.product((0, 1), repeat=len(lo))))  # (2^d, d)
+        idx = np.minimum(lo + bits, np.array(self.shape) - 1)
+        weights = np.prod(np.where(bits == 1, w, 1.0 - w), axis=1)
+        flat = np.ravel_multi_index(idx.T, self.shape)
+        return flat, weights
+
+    def interpolate(self, p):
+        """E(z), μ(z) por interpolación multilineal (solo lee 2^d filas del disco)."""
+        flat, weights = self._corners(p)
+        Ez = weights @ np.asarray(self.Ez[flat], float)
+        rows = np.asarray(self.mu[flat], float)
+        finite = np.isfinite(rows).all(axis=0)  # μ(z=0) = -inf en todas las filas
+        mu = np.where(finite, weights @ np.where(np.isfinite(rows), rows, 0.0), rows[0])
+        return Ez, mu
+
+
+def curves(model, p, z=Z_GRID, table=None, tol=DEFAULT_TOL_MU, exact=exact_curves):
+    """
+    E(z), μ(z) y el origen del resultado ("tabla" | "exacto").
+    tol: error máximo validado admitido en μ [mag]; si la tabla no lo cumple se usa el exacto
+         (None: servir la tabla sea cual sea su error).
+    exact: función (model, p, z) -> (Ez, mu) para el cálculo exacto (p. ej. job_server.remote_exact).
+    """
+    if table is not None and table.covers(p, z):
+        if tol is None or table.max_err.get("mu", np.inf) <= tol:
+            Ez, mu = table.interpolate(p)
+            return Ez, mu, "tabla"
+    Ez, mu = exact(model, p, z)
+    return Ez, mu, "exacto"
+
+
+# ----------------- Carga -----------------
+def load_table(model, root=DEFAULT_DIR):
+    """Abre la tabla de un modelo en modo memmap; None si no existe."""
+    d = os.path.join(root, _slug(model))
+    meta_path = os.path.join(d, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return _open_table(model, d, meta["axes"], meta["nodes"], meta["z"], meta.get("max_err"))
+
+
+def _open_table(model, d, axes, nodes, z, max_err=None):
+    Ez = np.load(os.path.join(d, "Ez.npy"), mmap_mode="r")
+    mu = np.load(os.path.join(d, "mu.npy"), mmap_mode="r")
+    return GridTable(model, axes, nodes, z, Ez, mu, max_err=max_err)
+
+
+def load_tables(root=DEFAULT_DIR):
+    """Diccionario modelo -> GridTable (o None si no hay tabla precalculada)."""
+    return {m: load_table(m, root) for m in MODEL_FUNCS}
+
+
+# ----------------- Precálculo -----------------
+def _node_values(nodes_spec, axes):
+    return [np.linspace(*nodes_spec[ax][:2], int(nodes_spec[ax][2])) for ax in axes]
+
+
+def _fill_rows(args):
+    """Worker: calcula un bloque de filas y lo escribe en los memmap."""
+    model, d, axes, nodes, start, stop = args
+    shape = tuple(len(n) for n in nodes)
+    Ez_mm = np.load(os.path.join(d, "Ez.npy"), mmap_mode="r+")
+    mu_mm = np.load(os.path.join(d, "mu.npy"), mmap_mode="r+")
+    for k in range(start, stop):
+        idx = np.unravel_index(k, shape)
+        p = {ax: float(n[i]) for ax, n, i in zip(axes, nodes, idx)}
+        Ez_mm[k], mu_mm[k] = exact_curves(model, p)
+    Ez_mm.flush(); mu_mm.flush()
+    return stop - start
+
+
+def _errors(table, p):
+    E_t, mu_t = table.interpolate(p)
+    E_x, mu_x = exact_curves(table.model, p)
+    return (float(np.nanmax(np.abs(E_t - E_x))),
+            float(np.nanmax(np.abs(mu_t[1:] - mu_x[1:]))))  # μ(0) diverge
+
+
+def _validate(table, n_check=64, seed=0):
+    """
+    Error máximo |tabla - exacto| en puntos aleatorios entre nodos y en los centros
+    de todas las celdas (ω, δ), donde el término oscilante maximiza el error
+    multilineal (resto de ejes al azar). "mu" es el máximo de ambos.
+    """
+    rng = np.random.default_rng(seed)
+
+    def draw():
+        return {ax: float(rng.uniform(n[0], n[-1])) for ax, n in zip(table.axes, table.nodes)}
+
+    err_E, err_mu = 0.0, 0.0
+    for _ in range(n_check):
+        e, m = _errors(table, draw())
+        err_E, err_mu = max(err_E, e), max(err_mu, m)
+
+    err_E_mid, err_mu_mid, n_mid = 0.0, 0.0, 0
+    if "omega" in table.axes and "delta" in table.axes:
+        nodes = dict(zip(table.axes, table.nodes))
+        mids = [0.5*(n[1:] + n[:-1]) for n in (nodes["omega"], nodes["delta"])]
+        for om, de in itertools.product(*mids):
+            e, m = _errors(table, dict(draw(), omega=float(om), delta=float(de)))
+            err_E_mid, err_mu_mid = max(err_E_mid, e), max(err_mu_mid, m)
+            n_mid += 1
+    return {"Ez": max(err_E, err_E_mid), "mu": max(err_mu, err_mu_mid),
+            "Ez_mid": err_E_mid, "mu_mid": err_mu_mid, "n_check": n_check, "n_mid": n_mid}
+
+
+def build_table(model, root=DEFAULT_DIR, nodes_spec=None, workers=1, block=256, n_check=64):
+    """Tabula E(z) y μ(z) del modelo sobre el producto de nodos y guarda en root/<modelo>."""
+    nodes_spec = dict(DEFAULT_NODES, **(nodes_spec or {}))
+    axes = MODEL_AXES[model]
+    nodes = _node_values(nodes_spec, axes)
+    n_rows = int(np.prod([len(n) for n in nodes]))
+
+    d = os.path.join(root, _slug(model))
+    os.makedirs(d, exist_ok=True)
+    for name in ("Ez", "mu"):
+        mm = np.lib.format.open_memmap(os.path.join(d, f"{name}.npy"), mode="w+",
+                                       dtype=np.float32, shape=(n_rows, len(Z_GRID)))
+        del mm
+
+    t0 = time.perf_counter()
+    tasks = [(model, d, axes, nodes, s, min(s + block, n_rows)) for s in range(0, n_rows, block)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            list(ex.map(_fill_rows, tasks))
+    else:
+        for t in tasks:
+            _fill_rows(t)
+    elapsed = time.perf_counter() - t0
+
+    table = _open_table(model, d, axes, nodes, Z_GRID)
+    max_err = _validate(table, n_check=n_check)
+    meta = dict(model=model, axes=axes, nodes=[n.tolist() for n in nodes],
+                z=Z_GRID.tolist(), dtype="float32", max_err=max_err,
+                build_seconds=elapsed)
+    with open(os.path.join(d, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    print(f"[OK] {model}: {n_rows} nodos en {elapsed:.1f}s | "
+          f"err máx E={max_err['Ez']:.3g}, μ={max_err['mu']:.3g} mag "
+          f"(centros ω/δ: μ={max_err['mu_mid']:.3g}) → {d}")
+    if max_err["mu"] > DEFAULT_TOL_MU:
+        print(f"[!] {model}: error en μ > {DEFAULT_TOL_MU} mag; la app usará el cálculo exacto. "
+              f"Aumenta los nodos (--n-omega, --n-delta, ...).")
+    return table
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Precalcula tablas E(z), μ(z) para Simulator_tau.py.")
+    ap.add_argument("--out", type=str, default=DEFAULT_DIR, help="Directorio de tablas.")
+    ap.add_argument("--models", type=str, default="LCDM,PT-simétrico,Fluido con memoria",
+                    help="Modelos separados por comas.")
+    ap.add_argument("--workers", type=int, default=1, help="Procesos para el precálculo.")
+    ap.add_argument("--n-check", type=int, default=64, help="Puntos de validación fuera de nodo.")
+    for ax, (lo, hi, n) in DEFAULT_NODES.items():
+        ap.add_argument(f"--n-{ax}", type=int, default=n, help=f"Nodos en {ax} [{lo}, {hi}].")
+    args = ap.parse_args()
+
+    nodes_spec = {ax: (lo, hi, getattr(args, f"n_{ax}")) for ax, (lo, hi, _) in DEFAULT_NODES.items()}
+    for model in [m.strip() for m in args.models.split(",") if m.strip()]:
+        build_table(model, root=args.out, nodes_spec=nodes_spec,
+                    workers=args.workers, n_check=args.n_check)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+# 📦 utils/job_server.py
+#
+# Servicio local de trabajos para Simulator_tau.py. Un servidor asyncio (HTTP
+# por TCP o por socket Unix) recibe peticiones {modelo, parámetros}, las ejecuta
+# en un ProcessPoolExecutor, agrupa peticiones idénticas en vuelo (una sola
+# ejecución para todos los usuarios que pidan lo mismo) y guarda los resultados
+# en una caché LRU. Los errores no entran en la caché: se conservan solo
+# error_ttl segundos para que los clientes que sondean los vean, y un nuevo envío
+# de la misma petición vuelve a calcularla. La app envía el trabajo y sondea
+# hasta obtener el resultado.
+#
+# Arranque (desde la raíz del repo):
+#   python -m utils.job_server --port 8765 --workers 4
+#   python -m utils.job_server --unix /tmp/simtau.sock
+# y en la app:  SIMTAU_JOB_SERVER=http://127.0.0.1:8765  (o unix:/tmp/simtau.sock)
+
+import argparse
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import socket
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ENV_VAR = "SIMTAU_JOB_SERVER"
+
+
+# ----------------- Trabajos -----------------
+def _curves_job(model, params, z=None):
+    from utils.grid_tables import Z_GRID, exact_curves
+    Ez, mu = exact_curves(model, params, Z_GRID if z is None else np.asarray(z, float))
+    return {"Ez": Ez.tolist(), "mu": mu.tolist()}
+
+
+JOB_KINDS = {
+    "curves": _curves_job,
+}
+
+
+def run_job(kind, model, params, z=None):
+    """Punto de entrada en el proceso trabajador."""
+    return JOB_KINDS[kind](model, params, z)
+
+
+def job_key(kind, model, params, z=None):
+    """Hash canónico de la petición (mismo trabajo -> misma clave)."""
+    req = {"kind": kind, "model": model,
+           "params": {k: round(float(v), 12) for k, v in sorted(params.items())}}
+    if z is not None:
+        req["z"] = [round(float(v), 12) for v in z]
+    canon = json.dumps(req, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()[:24]
+
+
+# ----------------- Servidor -----------------
+class JobServer:
+    """
+    Cola de trabajos con deduplicación en vuelo y caché LRU de resultados.
+    error_ttl: segundos que un error sigue visible para el sondeo (no se cachea).
+    """
+
+    def __init__(self, workers=2, cache_size=512, error_ttl=30.0):
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.cache_size = cache_size
+        self.error_ttl = error_ttl
+        self.results = OrderedDict()  # key -> {"status": "done", "result": ...}
+        self.errors = {}              # key -> (caducidad monotónica, {"status": "error", ...})
+        self.inflight = {}            # key -> asyncio.Future
+        self.stats = {"submitted": 0, "computed": 0, "deduplicated": 0, "cache_hits": 0}
+
+    def submit(self, kind, model, params, z=None):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Tipo de trabajo desconocido: {kind}")
+        key = job_key(kind, model, params, z)
+        self.stats["submitted"] += 1
+        self.errors.pop(key, None)    # un error previo no se sirve: se reintenta
+        if key in self.results:
+            self.results.move_to_end(key)
+            self.stats["cache_hits"] += 1
+        elif key in self.inflight:
+            self.stats["deduplicated"] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(self.pool, run_job, kind, model, params, z)
+            self.inflight[key] = fut
+            fut.add_done_callback(lambda f, key=key: self._finish(key, f))
+            self.stats["computed"] += 1
+        return key
+
+    def _finish(self, key, fut):
+        self.inflight.pop(key, None)
+        try:
+            self.results[key] = {"status": "done", "result": fut.result()}
+        except Exception as e:  # el error se devuelve al cliente, no tumba el servidor
+            self.errors[key] = (time.monotonic() + self.error_ttl, {"status": "error", "error": repr(e)})
+        self._expire_errors()
+        while len(self.results) > self.cache_size:
+            self.results.popitem(last=False)
+
+    def _expire_errors(self):
+        now = time.monotonic()
+        for key in [k for k, (t_end, _) in self.errors.items() if t_end <= now]:
+            del self.errors[key]
+
+    def status(self, key):
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+        self._expire_errors()
+        if key in self.errors:
+            return self.errors[key][1]
+        if key in self.inflight:
+            return {"status": "pending"}
+        return {"status": "unknown"}
+
+    # --- HTTP mínimo (una petición por conexión) ---
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            method, path, _ = request_line.split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if method == "POST" and path == "/jobs":
+                req = json.loads(body or b"{}")
+                key = self.submit(req.get("kind", "curves"), req["model"], req["params"], req.get("z"))
+                code, payload = 202, {"id": key, **self.status(key)}
+            elif method == "GET" and path.startswith("/jobs/"):
+                code, payload = 200, self.status(path[len("/jobs/"):])
+            elif method == "GET" and path == "/stats":
+                code, payload = 200, {**self.stats, "inflight": len(self.inflight),
+                                      "cached": len(self.results), "errors": len(self.errors)}
+            else:
+                code, payload = 404, {"error": f"{method} {path}"}
+        except Exception as e:
+            code, payload = 400, {"error": repr(e)}
+
+        data = json.dumps(payload).encode("utf-8")
+        writer.write(f"HTTP/1.1 {code} {'OK' if code < 300 else 'ERROR'}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + data)
+        await writer.drain()
+        writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, unix=None):
+        if unix:
+            if os.path.exists(unix):
+                os.remove(unix)
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+            where = f"unix:{unix}"
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            where = f"http://{host}:{port}"
+        print(f"[OK] Servidor de trabajos en {where}")
+        async with server:
+            await server.serve_forever()
+
+
+# ----------------- Cliente -----------------
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=5.0):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class JobClient:
+    """Cliente síncrono (para el hilo del script de Streamlit)."""
+
+    def __init__(self, address, timeout=5.0):
+        self.address = address
+        self.timeout = timeout
+
+    def _conn(self):
+        if self.address.startswith("unix:"):
+            return _UnixHTTPConnection(self.address[len("unix:"):], timeout=self.timeout)
+        hostport = self.address.split("://", 1)[-1].rstrip("/")
+        return http.client.HTTPConnection(hostport, timeout=self.timeout)
+
+    def _request(self, method, path, payload=None):
+        conn = self._conn()
+        try:
+            body = None if payload is None else json.dumps(payload)
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            return json.loads(conn.getresponse().read())
+        finally:
+            conn.close()
+
+    def submit(self, model, params, kind="curves", z=None):
+        payload = {"kind": kind, "model": model, "params": params}
+        if z is not None:
+            payload["z"] = [float(v) for v in z]
+        return self._request("POST", "/jobs", payload)
+
+    def poll(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def fetch(self, model, params, kind="curves", z=None, wait=30.0, interval=0.05):
+        """
+        Envía y sondea hasta que el trabajo termina (z=None: rejilla Z_GRID del servidor).
+        TimeoutError si excede wait; RuntimeError si el trabajo falla en el servidor.
+        """
+        st = self.submit(model, params, kind=kind, z=z)
+        t_end = time.monotonic() + wait
+        while st["status"] == "pending":
+            if time.monotonic() > t_end:
+                raise TimeoutError(f"Trabajo {st.get('id')} sin terminar tras {wait}s")
+            time.sleep(interval)
+            st = {"id": st["id"], **self.poll(st["id"])}
+        if st["status"] != "done":
+            raise RuntimeError(st.get("error", f"estado inesperado: {st['status']}"))
+        return st["result"]
+
+
+def client_from_env():
+    """JobClient si SIMTAU_JOB_SERVER está definido; si no, None (cálculo local)."""
+    address = os.environ.get(ENV_VAR)
+    return JobClient(address) if address else None
+
+
+def remote_exact(client, wait=30.0):
+    """
+    Adaptador con la firma de grid_tables.exact_curves que delega en el servidor,
+    enviando la rejilla z pedida.
+    """
+    def exact(model, p, z):
+        res = client.fetch(model, p, z=z, wait=wait)
+        return np.asarray(res["Ez"], float), np.asarray(res["mu"], float)
+    return exact
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Servidor local de trabajos para Simulator_tau.py.")
+    ap.add_argument("--host", type=str, default="127.0.0.1", help="Host TCP.")
+    ap.add_argument("--port", type=int, default=8765, help="Puerto TCP.")
+    ap.add_argument("--unix", type=str, default=None, help="Ruta de socket Unix (en lugar de TCP).")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Procesos de cálculo.")
+    ap.add_argument("--cache-size", type=int, default=512, help="Resultados guardados en caché.")
+    ap.add_argument("--error-ttl", type=float, default=30.0,
+                    help="Segundos que un error sigue visible para el sondeo (no se cachea).")
+    args = ap.parse_args()
+
+    server = JobServer(workers=args.workers, cache_size=args.cache_size, error_ttl=args.error_ttl)
+    try:
+        asyncio.run(server.serve(args.host, args.port, unix=args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# 📦 utils/likelihood_sne.py
+#
+# Verosimilitud de SNe Ia (formato Pantheon+) para el Modelo III.
+# - La covarianza completa se factoriza (Cholesky) UNA vez al construir.
+# - La magnitud absoluta (offset M, degenerado con H0) se marginaliza analíticamente.
+# - chi2() evalúa un LOTE de vectores de parámetros por llamada: el fondo se
+#   calcula en una rejilla z común (utils/background.py) y se interpola a los z
+#   del catálogo; cada muestra cuesta una sustitución triangular.
+#
+# Marginalización sobre M (prior plano), con r = μ_obs - μ_modelo y C la covarianza:
+#   A = rᵀC⁻¹r,  B = 1ᵀC⁻¹r,  E = 1ᵀC⁻¹1
+#   χ²_marg = A - B²/E   (+ ln(E/2π) si se quiere la normalización completa)
+
+import numpy as np
+from scipy.linalg import cho_factor, solve_triangular
+
+from utils import background as bg
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+
+# ----------------- Carga del catálogo -----------------
+def load_covariance(path, n=None):
+    """Covarianza en formato Pantheon+: primera línea N, luego N² valores."""
+    vals = np.loadtxt(path, dtype=float).ravel()
+    N = int(vals[0])
+    if n is not None and N != n:
+        raise ValueError(f"Covarianza de {N}x{N} pero el catálogo tiene {n} SNe.")
+    return vals[1:].reshape(N, N)
+
+
+def load_pantheon(data_path, cov_path=None, z_col="zHD", mu_col="MU_SH0ES",
+                  err_col="MU_SH0ES_ERR_DIAG", z_min=0.01):
+    """
+    Lee el catálogo (tabla separada por espacios con cabecera) y, si se da,
+    la covarianza STAT+SYS. Sin covarianza se usa diag(err²).
+    z_min: corte en z (velocidades peculiares); se aplica también a la covarianza.
+    """
+    if pd is None:
+        raise RuntimeError("Se requiere pandas para leer el catálogo (pip install pandas).")
+    df = pd.read_csv(data_path, sep=r"\s+", comment="#")
+    z = df[z_col].to_numpy(float)
+    mu = df[mu_col].to_numpy(float)
+    if cov_path is not None:
+        cov = load_covariance(cov_path, n=len(z))
+    else:
+        cov = np.diag(df[err_col].to_numpy(float)**2)
+
+    keep = z > z_min
+    return z[keep], mu[keep], cov[np.ix_(keep, keep)]
+
+
+# ----------------- Verosimilitud -----------------
+class SNeLikelihood:
+    """χ² marginalizado en M con Cholesky cacheado e interpolación desde rejilla común."""
+
+    def __init__(self, z, mu, cov, z_grid=bg.Z_GRID):
+        self.z = np.asarray(z, float)
+        self.mu = np.asarray(mu, float)
+        self.z_grid = np.asarray(z_grid, float)
+
+        L, _ = cho_factor(np.asarray(cov, float), lower=True)
+        self.L = np.tril(L)
+        # Cantidades blanqueadas que no dependen del modelo
+        self.mu_w = solve_triangular(self.L, self.mu, lower=True)
+        self.one_w = solve_triangular(self.L, np.ones_like(self.mu), lower=True)
+        self.E = float(self.one_w @ self.one_w)
+        self.log_norm = float(np.log(self.E / (2.0 * np.pi)))
+
+        self._i, self._t = bg.interp_matrix(self.z_grid, self.z)
+
+    @classmethod
+    def from_files(cls, data_path, cov_path=None, z_grid=bg.Z_GRID, **kw):
+        z, mu, cov = load_pantheon(data_path, cov_path, **kw)
+        return cls(z, mu, cov, z_grid=z_grid)
+
+    def mu_model(self, params):
+        """μ(z_SNe) para un lote de parámetros -> (P, N). Interpola D_C, no μ (μ(0) = -inf)."""
+        return self.mu_from_background(bg.background(params, self.z_grid))
+
+    def mu_from_background(self, b):
+        """μ(z_SNe) a partir de un fondo ya calculado sobre z_grid (dict con D_C, H0)."""
+        D_C = bg.interp_rows(b["D_C"], self._i, self._t)
+        return 5.0 * np.log10((1.0 + self.z) * D_C * (bg.C_KMS / b["H0"])) + 25.0
+
+    def chi2_from_mu(self, mu_model, normalized=False):
+        """χ² marginalizado para μ_modelo de forma (P, N) o (N,)."""
+        mu_model = np.atleast_2d(mu_model)
+        # Una sustitución triangular para todo el lote (columnas = muestras)
+        m_w = solve_triangular(self.L, mu_model.T, lower=True)
+        r_w = self.mu_w[:, None] - m_w
+        A = np.einsum("np,np->p", r_w, r_w)
+        B = self.one_w @ r_w
+        chi2 = A - B**2 / self.E
+        return chi2 + self.log_norm if normalized else chi2
+
+    def chi2(self, params, normalized=False):
+        return self.chi2_from_mu(self.mu_model(params), normalized=normalized)
+
+    def loglike(self, params):
+        return self.loglike_background(bg.background(params, self.z_grid))
+
+    def loglike_background(self, b):
+        chi2 = self.chi2_from_mu(self.mu_from_background(b))
+        return np.where(np.isfinite(chi2), -0.5 * chi2, -np.inf)
+
+    def best_offset(self, mu_model):
+        """Offset M que minimiza χ² (útil para graficar residuos)."""
+        mu_model = np.atleast_2d(mu_model)
+        m_w = solve_triangular(self.L, mu_model.T, lower=True)
+        return (self.one_w @ (self.mu_w[:, None] - m_w)) / self.E
@@ -0,0 +1,168 @@
+# 📦 utils/logfreq_filter.py
+#
+# Banco de filtros adaptados para oscilaciones log-periódicas en residuos:
+#   plantilla  s(z; ω, δ, z_τ) = exp(-z/z_τ) · cos(ω·ln(1+z) + δ)
+# (la forma de w_memory y de los modelos de Simulator_tau.py).
+#
+# En la variable x = ln(1+z) la señal es una sinusoide pura con envolvente, así
+# que el espectro en z (np.fft.fft sobre z uniforme) la emborrona. Aquí:
+#   - method="fft":    los residuos se re-muestrean (binning con pesos 1/σ²) en
+#                      una rejilla uniforme en x y, para cada z_τ, UNA FFT
+#                      (por lotes sobre todos los z_τ) da la correlación con todos
+#                      los ω de la rejilla a la vez.
+#   - method="direct": sumas exactas sobre la rejilla irregular (Lomb–Scargle
+#                      generalizado con pesos), vectorizadas en (z_τ, ω, N).
+# La fase δ y la amplitud se maximizan analíticamente con el par en cuadratura
+# (cos, sin), por lo que el estadístico
+#     D(ω, z_τ) = dᵀ N⁻¹ d,   d = (Σ r c/σ², Σ r s/σ²),  N = matriz 2x2 de normas
+# es la mejora de χ² del mejor ajuste y sigue una χ²₂ bajo la hipótesis nula.
+#
+# Ejemplo:
+#   python -m utils.logfreq_filter residuos.txt --omega-max 12 --ztau 0.3,0.5,1,2,5
+
+import argparse
+import os
+
+import numpy as np
+
+
+def _quadrature_stat(dc, ds, cc, ss, cs):
+    """D, amplitud y fase óptimas a partir de las proyecciones y normas del par (cos, sin)."""
+    det = cc * ss - cs**2
+    det = np.where(det > 0, det, np.nan)
+    ac = (ss * dc - cs * ds) / det
+    as_ = (cc * ds - cs * dc) / det
+    D = ac * dc + as_ * ds
+    # a_c cos(ωx) + a_s sin(ωx) = A cos(ωx + δ)  ->  A = |a|, δ = atan2(-a_s, a_c)
+    return D, np.hypot(ac, as_), np.mod(np.arctan2(-as_, ac), 2 * np.pi)
+
+
+def resample_log(z, r, sigma, n_x=None):
+    """Binning con pesos 1/σ² sobre una rejilla uniforme en x = ln(1+z)."""
+    x = np.log1p(np.asarray(z, float))
+    u = 1.0 / np.asarray(sigma, float)**2
+    n_x = n_x or int(2 ** np.ceil(np.log2(max(len(x), 16))))
+    edges = np.linspace(x.min(), x.max(), n_x + 1)
+    k = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, n_x - 1)
+    U = np.bincount(k, weights=u, minlength=n_x)             # Σ 1/σ² por bin
+    R = np.bincount(k, weights=u * r, minlength=n_x)          # Σ r/σ² por bin
+    xc = 0.5 * (edges[1:] + edges[:-1])
+    Z = np.expm1(xc)
+    return xc, Z, U, R
+
+
+def filter_bank(z, r, sigma=None, omegas=None, z_taus=(0.5, 1.0, 2.0, 5.0, np.inf),
+                method="fft", n_x=None, pad=4):
+    """
+    Estadístico de detección sobre la rejilla (z_τ, ω).
+    Devuelve dict con omega (n_ω,), z_tau (n_zt,), stat, amplitude, delta (n_zt, n_ω).
+    Con method="fft" la rejilla de ω es la de la FFT (se ignora `omegas` salvo su máximo);
+    sin n_x explícito, la rejilla en x se afina hasta que su Nyquist π/dx cubre ω_max
+    (con un n_x insuficiente se lanza ValueError).
+    """
+    z = np.asarray(z, float)
+    r = np.asarray(r, float)
+    sigma = np.ones_like(r) if sigma is None else np.asarray(sigma, float)
+    z_taus = np.asarray(z_taus, float)
+    omega_max = 12.0 if omegas is None else float(np.max(omegas))
+
+    if method == "fft":
+        if n_x is None:
+            span = np.log1p(z.max()) - np.log1p(z.min())
+            n_x = int(2 ** np.ceil(np.log2(max(len(z), 16, span * omega_max / np.pi))))
+        x, Zc, U, R = resample_log(z, r, sigma, n_x)
+        dx = x[1] - x[0]
+        if np.pi / dx < omega_max:
+            raise ValueError(f"omega_max={omega_max:g} supera el Nyquist π/dx={np.pi / dx:.3g} "
+                             f"de la rejilla en ln(1+z) (n_x={n_x}); aumenta n_x o usa method='direct'.")
+        env = np.exp(-Zc[None, :] / z_taus[:, None])           # (n_zt, K)
+        g = R[None, :] * env                                     # Σ r u env
+        h2 = U[None, :] * env**2                                 # Σ u env²
+        L = pad * len(x)
+        w_all = 2 * np.pi * np.fft.fftfreq(L, dx)
+        jmax = int(np.searchsorted(w_all[: L // 2], omega_max, side="right"))
+        j = np.arange(1, jmax)
+        om = w_all[j]
+        # Transformadas por lotes (eje 1 = x); e^{-iω x0} corrige el origen de la rejilla
+        G = np.fft.fft(g, n=L, axis=1)[:, j] * np.exp(-1j * om * x[0])
+        H2 = np.fft.fft(h2, n=L, axis=1)
+        H2_2w = H2[:, (2 * j) % L] * np.exp(-2j * om * x[0])
+        S0 = h2.sum(axis=1, keepdims=True)
+        dc, ds = G.real, -G.imag
+        cc = 0.5 * (S0 + H2_2w.real)
+        ss = 0.5 * (S0 - H2_2w.real)
+        cs = -0.5 * H2_2w.imag
+    elif method == "direct":
+        om = np.linspace(omega_max / 200, omega_max, 200) if omegas is None else np.asarray(omegas, float)
+        x = np.log1p(z)
+        u = 1.0 / sigma**2
+        env = np.exp(-z[None, :] / z_taus[:, None])             # (n_zt, N)
+        C = np.cos(om[:, None] * x[None, :])                     # (n_ω, N)
+        S = np.sin(om[:, None] * x[None, :])
+        ru = (r * u)[None, :] * env                              # (n_zt, N)
+        ue2 = u[None, :] * env**2
+        dc, ds = ru @ C.T, ru @ S.T
+        cc, ss, cs = ue2 @ (C**2).T, ue2 @ (S**2).T, ue2 @ (C * S).T
+    else:
+        raise ValueError(f"Método desconocido: {method}")
+
+    D, A, delta = _quadrature_stat(dc, ds, cc, ss, cs)
+    return dict(omega=om, z_tau=z_taus, stat=D, amplitude=A, delta=delta)
+
+
+def best_template(result):
+    """(ω, z_τ, δ, A, D) del máximo del mapa y p-valor local χ²₂ = exp(-D/2)."""
+    stat = np.nan_to_num(result["stat"], nan=-np.inf)
+    i, j = np.unravel_index(np.argmax(stat), stat.shape)
+    D = float(result["stat"][i, j])
+    return dict(omega=float(result["omega"][j]), z_tau=float(result["z_tau"][i]),
+                delta=float(result["delta"][i, j]), amplitude=float(result["amplitude"][i, j]),
+                stat=D, p_local=float(np.exp(-0.5 * D)))
+
+
+def _parse_list(s):
+    return [float(v) for v in s.split(",") if v.strip()]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Filtro adaptado log-periódico sobre residuos (z, r, σ).")
+    ap.add_argument("residuals", type=str, help="Tabla de texto con columnas z, residuo, σ.")
+    ap.add_argument("--method", choices=["fft", "direct"], default="fft", help="FFT en ln(1+z) o sumas directas.")
+    ap.add_argument("--omega-max", type=float, default=12.0, help="ω máximo del banco.")
+    ap.add_argument("--ztau", type=_parse_list, default=[0.5, 1.0, 2.0, 5.0, np.inf], help="Lista de z_τ.")
+    ap.add_argument("--out-csv", type=str, default="assets/logfreq-map.csv", help="CSV del mapa.")
+    ap.add_argument("--out", type=str, default="assets/logfreq-map.png", help="PNG del mapa.")
+    args = ap.parse_args()
+
+    arr = np.loadtxt(args.residuals, comments="#", ndmin=2)
+    sigma = arr[:, 2] if arr.shape[1] > 2 else None
+    res = filter_bank(arr[:, 0], arr[:, 1], sigma, omegas=[args.omega_max],
+                      z_taus=args.ztau, method=args.method)
+    best = best_template(res)
+
+    os.makedirs(os.path.dirname(args.out_csv) or ".", exist_ok=True)
+    zt, om = np.meshgrid(res["z_tau"], res["omega"], indexing="ij")
+    np.savetxt(args.out_csv, np.column_stack([zt.ravel(), om.ravel(), res["stat"].ravel(),
+                                              res["amplitude"].ravel(), res["delta"].ravel()]),
+               delimiter=",", header="z_tau,omega,stat,amplitude,delta", comments="")
+
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(8, 5))
+    for i, t in enumerate(res["z_tau"]):
+        plt.plot(res["omega"], res["stat"][i], label=f"z_τ={t:g}", linewidth=1.4)
+    plt.axvline(best["omega"], color="k", linestyle=":", alpha=0.6)
+    plt.xlabel(r"$\omega$ (frecuencia en $\ln(1+z)$)")
+    plt.ylabel(r"$D = \Delta\chi^2$ del mejor ajuste")
+    plt.title("Banco de filtros log-periódicos")
+    plt.grid(True, alpha=0.3)
+    plt.legend(loc="best")
+    plt.tight_layout()
+    plt.savefig(args.out, dpi=220)
+    plt.close()
+    print(f"[OK] Máximo: ω={best['omega']:.3g}, z_τ={best['z_tau']:g}, δ={best['delta']:.3g}, "
+          f"A={best['amplitude']:.3g}, D={best['stat']:.3g} (p_local={best['p_local']:.2g})\n"
+          f"[OK] Mapa: {args.out_csv}\n[OK] Figura: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# 📦 utils/mocks.py
+#
+# Catálogos simulados (mocks) de SNe Ia, BAO y H(z) a partir de la predicción
+# μ(z)/H(z) de cualquier familia de utils/fit_mcmc.py. Todo está vectorizado:
+# los redshifts se muestrean por CDF inversa de una distribución n(z) realista
+# (volumen comóvil x selección) y el ruido se añade en bloque, de modo que
+# 10^5–10^6 SNe cuestan milisegundos. Cada realización se guarda como .npz
+# (float32 + metadatos JSON) y muchas realizaciones se generan en paralelo con
+# semillas independientes (SeedSequence.spawn) para pruebas de cobertura.
+#
+# Ejemplo (desde la raíz del repo):
+#   python -m utils.mocks --family memory --theta 0.3,70,-1,0.15,2,0.5 \
+#       --n-sne 100000 --n-real 200 --workers 8 --out-dir data/mocks
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils import background as bg
+from utils.fit_mcmc import FAMILIES, PointsLikelihood, DVOverRd, family_background
+from utils.likelihood_sne import SNeLikelihood
+
+# Configuración por defecto del survey simulado
+DEFAULT_SPEC = dict(
+    n_sne=1700, z_min=0.01, z_max=2.3,
+    z_sel=0.9,             # escala de la selección exp[-(z/z_sel)^2]
+    sigma_int=0.10,        # dispersión intrínseca [mag]
+    sigma_meas=0.08,       # error de medida a z=0 [mag], crece como (1+z)^meas_slope
+    meas_slope=1.0,
+    sigma_lens=0.055,      # lensing: σ = sigma_lens · z
+    bao_z=(0.3, 0.51, 0.71, 0.93, 1.32, 1.49, 2.33), bao_frac_err=0.01, rd=147.09,
+    hz_z=(0.1, 0.3, 0.5, 0.7, 0.9, 1.2, 1.5, 1.8), hz_frac_err=0.05,
+)
+
+
+def sne_dndz(b, z_sel):
+    """n(z) ∝ (dV_c/dz)/(1+z) · exp[-(z/z_sel)^2] sobre la rejilla del fondo (una fila)."""
+    z = b["z"]
+    dVdz = b["D_C"][0]**2 / b["E"][0]
+    return dVdz / (1.0 + z) * np.exp(-(z / z_sel)**2)
+
+
+def _draw_z(rng, z, pdf, n, z_min, z_max):
+    """Muestreo por CDF inversa restringido a [z_min, z_max]."""
+    m = (z >= z_min) & (z <= z_max)
+    zz, pp = z[m], pdf[m]
+    cdf = np.concatenate([[0.0], np.cumsum(0.5 * (pp[1:] + pp[:-1]) * np.diff(zz))])
+    cdf /= cdf[-1]
+    return np.interp(rng.random(n), cdf, zz)
+
+
+def _seed_meta(seed):
+    """Semilla serializable: int, o {entropy, spawn_key} de una SeedSequence (None si no se conoce)."""
+    if isinstance(seed, (int, np.integer)):
+        return int(seed)
+    if isinstance(seed, np.random.SeedSequence):
+        # np.random.SeedSequence(entropy, spawn_key=tuple(spawn_key)) la reproduce
+        return dict(entropy=seed.entropy, spawn_key=list(seed.spawn_key))
+    return None
+
+
+def generate(family, theta, spec=None, seed=0, z_grid=bg.Z_GRID):
+    """
+    Una realización: dict de arrays float32 (sne_z, sne_mu, sne_sigma, bao_*, hz_*) + meta.
+    seed: int, SeedSequence o Generator (este último no queda registrado en meta).
+    """
+    spec = dict(DEFAULT_SPEC, **(spec or {}))
+    rng = np.random.default_rng(seed)
+    b = family_background(family, np.atleast_2d(theta), z_grid)
+    z = b["z"]
+    H0 = float(np.ravel(b["H0"])[0])
+
+    # SNe
+    zs = _draw_z(rng, z, sne_dndz(b, spec["z_sel"]), int(spec["n_sne"]), spec["z_min"], spec["z_max"])
+    D_C = np.interp(zs, z, b["D_C"][0])
+    mu_true = 5.0 * np.log10((1.0 + zs) * D_C * (bg.C_KMS / H0)) + 25.0
+    sig = np.sqrt(spec["sigma_int"]**2
+                  + (spec["sigma_meas"] * (1.0 + zs)**spec["meas_slope"])**2
+                  + (spec["sigma_lens"] * zs)**2)
+    mu_obs = mu_true + sig * rng.standard_normal(zs.size)
+
+    # BAO (D_V/r_d) y H(z)
+    bz = np.asarray(spec["bao_z"], float)
+    dv = np.interp(bz, z, bg.dv_mpc(b)[0]) / spec["rd"]
+    bao_sig = spec["bao_frac_err"] * dv
+    hz = np.asarray(spec["hz_z"], float)
+    H = np.interp(hz, z, bg.hubble(b)[0])
+    hz_sig = spec["hz_frac_err"] * H
+
+    f32 = np.float32
+    return dict(
+        sne_z=zs.astype(f32), sne_mu=mu_obs.astype(f32), sne_sigma=sig.astype(f32),
+        bao_z=bz.astype(f32), bao_dv_rd=(dv + bao_sig * rng.standard_normal(bz.size)).astype(f32),
+        bao_sigma=bao_sig.astype(f32),
+        hz_z=hz.astype(f32), hz_H=(H + hz_sig * rng.standard_normal(hz.size)).astype(f32),
+        hz_sigma=hz_sig.astype(f32),
+        meta=dict(family=family, theta=np.ravel(theta).tolist(), names=list(FAMILIES[family]),
+                  seed=_seed_meta(seed), spec=spec),
+    )
+
+
+def save_mock(path, mock, compress=False):
+    arrays = {k: v for k, v in mock.items() if k != "meta"}
+    (np.savez_compressed if compress else np.savez)(path, meta=json.dumps(mock["meta"]), **arrays)
+
+
+def load_mock(path):
+    with np.load(path) as f:
+        mock = {k: f[k] for k in f.files if k != "meta"}
+        mock["meta"] = json.loads(str(f["meta"]))
+    return mock
+
+
+def bin_sne(z, mu, sigma, n_bins):
+    """Compresión en n_bins de igual ocupación con pesos 1/σ² (para catálogos enormes)."""
+    order = np.argsort(z)
+    groups = np.array_split(order, n_bins)
+    w = 1.0 / sigma.astype(float)**2
+    zb = np.array([np.average(z[g], weights=w[g]) for g in groups])
+    mub = np.array([np.average(mu[g], weights=w[g]) for g in groups])
+    sb = np.array([1.0 / np.sqrt(np.sum(w[g])) for g in groups])
+    return zb, mub, sb
+
+
+def likelihoods_from_mock(mock, z_grid=bg.Z_GRID, max_sne=4000):
+    """
+    Verosimilitudes (SNe diagonal, BAO, H(z)) listas para fit_mcmc.run_fit.
+    Con más de max_sne SNe se agrupan en max_sne bins (la covarianza es densa N x N).
+    """
+    rd = mock["meta"]["spec"]["rd"]
+    z, mu, sig = (mock[k].astype(float) for k in ("sne_z", "sne_mu", "sne_sigma"))
+    if z.size > max_sne:
+        z, mu, sig = bin_sne(z, mu, sig, max_sne)
+    return [
+        SNeLikelihood(z, mu, np.diag(sig**2), z_grid),
+        PointsLikelihood(mock["bao_z"], mock["bao_dv_rd"], mock["bao_sigma"], DVOverRd(rd), z_grid),
+        PointsLikelihood(mock["hz_z"], mock["hz_H"], mock["hz_sigma"], bg.hubble, z_grid),
+    ]
+
+
+def _one(args):
+    family, theta, spec, seed_seq, path, compress = args
+    save_mock(path, generate(family, theta, spec, seed=seed_seq), compress)
+    return path
+
+
+def generate_many(family, theta, n_real, out_dir, spec=None, seed=0, workers=1, compress=False):
+    """n_real realizaciones independientes en paralelo -> lista de rutas .npz."""
+    os.makedirs(out_dir, exist_ok=True)
+    seqs = np.random.SeedSequence(seed).spawn(n_real)
+    tasks = [(family, theta, spec, s, os.path.join(out_dir, f"mock_{r:05d}.npz"), compress)
+             for r, s in enumerate(seqs)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(_one, tasks))
+    return [_one(t) for t in tasks]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Genera catálogos simulados de SNe, BAO y H(z).")
+    ap.add_argument("--family", choices=list(FAMILIES), default="memory", help="Familia de modelos.")
+    ap.add_argument("--theta", type=str, default=None,
+                    help="Parámetros separados por comas (orden de FAMILIES); por defecto el fiducial.")
+    ap.add_argument("--n-sne", type=int, default=DEFAULT_SPEC["n_sne"], help="SNe por realización.")
+    ap.add_argument("--z-max", type=float, default=DEFAULT_SPEC["z_max"], help="z máximo de las SNe.")
+    ap.add_argument("--n-real", type=int, default=1, help="Número de realizaciones.")
+    ap.add_argument("--workers", type=int, default=1, help="Procesos en paralelo.")
+    ap.add_argument("--seed", type=int, default=0, help="Semilla maestra.")
+    ap.add_argument("--compress", action="store_true", help="Guardar .npz comprimido.")
+    ap.add_argument("--out-dir", type=str, default="data/mocks", help="Directorio de salida.")
+    args = ap.parse_args()
+
+    names = list(FAMILIES[args.family])
+    if args.theta:
+        theta = np.array([float(x) for x in args.theta.split(",")], float)
+    else:
+        fid = dict(bg.DEFAULTS, Om=bg.DEFAULTS["omega_m"])
+        theta = np.array([fid.get(k, np.mean(FAMILIES[args.family][k])) for k in names], float)
+    if theta.size != len(names):
+        raise ValueError(f"--theta necesita {len(names)} valores: {', '.join(names)}")
+
+    t0 = time.perf_counter()
+    paths = generate_many(args.family, theta, args.n_real, args.out_dir,
+                          spec=dict(n_sne=args.n_sne, z_max=args.z_max),
+                          seed=args.seed, workers=args.workers, compress=args.compress)
+    elapsed = time.perf_counter() - t0
+    print(f"[OK] {len(paths)} mocks ({args.n_sne} SNe c/u) en {elapsed:.2f}s → {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
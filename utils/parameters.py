@@ -1,8 +1,16 @@
 # 📦 utils/parameters.py
+#
+# Carga/edición de parámetros (dicts JSON) y tipos validados para el código numérico:
+#   - ModelParams: inmutable, con __slots__ y hash canónico; reconcilia las claves
+#     del JSON (initial_phi, ...) con las de los scripts (phi0, ...).
+#   - ParamBatch:  forma struct-of-arrays para ensembles sobre conjuntos de parámetros.
 
+import hashlib
 import json
 import os
 
+import numpy as np
+
 # Ruta por defecto del archivo de parámetros
 DEFAULT_PATH = os.path.join("data", "params_default.json")
 
@@ -38,3 +46,175 @@ def print_params(params):
     print("📋 Parámetros actuales:")
     for k, v in params.items():
         print(f" - {k}: {v}")
+
+
+# ----------------- Parámetros tipados -----------------
+# Los scripts de figuras usan phi0/chi0/dphi0/dchi0; el JSON usa initial_*.
+ALIASES = {
+    "initial_phi": "phi0", "initial_chi": "chi0",
+    "initial_dphi": "dphi0", "initial_dchi": "dchi0",
+}
+
+MODEL_FIELDS = ("m_phi", "m_chi", "lambda_phi", "lambda_chi", "g", "V0",
+                "alpha_phi", "alpha_chi", "tau_phi", "tau_chi",
+                "phi0", "chi0", "dphi0", "dchi0")
+
+# Valores por defecto de los scripts de figuras (default_params)
+FIGURE_DEFAULTS = dict(
+    m_phi=1.0, m_chi=1.2,
+    lambda_phi=0.5, lambda_chi=0.4,
+    g=0.7, V0=0.05,
+    alpha_phi=0.08, alpha_chi=0.08,
+    tau_phi=2.0, tau_chi=2.0,
+    phi0=0.9, chi0=0.4, dphi0=0.0, dchi0=0.0,
+)
+
+
+def canonical_keys(d):
+    """Traduce claves initial_* a phi0/chi0/...; si vienen ambas gana la del script."""
+    out = {}
+    for k, v in d.items():
+        key = ALIASES.get(k, k)
+        if key not in out or k == key:
+            out[key] = v
+    return out
+
+
+def _validate(values):
+    for k, v in values.items():
+        if not np.isfinite(v).all():
+            raise ValueError(f"Parámetro no finito: {k}={v}")
+    for k in ("tau_phi", "tau_chi"):
+        if np.any(np.asarray(values[k]) <= 0):
+            raise ValueError(f"{k} debe ser > 0 (tiempo de memoria del ruido OU).")
+    for k in ("m_phi", "m_chi", "lambda_phi", "lambda_chi", "alpha_phi", "alpha_chi"):
+        if np.any(np.asarray(values[k]) < 0):
+            raise ValueError(f"{k} debe ser >= 0.")
+
+
+class ModelParams:
+    """
+    Parámetros del modelo de dos campos: inmutables, validados y hashables.
+
+        p = ModelParams.from_dict(load_params())     # acepta initial_* o phi0...
+        q = p.replace(tau_phi=1.0, tau_chi=1.0)
+        m_phi, g = p.m_phi, p.g                       # atributos (slots), sin dict
+        p.key()                                       # hash canónico para cachés
+    """
+
+    __slots__ = MODEL_FIELDS
+
+    def __init__(self, **values):
+        unknown = set(values) - set(MODEL_FIELDS)
+        if unknown:
+            raise TypeError(f"Parámetros desconocidos: {sorted(unknown)}")
+        vals = dict(FIGURE_DEFAULTS, **{k: float(v) for k, v in values.items()})
+        _validate(vals)
+        for k in MODEL_FIELDS:
+            object.__setattr__(self, k, vals[k])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ModelParams es inmutable; usa replace().")
+
+    @classmethod
+    def from_dict(cls, d, base=None):
+        """Desde un dict (claves del JSON o de los scripts); se ignoran claves ajenas al modelo (dt, T_total...)."""
+        d = canonical_keys(d)
+        vals = dict(base.to_dict() if isinstance(base, ModelParams) else (base or {}))
+        vals.update({k: v for k, v in d.items() if k in MODEL_FIELDS and v is not None})
+        return cls(**vals)
+
+    def replace(self, **changes):
+        return ModelParams(**dict(self.to_dict(), **canonical_keys(changes)))
+
+    def to_dict(self, json_keys=False):
+        d = {k: getattr(self, k) for k in MODEL_FIELDS}
+        if json_keys:
+            inv = {v: k for k, v in ALIASES.items()}
+            d = {inv.get(k, k): v for k, v in d.items()}
+        return d
+
+    def astuple(self):
+        return tuple(getattr(self, k) for k in MODEL_FIELDS)
+
+    def key(self):
+        """Hash canónico (sha256 corto) con valores redondeados a 12 decimales."""
+        canon = json.dumps([round(v, 12) for v in self.astuple()])
+        return hashlib.sha256(canon.encode("utf-8")).hexdigest()[:24]
+
+    def __eq__(self, other):
+        return isinstance(other, ModelParams) and self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __getitem__(self, k):
+        # Compatibilidad con el código que aún hace params["g"]
+        return getattr(self, ALIASES.get(k, k))
+
+    def __repr__(self):
+        return "ModelParams(" + ", ".join(f"{k}={getattr(self, k):g}" for k in MODEL_FIELDS) + ")"
+
+
+def as_params(p):
+    """ModelParams desde ModelParams, dict (cualquier esquema de claves) o None (por defecto)."""
+    if isinstance(p, ModelParams):
+        return p
+    return ModelParams.from_dict(p or {})
+
+
+class ParamBatch:
+    """
+    Conjunto de parámetros en forma struct-of-arrays: cada campo es un array (n,),
+    para integradores vectorizados sobre ensembles de parámetros.
+
+        batch = ParamBatch.from_list([p1, p2, p3])
+        batch = ParamBatch.broadcast(base, tau_phi=np.linspace(0.5, 5, 64))
+        batch.g, batch[3], batch.keys()
+    """
+
+    __slots__ = MODEL_FIELDS + ("n",)
+
+    def __init__(self, **arrays):
+        n = max((np.size(v) for v in arrays.values()), default=1)
+        vals = {k: np.broadcast_to(np.asarray(arrays.get(k, FIGURE_DEFAULTS[k]), dtype=float), (n,)).copy()
+                for k in MODEL_FIELDS}
+        _validate(vals)
+        for k, v in vals.items():
+            v.setflags(write=False)
+            object.__setattr__(self, k, v)
+        object.__setattr__(self, "n", n)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ParamBatch es inmutable.")
+
+    @classmethod
+    def from_list(cls, params):
+        ps = [as_params(p) for p in params]
+        return cls(**{k: [getattr(p, k) for p in ps] for k in MODEL_FIELDS})
+
+    @classmethod
+    def broadcast(cls, base=None, **arrays):
+        """Parámetros base (escalares) con algunos campos variando como arrays."""
+        return cls(**dict(as_params(base).to_dict(), **canonical_keys(arrays)))
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, i):
+        return ModelParams(**{k: getattr(self, k)[i] for k in MODEL_FIELDS})
+
+    def __iter__(self):
+        return (self[i] for i in range(self.n))
+
+    def keys(self):
+        """Hash canónico de cada miembro."""
+        return [p.key() for p in self]
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in MODEL_FIELDS}
+
+
+def load_model_params(path=DEFAULT_PATH, base=None):
+    """Carga el JSON de parámetros como ModelParams (reconcilia initial_* con phi0...)."""
+    return ModelParams.from_dict(load_params(path), base=base)
@@ -0,0 +1,211 @@
+# 📦 utils/registry.py
+#
+# Registro local de corridas (SQLite) para no re-simular lo que ya existe.
+# Cada corrida guarda sus parámetros resueltos completos, semilla, esquema de
+# integración, tiempos, métricas resumen y rutas de salida. Índices:
+#   - runs(param_hash, script):  búsqueda exacta de una configuración ya corrida,
+#   - param_values(name, num) / (name, txt):  una fila por parámetro, para consultas
+#     por rango/igualdad sobre cualquier clave ("τ en [1,2] y g=0.2") en milisegundos.
+#
+# Uso desde Python:
+#   reg = Registry()                                   # data/runs.sqlite
+#   reg.record("fig2", params, seed=42, scheme="euler-maruyama",
+#              timings={"simulate": 3.1}, metrics={"Q_phi": 12.0})
+#   reg.find(tau_phi=(1, 2), g=0.2)                    # lista de dicts
+#   reg.lookup("fig4", params)                         # última corrida idéntica (o None)
+#
+# CLI (desde la raíz del repo):
+#   python -m utils.registry query --where tau_phi=1:2 --where g=0.2 [--script fig4]
+#   python -m utils.registry show 17
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import time
+
+DEFAULT_DB = os.path.join("data", "runs.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    script       TEXT NOT NULL,
+    param_hash   TEXT NOT NULL,
+    seed         INTEGER,
+    scheme       TEXT,
+    created      REAL NOT NULL,
+    code_version TEXT,
+    params       TEXT NOT NULL,
+    timings      TEXT,
+    metrics      TEXT,
+    outputs      TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_hash ON runs(param_hash, script, seed);
+CREATE TABLE IF NOT EXISTS param_values (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name   TEXT NOT NULL,
+    num    REAL,
+    txt    TEXT
+);
+CREATE INDEX IF NOT EXISTS pv_num ON param_values(name, num, run_id);
+CREATE INDEX IF NOT EXISTS pv_txt ON param_values(name, txt, run_id);
+"""
+
+
+def _canon_value(v):
+    if isinstance(v, bool) or v is None or isinstance(v, str):
+        return v
+    try:
+        return round(float(v), 12)
+    except (TypeError, ValueError):
+        return str(v)
+
+
+def param_hash(params):
+    """Hash canónico de los parámetros resueltos (mismos valores -> misma clave)."""
+    canon = json.dumps({k: _canon_value(v) for k, v in sorted(params.items())},
+                       sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()[:24]
+
+
+def _code_version():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Registry:
+    """Registro SQLite de corridas con índices por hash y por valor de parámetro."""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(_SCHEMA)
+        self.code_version = _code_version()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, script, params, seed=None, scheme=None, timings=None, metrics=None, outputs=None):
+        """Guarda una corrida y devuelve su id."""
+        params = {k: _canon_value(v) for k, v in params.items()}
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs (script, param_hash, seed, scheme, created, code_version, params, "
+                "timings, metrics, outputs) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (script, param_hash(params), seed, scheme, time.time(), self.code_version,
+                 json.dumps(params), json.dumps(timings or {}), json.dumps(metrics or {}, default=float),
+                 json.dumps(outputs or {})))
+            run_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO param_values (run_id, name, num, txt) VALUES (?, ?, ?, ?)",
+                [(run_id, k, v if isinstance(v, (int, float)) and not isinstance(v, bool) else None,
+                  None if isinstance(v, (int, float)) and not isinstance(v, bool) else json.dumps(v))
+                 for k, v in params.items()])
+        return run_id
+
+    def find(self, script=None, seed=None, param_hash=None, limit=None, **conds):
+        """
+        Corridas que cumplen todas las condiciones (las más recientes primero).
+        conds: nombre=valor (igualdad) o nombre=(lo, hi) (rango cerrado; None = abierto).
+        """
+        where, args = [], []
+        for name, cond in conds.items():
+            if isinstance(cond, tuple):
+                lo, hi = cond
+                q = "SELECT run_id FROM param_values WHERE name = ?"
+                a = [name]
+                if lo is not None:
+                    q += " AND num >= ?"
+                    a.append(float(lo))
+                if hi is not None:
+                    q += " AND num <= ?"
+                    a.append(float(hi))
+            elif isinstance(cond, (int, float)) and not isinstance(cond, bool):
+                # Igualdad numérica con la misma tolerancia que el hash (12 decimales)
+                q, a = "SELECT run_id FROM param_values WHERE name = ? AND num = ?", [name, round(float(cond), 12)]
+            else:
+                q, a = "SELECT run_id FROM param_values WHERE name = ? AND txt = ?", [name, json.dumps(cond)]
+            where.append(f"id IN ({q})")
+            args += a
+        for col, val in (("script", script), ("seed", seed), ("param_hash", param_hash)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        sql = "SELECT * FROM runs" + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY id DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [self._row(r) for r in self.conn.execute(sql, args)]
+
+    def lookup(self, script, params, seed=None):
+        """Última corrida de `script` con exactamente estos parámetros (y semilla), o None."""
+        rows = self.find(script=script, seed=seed, param_hash=param_hash(params), limit=1)
+        return rows[0] if rows else None
+
+    def get(self, run_id):
+        r = self.conn.execute("SELECT * FROM runs WHERE id = ?", (int(run_id),)).fetchone()
+        return self._row(r) if r else None
+
+    @staticmethod
+    def _row(r):
+        d = dict(r)
+        for k in ("params", "timings", "metrics", "outputs"):
+            d[k] = json.loads(d[k]) if d[k] else {}
+        return d
+
+
+def _parse_where(s):
+    """'name=v' o 'name=lo:hi' (extremos vacíos = abiertos)."""
+    name, _, val = s.partition("=")
+    if ":" in val:
+        lo, _, hi = val.partition(":")
+        return name, (float(lo) if lo else None, float(hi) if hi else None)
+    try:
+        return name, float(val)
+    except ValueError:
+        return name, val
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Consulta el registro local de corridas (SQLite).")
+    ap.add_argument("--db", type=str, default=DEFAULT_DB, help="Base de datos del registro.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    q = sub.add_parser("query", help="Corridas que cumplen las condiciones.")
+    q.add_argument("--where", action="append", default=[], help="name=valor o name=lo:hi (repetible).")
+    q.add_argument("--script", type=str, default=None)
+    q.add_argument("--limit", type=int, default=50)
+    s = sub.add_parser("show", help="Detalle de una corrida.")
+    s.add_argument("id", type=int)
+    args = ap.parse_args()
+
+    with Registry(args.db) as reg:
+        if args.cmd == "show":
+            print(json.dumps(reg.get(args.id), indent=2, ensure_ascii=False))
+            return
+        t0 = time.perf_counter()
+        rows = reg.find(script=args.script, limit=args.limit, **dict(_parse_where(w) for w in args.where))
+        ms = 1e3 * (time.perf_counter() - t0)
+        for r in rows:
+            m = ", ".join(f"{k}={v:.4g}" for k, v in r["metrics"].items() if isinstance(v, (int, float)))
+            print(f"#{r['id']:<5} {r['script']:<6} seed={r['seed']} hash={r['param_hash'][:10]} | {m}")
+        print(f"[OK] {len(rows)} corridas en {ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# 📦 utils/rendering.py
+#
+# Capa de dibujo para Simulator_tau.py. Cada sesión de Streamlit conserva sus
+# figuras y líneas en st.session_state; en cada rerun solo se actualizan los
+# datos de la línea. Las figuras se crean con matplotlib.figure.Figure (no con
+# pyplot), así que no quedan registradas en el gestor global de pyplot y se
+# liberan al cerrarse la sesión. Como alternativa ligera existe el backend
+# "vectorial" (st.line_chart, Vega-Lite en el navegador), sin figuras en el servidor.
+
+import weakref
+
+import numpy as np
+import streamlit as st
+from matplotlib.figure import Figure
+
+BACKENDS = ("matplotlib", "vectorial")
+
+_PANELS_KEY = "_line_panels"
+
+
+def _release(fig):
+    """Libera los artistas de una figura (llamado por weakref.finalize o close())."""
+    fig.clear()
+
+
+class LinePanel:
+    """Figura persistente con una sola línea; update() solo cambia sus datos."""
+
+    def __init__(self, xlabel, ylabel, label):
+        self.fig = Figure()
+        self.ax = self.fig.subplots()
+        (self.line,) = self.ax.plot([], [], label=label)
+        self.ax.set_xlabel(xlabel)
+        self.ax.set_ylabel(ylabel)
+        self.ax.legend()
+        self._finalizer = weakref.finalize(self, _release, self.fig)
+
+    def update(self, x, y):
+        self.line.set_data(x, y)
+        y = np.asarray(y, float)
+        if np.isfinite(y).any():
+            self.ax.relim()
+            self.ax.autoscale_view()
+        return self.fig
+
+    def close(self):
+        self._finalizer()
+
+
+def _panels():
+    if _PANELS_KEY not in st.session_state:
+        st.session_state[_PANELS_KEY] = {}
+    return st.session_state[_PANELS_KEY]
+
+
+def close_panels():
+    """Cierra todas las figuras de la sesión actual."""
+    panels = _panels()
+    for panel in panels.values():
+        panel.close()
+    panels.clear()
+
+
+def render_line(key, x, y, xlabel, ylabel, label, backend="matplotlib"):
+    """Dibuja (x, y) reutilizando la figura de la sesión identificada por key."""
+    if backend == "vectorial":
+        close_panels()  # no mantener figuras si la sesión cambió de backend
+        y = np.where(np.isfinite(y), y, np.nan)
+        st.line_chart({xlabel: np.asarray(x), label: y}, x=xlabel, y=label)
+        return
+    panels = _panels()
+    panel = panels.get(key)
+    if panel is None:
+        panel = panels[key] = LinePanel(xlabel, ylabel, label)
+    st.pyplot(panel.update(x, y))
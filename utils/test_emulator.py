@@ -0,0 +1,38 @@
+# Pruebas de la tolerancia del emulador de μ(z), H(z) (python -m pytest utils)
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.emulator import exact_observables, train  # noqa: E402
+
+
+def _theta(emu, n=8, seed=0):
+    return np.random.default_rng(seed).uniform(emu.lo, emu.hi, (n, emu.lo.size))
+
+
+def test_emulador_preciso_sirve_el_sustituto():
+    emu = train("lcdm", n_train=256, n_valid=64, degree=6)
+    assert emu.accurate()
+    theta = _theta(emu)
+    mu, H = emu.predict(theta)
+    mu_s, H_s = emu.predict_raw(theta)
+    assert np.array_equal(mu, mu_s) and np.array_equal(H, H_s)
+    mu_x, H_x = exact_observables("lcdm", theta, emu.z)
+    assert np.max(np.abs(mu - mu_x)) <= emu.max_err["mu_mag"] * 1.5
+    assert np.max(np.abs(H / H_x - 1.0)) <= emu.max_err["H_rel"] * 1.5
+
+
+def test_emulador_fuera_de_tolerancia_usa_el_exacto():
+    # Grado 3: ~0.02 mag en μ y ~2% en H, por encima de las tolerancias por defecto.
+    emu = train("lcdm", n_train=64, n_valid=32, degree=3)
+    assert not emu.accurate()
+    theta = _theta(emu)
+    mu, H = emu.predict(theta)
+    mu_x, H_x = exact_observables("lcdm", theta, emu.z)
+    assert np.array_equal(mu, mu_x) and np.array_equal(H, H_x)
+    # sin límite explícito vuelve a servir el sustituto
+    emu.tol_mu = emu.tol_H = None
+    assert emu.accurate() and np.array_equal(emu.predict(theta)[0], emu.predict_raw(theta)[0])
@@ -0,0 +1,53 @@
+# Pruebas de la caché de resultados del servidor de trabajos (python -m pytest utils)
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils import job_server  # noqa: E402
+
+CALLS = []
+
+
+def _job(model, params, z=None):
+    CALLS.append(model)
+    if model == "malo":
+        raise ValueError("parámetros fuera de dominio")
+    return {"model": model}
+
+
+async def _run(server, model):
+    key = server.submit("test", model, {"x": 1.0})
+    while server.status(key)["status"] == "pending":
+        await asyncio.sleep(0.001)
+    return key
+
+
+def test_errores_no_entran_en_la_cache(monkeypatch):
+    monkeypatch.setitem(job_server.JOB_KINDS, "test", _job)
+    CALLS.clear()
+
+    async def main():
+        server = job_server.JobServer(workers=1, error_ttl=60.0)
+        server.pool.shutdown()
+        server.pool = ThreadPoolExecutor(max_workers=1)  # mismo protocolo, sin procesos
+        try:
+            ok = await _run(server, "bueno")
+            bad = await _run(server, "malo")
+            # el sondeo ve el error, pero no ocupa la LRU
+            assert server.status(bad)["status"] == "error" and bad not in server.results
+            # reenviar la misma petición la recalcula; el resultado correcto sí se cachea
+            await _run(server, "malo")
+            await _run(server, "bueno")
+            assert CALLS == ["bueno", "malo", "malo"] and server.stats["cache_hits"] == 1
+            assert server.status(ok)["status"] == "done"
+            # pasado error_ttl el error desaparece
+            server.error_ttl = 0.0
+            await _run(server, "malo")
+            assert server.status(bad)["status"] == "unknown" and not server.errors
+        finally:
+            server.pool.shutdown()
+
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+# Pruebas del banco de filtros log-periódicos (python -m pytest utils)
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from utils.logfreq_filter import best_template, filter_bank  # noqa: E402
+
+
+def _signal(n=400, omega=6.0, delta=1.0, A=0.2, z_tau=2.0, noise=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    z = np.sort(rng.uniform(0.01, 2.3, n))
+    r = A * np.exp(-z / z_tau) * np.cos(omega * np.log1p(z) + delta) + noise * rng.standard_normal(n)
+    return z, r, np.full(n, noise)
+
+
+@pytest.mark.parametrize("method", ["fft", "direct"])
+def test_recupera_plantilla_inyectada(method):
+    z, r, s = _signal()
+    res = filter_bank(z, r, s, omegas=np.linspace(0.1, 12, 400), method=method)
+    best = best_template(res)
+    d_omega = np.diff(res["omega"]).max()                  # resolución de la rejilla de ω
+    assert best["omega"] == pytest.approx(6.0, abs=max(d_omega, 0.1))
+    assert best["stat"] > 50
+
+
+def test_omega_max_sobre_nyquist_afina_la_rejilla():
+    z, r, s = _signal(n=20)
+    res = filter_bank(z, r, s, omegas=[200.0])
+    assert res["omega"].max() <= 200.0
+    assert res["omega"].max() > 190.0
+
+
+def test_n_x_insuficiente_lanza_valueerror():
+    z, r, s = _signal(n=20)
+    with pytest.raises(ValueError, match="Nyquist"):
+        filter_bank(z, r, s, omegas=[200.0], n_x=16)